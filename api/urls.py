@@ -3,5 +3,6 @@ from django.urls import path
 
 urlpatterns = [
     path('get-invoice/', GetInvoiceAPIView.as_view(), name='get-organization-invoice'),
+    path('jobs/<int:pk>/', JobStatusAPIView.as_view(), name='job-status'),
     path('sync-cost-management/', SyncCostManagementAPIView.as_view(), name='sync-cost-management'),
 ]
\ No newline at end of file
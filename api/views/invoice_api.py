@@ -1,95 +1,54 @@
-import os
-import shutil
 import logging
 from django.conf import settings
 
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.views import APIView
-from django.core.files import File
 from datetime import datetime, timedelta
 
 from main.services import AWSAccountManager
 
-from main.models import AwsAccount, AwsCostManagement, RootInvoice
-from main.helpers.invoice_service import S3FileFetcher, get_this_month_csv_bills
+from main.models import AwsAccount, AwsCostManagement, BackgroundJob
+from main.helpers.invoice_jobs import previous_billing_period
+from main.helpers.job_queue import get_or_enqueue_job
 
 
 class GetInvoiceAPIView(APIView):
-    """API to check if billing data exists. If not, fetches CSV files and creates invoices."""
+    """API to fetch last month's CSV files and create invoices. The work is queued as a background job."""
 
     def get(self, request):
         try:
-            # Response data initialization
-            response_data = []
-            today = datetime.today()
-
-            # First day of the current month
-            first_of_this_month = today.replace(day=1)
-
-            # Last day of the previous month = 1st of this month - 1 day
-            bill_end_date = first_of_this_month - timedelta(days=1)
-
-            # First day of the previous month = replace day=1 on bill_end_date
-            bill_start_date = bill_end_date.replace(day=1)
-
-            # Invoice date is today
-            invoice_date = today.date()
-
-            # Check if an invoice already exists for the current billing period
-            existing_invoice = RootInvoice.objects.filter(
-                bill_start_date=bill_start_date,
-                bill_end_date=bill_end_date
-            ).exists()
-
-            if existing_invoice:
-                response_data.append({"message": "Invoice already exists."})
-            else:
-                # ✅ Initialize S3 Fetcher using credentials from settings
-                s3_fetcher = S3FileFetcher()  # No need to pass organization anymore
-
-                # Fetch the CSV files from S3
-                extracted_csv_files = get_this_month_csv_bills(s3_fetcher)
-
-                if not extracted_csv_files:
-                    response_data.append({"message": "No CSV files found."})
-                else:
-                    saved_invoices = []
-                    extracted_path = f"./extracted_csvs/"
-
-                    # Process and save invoices
-                    for csv_file in extracted_csv_files:
-                        # ✅ Ensure file exists before proceeding
-                        if not os.path.exists(csv_file):
-                            logging.error(f"CSV file not found before saving: {csv_file}")
-                            continue  # Skip this file but continue processing others
-
-                        try:
-                            with open(csv_file, 'rb') as file_data:
-                                invoice = RootInvoice.objects.create(
-                                    invoice_file=File(file_data, name=os.path.basename(csv_file)),
-                                    invoice_date=invoice_date,
-                                    bill_start_date=bill_start_date,
-                                    bill_end_date=bill_end_date
-                                )
-                                saved_invoices.append(invoice.invoice_file.url)
-                        except Exception as e:
-                            logging.error(f"❌ Failed to save invoice: {str(e)}")
-                            return Response({"error": f"Failed to save invoice: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
-
-                    # ✅ Only delete the extracted folder if invoices were successfully created
-                    if saved_invoices and os.path.exists(extracted_path):
-                        shutil.rmtree(extracted_path, ignore_errors=True)
-                        logging.info(f"🗑️ Deleted extracted folder")
-
-                    response_data.append({"invoices": saved_invoices})
-
-            return Response(response_data, status=status.HTTP_201_CREATED)
+            # ✅ Reuse the fetch job that is already queued or running (e.g. by `poll_cur`) instead of queueing another one
+            bill_start_date = previous_billing_period()[0].date()
+            job = get_or_enqueue_job('FETCH_INVOICES', {'bill_start_date': bill_start_date.isoformat()})
+            return Response({"job_id": job.pk, "status": job.status}, status=status.HTTP_202_ACCEPTED)
 
         except Exception as e:
             logging.error(f"🚨 Unexpected error: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+
+class JobStatusAPIView(APIView):
+    """API to check the status of a background job."""
+
+    def get(self, request, pk):
+        job = BackgroundJob.objects.filter(pk=pk).first()
+        if not job:
+            return Response({"error": "Job not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        return Response({
+            "job_id": job.pk,
+            "job_type": job.job_type,
+            "status": job.status,
+            "attempts": job.attempts,
+            "max_attempts": job.max_attempts,
+            "result": job.result,
+            "last_error": job.last_error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at,
+        }, status=status.HTTP_200_OK)
+
 class SyncCostManagementAPIView(APIView):
     def get(self, request):
         try:
@@ -159,7 +118,14 @@ class SyncCostManagementAPIView(APIView):
                     }
                 )
 
-            return Response({"message": "Success"}, status=status.HTTP_200_OK)
+            return Response({
+                "message": "Success",
+                "cache": {
+                    "hits": billing_manager.cache_hits,
+                    "misses": billing_manager.cache_misses,
+                    "hit_rate": AWSAccountManager.get_cache_stats()['hit_rate'],
+                },
+            }, status=status.HTTP_200_OK)
 
         except Exception as e:
             logging.error(f"🚨 Unexpected error: {e}")
@@ -8,8 +8,16 @@ admin.site.register(Customer)
 admin.site.register(AwsAccount)
 admin.site.register(Group)
 admin.site.register(RootInvoice)
+admin.site.register(CurReportAssembly)
+admin.site.register(IngestRun)
+admin.site.register(QuarantinedCurRow)
+admin.site.register(IngestCheckpoint)
+admin.site.register(CurPollCursor)
 admin.site.register(AWSAccountInvoice)
 admin.site.register(Service)
 admin.site.register(AccountService)
+admin.site.register(LineItemText)
+admin.site.register(DailyCostRollup)
 admin.site.register(AwsCostManagement)
-admin.site.register(MonthlyCostByAccount)
\ No newline at end of file
+admin.site.register(MonthlyCostByAccount)
+admin.site.register(BackgroundJob)
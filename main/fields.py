@@ -0,0 +1,57 @@
+from decimal import ROUND_HALF_EVEN, Decimal
+
+from django import forms
+from django.core import exceptions
+from django.db import models
+
+NANOS_PER_DOLLAR = 10 ** 9
+
+
+def to_nanos(value) -> int:
+    """Convert an amount in dollars (Decimal, int, float or numeric string) to whole nano-dollars, rounding half to even."""
+    if isinstance(value, float):
+        # repr() is the shortest string that round-trips, so 0.1 converts as 0.1 and not as its binary expansion
+        value = repr(value)
+    return int(Decimal(value).scaleb(9).to_integral_value(rounding=ROUND_HALF_EVEN))
+
+
+def from_nanos(nanos) -> Decimal:
+    """Convert whole nano-dollars back to an exact Decimal amount in dollars."""
+    return Decimal(nanos).scaleb(-9)
+
+
+class NanoDollarField(models.Field):
+    """
+    An amount of money stored exactly as a whole number of nano-dollars in a 64-bit integer column.
+
+    Python values are Decimals in dollars, while the database sums plain integers,
+    so aggregates are fast and exact. Lookups and assignments take dollars too.
+    """
+    description = "Amount of money stored as integer nano-dollars"
+
+    def get_internal_type(self):
+        return 'BigIntegerField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return from_nanos(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, Decimal):
+            return value
+        try:
+            return from_nanos(to_nanos(value))
+        except (ArithmeticError, TypeError, ValueError):
+            raise exceptions.ValidationError(
+                "'%(value)s' value must be a decimal number.", code='invalid', params={'value': value}
+            )
+
+    def get_prep_value(self, value):
+        value = super().get_prep_value(value)
+        if value is None:
+            return None
+        return to_nanos(value)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.DecimalField, 'decimal_places': 9, 'max_digits': 19, **kwargs})
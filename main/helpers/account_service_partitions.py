@@ -0,0 +1,172 @@
+import logging
+
+from django.db import connection, transaction
+
+from main.models import AccountService
+
+logger = logging.getLogger(__name__)
+
+
+def partition_table(invoice_id: int) -> str:
+    """Name of the AccountService partition holding the line items of one RootInvoice."""
+    return f"{AccountService._meta.db_table}_invoice_{int(invoice_id)}"
+
+
+def is_partitioned() -> bool:
+    """True when AccountService is a PostgreSQL table partitioned by ``invoice_id``."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [AccountService._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def existing_partitions() -> dict:
+    """Map invoice id -> partition table name for every attached AccountService partition."""
+    parent = AccountService._meta.db_table
+    prefix = f"{parent}_invoice_"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [parent],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    return {int(name[len(prefix):]): name for name in names if name.startswith(prefix)}
+
+
+def create_partition(invoice_id: int) -> bool:
+    """Create (and attach) the partition of a RootInvoice unless it exists. Returns True if it was created."""
+    name = partition_table(invoice_id)
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(
+            f"CREATE TABLE {quote_name(name)} PARTITION OF {quote_name(AccountService._meta.db_table)}"
+            f" FOR VALUES IN ({int(invoice_id)})"
+        )
+    logger.info(f"🧩 Created AccountService partition {name}")
+    return True
+
+
+def drop_partition(invoice_id: int) -> bool:
+    """Detach and drop the partition of a RootInvoice, with all its rows. Returns True if there was one."""
+    name = partition_table(invoice_id)
+    quote_name = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is None:
+            return False
+        cursor.execute(
+            f"ALTER TABLE {quote_name(AccountService._meta.db_table)} DETACH PARTITION {quote_name(name)}"
+        )
+        cursor.execute(f"DROP TABLE {quote_name(name)}")
+    logger.info(f"🧩 Dropped AccountService partition {name}")
+    return True
+
+
+def delete_account_services(invoice_ids) -> None:
+    """
+    Remove every AccountService row of the given RootInvoices.
+
+    On a partitioned table their partitions are truncated instead of running a
+    row-by-row DELETE that leaves dead tuples behind for vacuum.
+    """
+    invoice_ids = list(invoice_ids)
+    if not is_partitioned():
+        AccountService.objects.filter(invoice_id__in=invoice_ids).delete()
+        return
+    partitions = existing_partitions()
+    names = [partitions[invoice_id] for invoice_id in invoice_ids if invoice_id in partitions]
+    if names:
+        quote_name = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(quote_name(name) for name in names)}")
+
+
+def _table_definitions(cursor, table: str):
+    """The index and foreign key definitions of ``table``, except its primary key."""
+    cursor.execute(
+        "SELECT indexdef FROM pg_indexes WHERE schemaname = current_schema() AND tablename = %s"
+        " AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'p')",
+        [table, table],
+    )
+    indexes = [row[0] for row in cursor.fetchall()]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def _rebuild_table(partitioned: bool) -> int:
+    """
+    Copy AccountService into a new table, partitioned by invoice or not, keeping its ids, indexes and foreign keys.
+
+    Returns the number of rows copied.
+    """
+    table = AccountService._meta.db_table
+    quote_name = connection.ops.quote_name
+    old_table = f"{table}_old"
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        indexes, foreign_keys = _table_definitions(cursor, table)
+        invoice_ids = []
+        if partitioned:
+            cursor.execute(f"SELECT DISTINCT invoice_id FROM {quote_name(table)}")
+            invoice_ids = [row[0] for row in cursor.fetchall()]
+
+        cursor.execute(f"ALTER TABLE {quote_name(table)} RENAME TO {quote_name(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {quote_name(table)}"
+            f" (LIKE {quote_name(old_table)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS)"
+            + (" PARTITION BY LIST (invoice_id)" if partitioned else "")
+        )
+        for invoice_id in invoice_ids:
+            create_partition(invoice_id)
+
+        cursor.execute(f"INSERT INTO {quote_name(table)} SELECT * FROM {quote_name(old_table)}")
+        copied = cursor.rowcount
+        # Frees the index and constraint names for the new table
+        cursor.execute(f"DROP TABLE {quote_name(old_table)}")
+
+        # A primary key on a partitioned table has to include the partition key
+        primary_key = "id, invoice_id" if partitioned else "id"
+        cursor.execute(
+            f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(f'{table}_pkey')} PRIMARY KEY ({primary_key})"
+        )
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {quote_name(table)} ADD CONSTRAINT {quote_name(name)} {definition}")
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 0) + 1, false) FROM {quote_name(table)}",
+            [table],
+        )
+
+    return copied
+
+
+def partition_account_services() -> int:
+    """Turn AccountService into a table partitioned by invoice, one partition per RootInvoice with rows."""
+    if connection.vendor != 'postgresql' or is_partitioned():
+        return 0
+    copied = _rebuild_table(partitioned=True)
+    logger.info(f"🧩 Partitioned AccountService by invoice ({copied} rows)")
+    return copied
+
+
+def unpartition_account_services() -> int:
+    """Merge the AccountService partitions back into one plain table."""
+    if not is_partitioned():
+        return 0
+    copied = _rebuild_table(partitioned=False)
+    logger.info(f"🧩 Merged the AccountService partitions ({copied} rows)")
+    return copied
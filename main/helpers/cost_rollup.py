@@ -0,0 +1,190 @@
+import logging
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, DateTimeField, Q, Sum, Value
+from django.utils import timezone
+
+from main.fields import from_nanos
+from main.helpers.cur_ingest import CUR_MONEY_FIELDS
+from main.models import AccountService, AWSAccountInvoice, DailyCostRollup
+
+logger = logging.getLogger(__name__)
+
+# DailyCostRollup field -> AccountService column (or lookup) it is grouped by
+ROLLUP_KEYS = {
+    'invoice': 'invoice_id',
+    'aws_account': 'aws_account_id',
+    'service': 'service_id',
+    'usage_date': 'usage_start_date',
+    'currency_code': 'currency_code_text__value',
+}
+
+# DailyCostRollup field -> AccountService field it sums
+ROLLUP_SUMS = {
+    'blended_cost': 'blended_cost',
+    'unblendend_cost': 'unblendend_cost',
+    'usage_amount': 'usage_amount',
+}
+
+# Prepared CUR frame columns a chunk is grouped by: the dimension keys of the account and service, then the day and currency
+ROLLUP_FRAME_KEYS = ['account_id', 'service_name', 'region', 'usage_start_date', 'currency_code']
+
+
+def refresh_daily_cost_rollups(invoice_ids) -> int:
+    """
+    Rebuild the DailyCostRollup rows of the given RootInvoices from their AccountService rows.
+
+    The rollups are written with a single ``INSERT ... SELECT ... GROUP BY``, so
+    they always match the stored line items and no row leaves the database;
+    call it in the transaction that wrote them. Returns the number of rollup rows written.
+    """
+    invoice_ids = list(invoice_ids)
+    DailyCostRollup.objects.filter(invoice_id__in=invoice_ids).delete()
+
+    now = timezone.now()
+    # Annotation names must not clash with AccountService fields; their order is the INSERT column order.
+    aggregates = {f'{field}_total': Sum(source) for field, source in ROLLUP_SUMS.items()}
+    constants = {
+        'line_items_total': Count('id'),
+        'is_active_value': Value(True),
+        'created_at_value': Value(now, output_field=DateTimeField()),
+        'updated_at_value': Value(now, output_field=DateTimeField()),
+    }
+    sums = (
+        AccountService.objects.filter(invoice_id__in=invoice_ids)
+        .values(*ROLLUP_KEYS.values())
+        .annotate(**aggregates, **constants)
+        .order_by()
+    )
+    fields = [*ROLLUP_KEYS, *ROLLUP_SUMS, 'line_items', 'is_active', 'created_at', 'updated_at']
+
+    quote_name = connection.ops.quote_name
+    columns = ', '.join(quote_name(DailyCostRollup._meta.get_field(name).column) for name in fields)
+    select_sql, params = sums.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {quote_name(DailyCostRollup._meta.db_table)} ({columns}) {select_sql}", params)
+        written = cursor.rowcount
+
+    logger.info(f"📆 Rebuilt {written} daily cost rollups for invoices {invoice_ids}")
+    return written
+
+
+def add_daily_cost_rollups(invoice, frame, accounts: dict, services: dict, batch_size: int = None) -> int:
+    """
+    Add the line items of a chunk just loaded for a RootInvoice to its DailyCostRollup rows.
+
+    ``frame`` is the prepared chunk, before its text columns were interned;
+    ``accounts`` and ``services`` are the lookups it was loaded with. The chunk
+    is summed per rollup key in memory and merged into the invoice's stored
+    rollups, so they stay current chunk by chunk; call it in the transaction
+    that stores the chunk's rows. Returns the number of rollup rows written.
+    """
+    if not len(frame):
+        return 0
+    batch_size = batch_size or settings.CUR_INGEST_BATCH_SIZE
+
+    aggregates = {field: (source, 'sum') for field, source in ROLLUP_SUMS.items()}
+    sums = frame.groupby(ROLLUP_FRAME_KEYS, dropna=False, sort=False).agg(
+        **aggregates, line_items=('row_hash', 'size'),
+    ).reset_index()
+
+    keys = [
+        (
+            accounts[account_id].pk,
+            services[(service_name, region)].pk,
+            None if pd.isna(usage_date) else usage_date,
+            currency_code,
+        )
+        for account_id, service_name, region, usage_date, currency_code
+        in sums[ROLLUP_FRAME_KEYS].itertuples(index=False, name=None)
+    ]
+    fields = [*ROLLUP_SUMS, 'line_items']
+    values = [
+        dict(zip(fields, row))
+        for row in zip(*(sums[field].tolist() for field in fields))
+    ]
+    for row in values:
+        for field in ROLLUP_SUMS:
+            if field in CUR_MONEY_FIELDS:
+                row[field] = from_nanos(row[field])
+
+    # The invoice's stored rollups of the chunk's accounts and days are merged with its sums and written again
+    usage_dates = {key[2] for key in keys}
+    days = Q(usage_date__in=usage_dates - {None})
+    if None in usage_dates:
+        days |= Q(usage_date__isnull=True)
+    stored = {}
+    for pk, aws_account_id, service_id, usage_date, currency_code, *totals in DailyCostRollup.objects.filter(
+        days, invoice=invoice, aws_account_id__in={key[0] for key in keys},
+    ).values_list('pk', 'aws_account_id', 'service_id', 'usage_date', 'currency_code', *fields):
+        stored[(aws_account_id, service_id, usage_date, currency_code)] = (pk, totals)
+
+    rollups = []
+    merged_pks = []
+    for key, row in zip(keys, values):
+        if key in stored:
+            pk, totals = stored[key]
+            merged_pks.append(pk)
+            for field, total in zip(fields, totals):
+                row[field] += total
+        aws_account_id, service_id, usage_date, currency_code = key
+        rollups.append(DailyCostRollup(
+            invoice=invoice, aws_account_id=aws_account_id, service_id=service_id,
+            usage_date=usage_date, currency_code=currency_code, **row,
+        ))
+
+    # Rewriting the merged rows is much cheaper than a bulk_update, which sends a CASE per field and row
+    for start in range(0, len(merged_pks), batch_size):
+        DailyCostRollup.objects.filter(pk__in=merged_pks[start:start + batch_size]).delete()
+    DailyCostRollup.objects.bulk_create(rollups, batch_size=batch_size)
+    return len(rollups)
+
+
+def update_account_invoices(invoice, batch_size: int = None) -> int:
+    """
+    Store the per-account totals of the invoice's billing period on AWSAccountInvoice.
+
+    The blended cost is summed by one query over the daily cost rollups of every
+    active RootInvoice of the period, so all parts of a multi-file month count
+    but the parts of an assembly still being loaded (see ``ingest_invoices``) don't, and
+    written with one bulk upsert, which also moves ``invoice_date`` to the
+    invoice's. Accounts left without costs in the period are reset to 0.
+    Returns the number of accounts with costs.
+    """
+    batch_size = batch_size or settings.CUR_INGEST_BATCH_SIZE
+    period = {'bill_start_date': invoice.bill_start_date, 'bill_end_date': invoice.bill_end_date}
+    period_rollups = DailyCostRollup.objects.filter(
+        invoice__bill_start_date=invoice.bill_start_date,
+        invoice__bill_end_date=invoice.bill_end_date,
+        invoice__is_active=True,
+    )
+
+    totals = period_rollups.values('aws_account_id').annotate(total=Sum('blended_cost')).order_by()
+    account_invoices = [
+        AWSAccountInvoice(
+            aws_account_id=row['aws_account_id'],
+            total_ammount=row['total'],
+            invoice_date=invoice.invoice_date,
+            **period
+        )
+        for row in totals
+    ]
+    # MySQL upserts on whichever unique key conflicts (ON DUPLICATE KEY UPDATE) and can't be given the fields
+    unique_fields = ['aws_account', 'bill_start_date', 'bill_end_date']
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None
+    AWSAccountInvoice.objects.bulk_create(
+        account_invoices,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=unique_fields,
+        update_fields=['total_ammount', 'invoice_date', 'updated_at'],
+    )
+
+    AWSAccountInvoice.objects.filter(**period).exclude(
+        aws_account_id__in=period_rollups.values('aws_account_id')
+    ).update(total_ammount=0.0, invoice_date=invoice.invoice_date, updated_at=timezone.now())
+
+    return len(account_invoices)
@@ -0,0 +1,216 @@
+import calendar
+import gzip
+from datetime import date, datetime, time
+
+import numpy as np
+import pandas as pd
+
+from main.helpers.cur_ingest import (
+    CUR_ACCOUNT_COLUMN,
+    CUR_COST_COLUMNS,
+    CUR_DATE_COLUMNS,
+    CUR_LINE_ITEM_DESCRIPTION_COLUMN,
+    CUR_NUMERIC_COLUMNS,
+    CUR_PRODUCT_NAME_COLUMN,
+    CUR_REGION_COLUMN,
+    CUR_TEXT_COLUMNS,
+)
+
+# (product/ProductName, lineItem/ProductCode, pricing/unit, typical hourly rate in USD)
+CUR_PRODUCTS = [
+    ('Amazon Elastic Compute Cloud', 'AmazonEC2', 'Hrs', 0.096),
+    ('Amazon Simple Storage Service', 'AmazonS3', 'GB-Mo', 0.023),
+    ('Amazon Relational Database Service', 'AmazonRDS', 'Hrs', 0.171),
+    ('AWS Lambda', 'AWSLambda', 'Lambda-GB-Second', 0.0000166667),
+    ('Amazon CloudFront', 'AmazonCloudFront', 'GB', 0.085),
+    ('Amazon DynamoDB', 'AmazonDynamoDB', 'ReadRequestUnits', 0.00000025),
+    ('Amazon Elastic Container Service', 'AmazonECS', 'hours', 0.04048),
+    ('Amazon Virtual Private Cloud', 'AmazonVPC', 'Hrs', 0.045),
+    ('AWS Key Management Service', 'awskms', 'Requests', 0.00003),
+    ('Amazon CloudWatch', 'AmazonCloudWatch', 'Metrics', 0.3),
+    ('Amazon Elastic Load Balancing', 'AWSELB', 'LCU-Hrs', 0.008),
+    ('Amazon Simple Queue Service', 'AWSQueueService', 'Requests', 0.0000004),
+    ('Amazon ElastiCache', 'AmazonElastiCache', 'NodeUsage', 0.068),
+    ('Amazon Route 53', 'AmazonRoute53', 'HostedZone', 0.5),
+    ('AWS Data Transfer', 'AWSDataTransfer', 'GB', 0.09),
+]
+
+CUR_REGIONS = [
+    'us-east-1', 'us-east-2', 'us-west-1', 'us-west-2', 'eu-west-1', 'eu-central-1', 'eu-north-1',
+    'ap-south-1', 'ap-southeast-1', 'ap-southeast-2', 'ap-northeast-1', 'sa-east-1', 'ca-central-1',
+]
+
+CUR_LINE_ITEM_TYPE_COLUMN = 'lineItem/LineItemType'
+
+# Every column of a generated report: what the ingest reads, plus a few it ignores, as real reports carry many more
+CUR_GENERATED_COLUMNS = [
+    CUR_TEXT_COLUMNS['line_item_id'][0],
+    'identity/TimeInterval',
+    'bill/PayerAccountId',
+    CUR_ACCOUNT_COLUMN,
+    CUR_LINE_ITEM_TYPE_COLUMN,
+    *CUR_DATE_COLUMNS.values(),
+    CUR_TEXT_COLUMNS['product_code'][0],
+    'lineItem/UsageType',
+    CUR_LINE_ITEM_DESCRIPTION_COLUMN,
+    *CUR_COST_COLUMNS.values(),
+    CUR_TEXT_COLUMNS['currency_code'][0],
+    CUR_TEXT_COLUMNS['tax_type'][0],
+    CUR_PRODUCT_NAME_COLUMN,
+    CUR_TEXT_COLUMNS['product_description'][0],
+    CUR_REGION_COLUMN,
+    CUR_TEXT_COLUMNS['usage_term_pricing'][0],
+    CUR_TEXT_COLUMNS['usage_unit_pricing'][0],
+    *CUR_NUMERIC_COLUMNS.values(),
+    CUR_TEXT_COLUMNS['savings_plan_savings_plan_arn'][0],
+]
+
+# Columns that may be left empty, as they often are in real reports
+CUR_OPTIONAL_COLUMNS = [
+    CUR_LINE_ITEM_DESCRIPTION_COLUMN,
+    CUR_REGION_COLUMN,
+    CUR_TEXT_COLUMNS['product_description'][0],
+    CUR_TEXT_COLUMNS['usage_term_pricing'][0],
+    CUR_TEXT_COLUMNS['usage_unit_pricing'][0],
+    CUR_COST_COLUMNS['blended_cost'],
+    *CUR_NUMERIC_COLUMNS.values(),
+]
+
+TIMESTAMP_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def _timestamps(start: datetime, hours: np.ndarray) -> np.ndarray:
+    return pd.to_datetime(start + pd.to_timedelta(hours, unit='h')).strftime(TIMESTAMP_FORMAT).to_numpy()
+
+
+def _products(services: int) -> list:
+    """``services`` products, the real ones first and then made-up ones priced like them."""
+    products = CUR_PRODUCTS[:services]
+    for index in range(len(products), services):
+        name, code, unit, rate = CUR_PRODUCTS[index % len(CUR_PRODUCTS)]
+        products.append((f"{name} {index}", f"{code}{index}", unit, rate))
+    return products
+
+
+def _regions(regions: int) -> list:
+    names = CUR_REGIONS[:regions]
+    names += [f"xx-region-{index}" for index in range(len(names), regions)]
+    return names
+
+
+def generate_cur_frame(
+    rng: np.random.Generator,
+    rows: int,
+    billing_period: date,
+    account_ids: np.ndarray,
+    products: list,
+    regions: list,
+    savings_plan_ratio: float,
+    tax_ratio: float,
+    nan_ratio: float,
+) -> pd.DataFrame:
+    """Generate ``rows`` CUR line items of the month starting at ``billing_period``, empty cells as None or NaN."""
+    period_start = datetime.combine(billing_period, time())
+    period_hours = calendar.monthrange(billing_period.year, billing_period.month)[1] * 24
+
+    kind = rng.random(rows)
+    tax = kind < tax_ratio
+    covered = ~tax & (kind < tax_ratio + savings_plan_ratio)
+
+    product = rng.integers(len(products), size=rows)
+    names, codes, units, rates = (np.array(values, dtype=object) for values in zip(*products))
+    hour = rng.integers(period_hours, size=rows)
+    usage_amount = np.where(tax, 1.0, rng.lognormal(0.0, 1.5, size=rows))
+    rate = rates[product].astype('float64') * rng.choice([1.0, 2.0, 4.0, 8.0], size=rows)
+    unblended = np.where(tax, rng.lognormal(0.0, 2.0, size=rows), usage_amount * rate)
+    # Blended rates average over the organisation and differ a little from the account's own
+    blended = unblended * np.where(tax, 1.0, rng.uniform(0.95, 1.05, size=rows))
+
+    savings_plan_rate = np.where(covered, rate * 0.72, np.nan)
+    effective_cost = np.where(covered, usage_amount * savings_plan_rate, np.nan)
+    line_item_type = np.where(tax, 'Tax', np.where(covered, 'SavingsPlanCoveredUsage', 'Usage'))
+    region = np.array(regions, dtype=object)[rng.integers(len(regions), size=rows)]
+    code = codes[product]
+    line_item_ids = np.frombuffer(rng.bytes(16 * rows), dtype='uint64').reshape(rows, 2)
+    start = np.where(tax, _timestamps(period_start, np.zeros(1))[0], _timestamps(period_start, hour))
+    end = np.where(tax, _timestamps(period_start, np.full(1, period_hours))[0], _timestamps(period_start, hour + 1))
+
+    frame = pd.DataFrame({
+        CUR_TEXT_COLUMNS['line_item_id'][0]: [f"{high:016x}{low:016x}" for high, low in line_item_ids.tolist()],
+        'identity/TimeInterval': start + '/' + end,
+        'bill/PayerAccountId': account_ids[0],
+        CUR_ACCOUNT_COLUMN: account_ids[rng.integers(len(account_ids), size=rows)],
+        CUR_LINE_ITEM_TYPE_COLUMN: line_item_type,
+        CUR_DATE_COLUMNS['usage_start_date']: start,
+        CUR_DATE_COLUMNS['usage_end_date']: end,
+        CUR_TEXT_COLUMNS['product_code'][0]: code,
+        'lineItem/UsageType': 'BoxUsage:' + units[product],
+        CUR_LINE_ITEM_DESCRIPTION_COLUMN: np.where(
+            tax, 'Tax for product code ' + code, np.where(covered, 'SavingsPlanCoveredUsage ', '') + names[product] + ' usage'
+        ),
+        CUR_COST_COLUMNS['blended_cost']: blended,
+        CUR_COST_COLUMNS['usage_amount']: usage_amount,
+        CUR_COST_COLUMNS['unblendend_cost']: unblended,
+        CUR_TEXT_COLUMNS['currency_code'][0]: 'USD',
+        CUR_TEXT_COLUMNS['tax_type'][0]: np.where(tax, 'VAT', None),
+        CUR_PRODUCT_NAME_COLUMN: names[product],
+        CUR_TEXT_COLUMNS['product_description'][0]: names[product] + ' in ' + region,
+        CUR_REGION_COLUMN: np.where(tax, None, region),
+        CUR_TEXT_COLUMNS['usage_term_pricing'][0]: np.where(tax, None, 'OnDemand'),
+        CUR_TEXT_COLUMNS['usage_unit_pricing'][0]: np.where(tax, None, units[product]),
+        CUR_NUMERIC_COLUMNS['public_on_demand_cost_pricing']: np.where(tax, np.nan, rate),
+        CUR_NUMERIC_COLUMNS['public_on_demand_rate_pricing']: np.where(tax, np.nan, unblended),
+        CUR_NUMERIC_COLUMNS['savings_plan_used_commitment']: effective_cost,
+        CUR_NUMERIC_COLUMNS['savings_plan_savings_plan_rate']: savings_plan_rate,
+        CUR_NUMERIC_COLUMNS['savings_plan_total_commitment_to_date']: np.where(covered, 730.0, np.nan),
+        CUR_NUMERIC_COLUMNS['savings_plan_savings_plan_effective_cost']: effective_cost,
+        CUR_NUMERIC_COLUMNS['savings_plan_recurring_commitment_for_billing_period']: np.where(covered, 500.0, np.nan),
+        CUR_NUMERIC_COLUMNS['savings_plan_amortized_upfront_commitment_for_billing_period']: np.where(covered, 230.0, np.nan),
+        CUR_TEXT_COLUMNS['savings_plan_savings_plan_arn'][0]: np.where(
+            covered, 'arn:aws:savingsplans::' + account_ids[0] + ':savingsplan/' + code, None
+        ),
+    }, columns=CUR_GENERATED_COLUMNS)
+
+    for column in CUR_OPTIONAL_COLUMNS:
+        frame.loc[rng.random(rows) < nan_ratio, column] = None
+    return frame
+
+
+def write_cur_report(
+    path,
+    rows: int,
+    accounts: int = 50,
+    services: int = 10,
+    regions: int = 5,
+    savings_plan_ratio: float = 0.2,
+    tax_ratio: float = 0.02,
+    nan_ratio: float = 0.05,
+    billing_period: date = None,
+    seed: int = 0,
+    chunk_size: int = 100000,
+) -> int:
+    """
+    Write a synthetic but realistic CUR CSV of ``rows`` line items to ``path``, gzipped when it ends in ``.gz``.
+
+    Usage, savings plan covered and tax line items are spread over ``accounts``
+    accounts, ``services`` products and ``regions`` regions of one billing month.
+    Optional cells are left empty with probability ``nan_ratio``. The same
+    arguments and ``seed`` always produce the same file. Rows are generated and
+    written ``chunk_size`` at a time, so any size fits in memory.
+    """
+    billing_period = (billing_period or date.today()).replace(day=1)
+    rng = np.random.default_rng(seed)
+    account_ids = np.array([str(value) for value in rng.choice(10 ** 11, size=accounts, replace=False) + 10 ** 11])
+    products = _products(services)
+    region_names = _regions(regions)
+
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'wt', newline='') as handle:
+        handle.write(','.join(CUR_GENERATED_COLUMNS) + '\n')
+        for offset in range(0, rows, chunk_size):
+            frame = generate_cur_frame(
+                rng, min(chunk_size, rows - offset), billing_period, account_ids, products, region_names,
+                savings_plan_ratio, tax_ratio, nan_ratio,
+            )
+            frame.to_csv(handle, header=False, index=False, float_format='%.10f')
+    return rows
@@ -0,0 +1,145 @@
+import logging
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+
+from main.helpers.cur_ingest import ACCOUNT_SERVICE_FIELDS, build_account_services
+from main.models import AccountService
+
+logger = logging.getLogger(__name__)
+
+# Session-local table holding the pks of the stored rows an incremental load has matched so far
+CLAIMED_ROWS_TABLE = 'cur_claimed_account_services'
+
+
+def _chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class LineItemReconciler:
+    """
+    Diffs a re-delivered CUR part against the AccountService rows already stored for its RootInvoice.
+
+    Stored rows are matched by ``(line_item_id, row_hash)``. Every incoming line
+    that matches an unclaimed stored row is unchanged and is dropped from the
+    chunk; whatever is left is the delta. Once the whole file has been seen,
+    ``apply`` turns the delta into writes: stored rows that were not claimed
+    are updated in place with a changed line carrying the same ``line_item_id``,
+    the remaining new lines are inserted and the remaining stale rows deleted.
+
+    Lines sharing a ``line_item_id`` (one per usage hour in hourly reports) are
+    matched as a multiset, so duplicates are handled without a stable ordering.
+
+    The stored rows are never held in memory: every chunk looks up the rows of
+    its own line item ids (through the ``(invoice, line_item_id)`` index), and
+    the pks claimed so far are kept in a temporary table of the connection, so
+    memory is bounded by the chunk size plus the delta. Must run inside a
+    transaction.
+
+    Only the invoice's own rows are compared, updated and deleted: the other
+    parts of a multi-part billing period are not in the file, so their rows
+    are left alone.
+    """
+
+    def __init__(self, invoice):
+        self.invoice = invoice
+        self.pending = []
+        self.unchanged = 0
+        with connection.cursor() as cursor:
+            self._drop_claimed_rows(cursor)
+            cursor.execute(f"CREATE TEMPORARY TABLE {CLAIMED_ROWS_TABLE} (pk bigint PRIMARY KEY)")
+
+    @staticmethod
+    def _drop_claimed_rows(cursor):
+        # A plain DROP TABLE commits the transaction on MySQL
+        temporary = 'TEMPORARY ' if connection.vendor == 'mysql' else ''
+        cursor.execute(f"DROP {temporary}TABLE IF EXISTS {CLAIMED_ROWS_TABLE}")
+
+    def _unclaimed(self):
+        """The invoice's stored rows that no incoming line has claimed yet."""
+        table = connection.ops.quote_name(AccountService._meta.db_table)
+        column = connection.ops.quote_name(AccountService._meta.pk.column)
+        return AccountService.objects.filter(invoice=self.invoice).extra(
+            where=[f"NOT EXISTS (SELECT 1 FROM {CLAIMED_ROWS_TABLE} WHERE {CLAIMED_ROWS_TABLE}.pk = {table}.{column})"]
+        )
+
+    def _stored_rows(self, line_item_ids) -> dict:
+        """Map ``(line_item_id, row_hash)`` to the pks of the unclaimed stored rows with the given line item ids."""
+        stored = {}
+        for chunk in _chunks(line_item_ids, settings.CUR_INGEST_BATCH_SIZE):
+            rows = self._unclaimed().filter(line_item_id__in=chunk).values_list('pk', 'line_item_id', 'row_hash')
+            for pk, line_item_id, row_hash in rows:
+                stored.setdefault((line_item_id, row_hash), []).append(pk)
+        return stored
+
+    def _claim(self, pks: list):
+        if not pks:
+            return
+        with connection.cursor() as cursor:
+            for chunk in _chunks(pks, connection.ops.bulk_batch_size(['pk'], pks)):
+                values = ', '.join(['(%s)'] * len(chunk))
+                cursor.execute(f"INSERT INTO {CLAIMED_ROWS_TABLE} (pk) VALUES {values}", chunk)
+
+    def filter_changed(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Claim the stored rows matched by a prepared chunk and return its new or changed lines."""
+        stored = self._stored_rows(frame['line_item_id'].unique().tolist())
+        changed = []
+        claimed = []
+        for line_item_id, row_hash in zip(frame['line_item_id'].tolist(), frame['row_hash'].tolist()):
+            pks = stored.get((line_item_id, row_hash))
+            if pks:
+                claimed.append(pks.pop())
+                changed.append(False)
+            else:
+                changed.append(True)
+        self._claim(claimed)
+        delta = frame[changed]
+        self.unchanged += len(frame) - len(delta)
+        if len(delta):
+            self.pending.append(delta)
+        return delta
+
+    def apply(self, accounts: dict, services: dict, loader, batch_size: int = None) -> dict:
+        """Write the collected delta and return how many rows were inserted, updated and deleted."""
+        batch_size = batch_size or settings.CUR_INGEST_BATCH_SIZE
+        invoice = self.invoice
+
+        delta = pd.concat(self.pending) if self.pending else pd.DataFrame(columns=['line_item_id'])
+        self.pending = []
+        # Pair every changed line with a stale row of the same line item id, if one is left
+        stale = {}
+        for (line_item_id, _), pks in self._stored_rows(delta['line_item_id'].unique().tolist()).items():
+            stale.setdefault(line_item_id, []).extend(pks)
+        update_pks = []
+        for line_item_id in delta['line_item_id'].tolist():
+            pks = stale.get(line_item_id)
+            update_pks.append(pks.pop() if pks else None)
+        delta = delta.assign(pk=update_pks)
+        updates = delta[delta['pk'].notna()]
+        inserts = delta[delta['pk'].isna()].drop(columns='pk')
+
+        update_fields = ['aws_account', 'service', *ACCOUNT_SERVICE_FIELDS]
+        for start in range(0, len(updates), batch_size):
+            batch = updates.iloc[start:start + batch_size]
+            objs = build_account_services(batch, invoice, accounts, services)
+            for obj, pk in zip(objs, batch['pk'].tolist()):
+                obj.pk = int(pk)
+            AccountService.objects.bulk_update(objs, update_fields)
+        self._claim([int(pk) for pk in updates['pk'].tolist()])
+
+        # Inserted rows are not claimed, so whatever is still unclaimed is stale until they are loaded
+        deleted, _ = self._unclaimed().delete()
+        with connection.cursor() as cursor:
+            self._drop_claimed_rows(cursor)
+
+        if len(inserts):
+            loader.load(inserts, invoice, accounts, services)
+
+        return {
+            'unchanged': self.unchanged,
+            'inserted': len(inserts),
+            'updated': len(updates),
+            'deleted': deleted,
+        }
@@ -0,0 +1,325 @@
+import gzip
+import io
+
+import numpy as np
+import pandas as pd
+
+from main.fields import NANOS_PER_DOLLAR, from_nanos, to_nanos
+
+# CUR columns that identify the account/service dimensions of a line item
+CUR_ACCOUNT_COLUMN = 'lineItem/UsageAccountId'
+CUR_PRODUCT_NAME_COLUMN = 'product/ProductName'
+CUR_LINE_ITEM_DESCRIPTION_COLUMN = 'lineItem/LineItemDescription'
+CUR_REGION_COLUMN = 'product/region'
+
+# Cost columns, rounded to 10 decimal places (AccountService field -> CUR column)
+CUR_COST_COLUMNS = {
+    'blended_cost': 'lineItem/BlendedCost',
+    'usage_amount': 'lineItem/UsageAmount',
+    'unblendend_cost': 'lineItem/UnblendedCost',
+}
+
+# Pricing and savings plan columns, stored as parsed (AccountService field -> CUR column)
+CUR_NUMERIC_COLUMNS = {
+    'public_on_demand_cost_pricing': 'pricing/publicOnDemandRate',
+    'public_on_demand_rate_pricing': 'pricing/publicOnDemandCost',
+    'savings_plan_used_commitment': 'savingsPlan/UsedCommitment',
+    'savings_plan_savings_plan_rate': 'savingsPlan/SavingsPlanRate',
+    'savings_plan_total_commitment_to_date': 'savingsPlan/TotalCommitmentToDate',
+    'savings_plan_savings_plan_effective_cost': 'savingsPlan/SavingsPlanEffectiveCost',
+    'savings_plan_recurring_commitment_for_billing_period': 'savingsPlan/RecurringCommitmentForBillingPeriod',
+    'savings_plan_amortized_upfront_commitment_for_billing_period': 'savingsPlan/AmortizedUpfrontCommitmentForBillingPeriod',
+}
+
+# Money amounts, stored as integer nano-dollars (NanoDollarField). Unit rates keep more decimals and stay floats.
+CUR_MONEY_FIELDS = [
+    'blended_cost',
+    'unblendend_cost',
+    'public_on_demand_rate_pricing',
+    'savings_plan_used_commitment',
+    'savings_plan_total_commitment_to_date',
+    'savings_plan_savings_plan_effective_cost',
+    'savings_plan_recurring_commitment_for_billing_period',
+    'savings_plan_amortized_upfront_commitment_for_billing_period',
+]
+
+CUR_DATE_COLUMNS = {
+    'usage_start_date': 'lineItem/UsageStartDate',
+    'usage_end_date': 'lineItem/UsageEndDate',
+}
+
+# Free text columns (AccountService field -> (CUR column, value when the column is absent))
+CUR_TEXT_COLUMNS = {
+    'product_description': ('product/description', ''),
+    'tax_type': ('lineItem/TaxType', ''),
+    'line_item_id': ('identity/LineItemId', ''),
+    'product_code': ('lineItem/ProductCode', ''),
+    'currency_code': ('lineItem/CurrencyCode', 'USD'),
+    'usage_unit_pricing': ('pricing/unit', ''),
+    'usage_term_pricing': ('pricing/term', ''),
+    'savings_plan_savings_plan_arn': ('savingsPlan/SavingsPlanARN', ''),
+}
+
+# Everything that makes up the content of a line item, hashed into AccountService.row_hash
+ROW_HASH_COLUMNS = [
+    'account_id',
+    'service_name',
+    'region',
+    *CUR_COST_COLUMNS,
+    *CUR_DATE_COLUMNS,
+    *CUR_TEXT_COLUMNS,
+    *CUR_NUMERIC_COLUMNS,
+]
+
+# Low-cardinality text columns stored once in LineItemText (prepared column -> AccountService foreign key column)
+INTERNED_TEXT_COLUMNS = {
+    field: f'{field}_text_id'
+    for field in CUR_TEXT_COLUMNS
+    if field != 'line_item_id'
+}
+
+# AccountService columns written for every prepared line item, once its text columns were interned
+ACCOUNT_SERVICE_FIELDS = [INTERNED_TEXT_COLUMNS.get(field, field) for field in [*ROW_HASH_COLUMNS[3:], 'row_hash']]
+
+NAN_STRINGS = ['nan', 'NaN']
+
+
+def _column(df: pd.DataFrame, name: str, default):
+    """Return the CUR column as a Series, or a constant Series when the report doesn't carry it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(default, index=df.index, dtype=object)
+
+
+def _stripped(df: pd.DataFrame, name: str, default: str) -> pd.Series:
+    # Empty cells are read as NaN and stringify to "nan", matching str(row[...]).
+    return _column(df, name, default).fillna('nan').astype(str).str.strip()
+
+
+def round_half_even(numbers: pd.Series, decimals: int) -> pd.Series:
+    """
+    Round like ``float(format(x, f".{decimals}f"))`` without formatting every value.
+
+    NumPy rounds ``x * 10**decimals``, which can land on the wrong side of a
+    decimal tie; only values that close to a tie are re-rounded exactly.
+    """
+    scaled = numbers.to_numpy(dtype='float64') * 10.0 ** decimals
+    rounded = numbers.round(decimals)
+    distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+    near_tie = distance_to_tie < 1e-6 + np.abs(scaled) * 1e-15
+    if near_tie.any():
+        rounded[near_tie] = [round(value, decimals) for value in numbers[near_tie].tolist()]
+    return rounded
+
+
+def parse_cur_numbers(values: pd.Series, decimals: int = None) -> pd.Series:
+    """Parse a CUR numeric column, mapping empty or malformed cells to 0.0."""
+    numbers = pd.to_numeric(values, errors='coerce').astype('float64')
+    if decimals is not None:
+        numbers = round_half_even(numbers, decimals)
+    return numbers.fillna(0.0)
+
+
+def dollars_to_nanos(raw: pd.Series, dollars: pd.Series) -> pd.Series:
+    """
+    Convert CUR amounts to whole nano-dollars (int64), rounding half to even exactly like ``to_nanos``.
+
+    ``dollars`` is ``raw`` parsed to floats, from which nearly every amount rounds
+    correctly in one vectorized step. The few that are too close to half a
+    nano-dollar for float precision, or above a million dollars, are converted
+    from their CUR text through Decimal instead.
+    """
+    values = dollars.fillna(0.0).to_numpy(dtype='float64')
+    scaled = values * NANOS_PER_DOLLAR
+    nanos = np.rint(scaled).astype('int64')
+    distance_to_tie = np.abs(scaled - np.floor(scaled) - 0.5)
+    inexact = (distance_to_tie < 1e-6 + np.abs(scaled) * 1e-15) | (np.abs(values) >= 1e6)
+    inexact &= dollars.notna().to_numpy()
+    if inexact.any():
+        nanos[inexact] = [to_nanos(value) for value in raw[inexact].tolist()]
+    return pd.Series(nanos, index=dollars.index)
+
+
+def parse_cur_dates(values: pd.Series) -> pd.Series:
+    """Parse ISO-8601 CUR timestamps to dates, mapping empty or malformed cells to None."""
+    parsed = pd.to_datetime(values.str.split('T', n=1).str[0], format='%Y-%m-%d', errors='coerce')
+    dates = parsed.dt.date.astype(object)
+    return dates.where(parsed.notna(), None)
+
+
+def read_cur_chunks(path, chunk_size: int, offset: int = 0, first_row: int = 0):
+    """
+    Stream a CUR CSV (gzipped if its name ends in .gz) as DataFrames of at most ``chunk_size`` rows, every cell read as a string.
+
+    Reading starts at byte ``offset`` of the uncompressed file, which must be
+    the start of row ``first_row`` (counting from 0 after the header). Every
+    chunk is yielded with the offset of the row following it and indexed by
+    row number, so an interrupted load can continue where it stopped.
+    """
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rb') as handle:
+        header = handle.readline()
+        if offset:
+            handle.seek(offset)
+        row = first_row
+        while True:
+            lines = []
+            for _ in range(chunk_size):
+                line = handle.readline()
+                if not line:
+                    break
+                # A quoted cell may span several lines; read on until its quotes are closed
+                while line.count(b'"') % 2:
+                    more = handle.readline()
+                    if not more:
+                        break
+                    line += more
+                lines.append(line)
+            if not lines:
+                return
+            chunk = pd.read_csv(io.BytesIO(header + b''.join(lines)), dtype=str)
+            chunk.index = pd.RangeIndex(row, row + len(chunk))
+            row += len(chunk)
+            yield chunk, handle.tell()
+
+
+def prepare_dimension_keys(df: pd.DataFrame) -> pd.DataFrame:
+    """Derive the ``account_id``, ``service_name`` and ``region`` keys of every CUR line item."""
+    keys = pd.DataFrame(index=df.index)
+
+    keys['account_id'] = _stripped(df, CUR_ACCOUNT_COLUMN, '')
+
+    # Fall back to the line item description, then to a placeholder, when the product name is empty
+    service_name = _stripped(df, CUR_PRODUCT_NAME_COLUMN, '')
+    missing_name = service_name.isin(NAN_STRINGS)
+    if missing_name.any():
+        description = _stripped(df, CUR_LINE_ITEM_DESCRIPTION_COLUMN, '')
+        service_name = service_name.mask(missing_name, description)
+        service_name = service_name.mask(missing_name & service_name.isin(NAN_STRINGS), 'Unknown Service')
+    keys['service_name'] = service_name
+
+    region = _stripped(df, CUR_REGION_COLUMN, 'us-east-1')
+    region = region.mask(region == '', 'us-east-1')
+    keys['region'] = region.mask(region.isin(NAN_STRINGS), 'global')
+
+    return keys
+
+
+def read_dimension_keys(path, chunk_size: int):
+    """
+    Stream only the dimension keys of a CUR CSV, reading just the columns they are derived from.
+
+    Line items without an account id are left out; they are quarantined at ingest.
+    """
+    columns = {CUR_ACCOUNT_COLUMN, CUR_PRODUCT_NAME_COLUMN, CUR_LINE_ITEM_DESCRIPTION_COLUMN, CUR_REGION_COLUMN}
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunk_size, usecols=lambda column: column in columns):
+        keys = prepare_dimension_keys(chunk)
+        yield keys[~keys['account_id'].isin([*NAN_STRINGS, ''])].drop_duplicates()
+
+
+def unparsed_cells(raw: pd.Series, parsed: pd.Series) -> pd.Series:
+    """Cells that hold a value which could not be parsed."""
+    return parsed.isna() & raw.notna() & (raw.astype(str).str.strip() != '')
+
+
+def prepare_cur_frame(df: pd.DataFrame):
+    """
+    Convert a raw CUR DataFrame (read with dtype=str) into AccountService column values.
+
+    Every column is converted and validated in one vectorized pass. Returns the
+    prepared frame of the valid line items, carrying the dimension keys
+    (``account_id``, ``service_name``, ``region``) followed by one column per
+    AccountService field (the ``INTERNED_TEXT_COLUMNS`` still as text and the
+    ``CUR_MONEY_FIELDS`` in nano-dollars), and a frame of the
+    rejected ones with their ``reason`` code and offending ``columns``, indexed
+    like ``df``. Empty cells are not errors; they load as 0, NULL or "nan".
+    """
+    frame = prepare_dimension_keys(df)
+    # Money field -> (raw CUR column, parsed floats), converted to nano-dollars from the unrounded values
+    amounts = {}
+    # (CUR column, reason code, mask of rejected cells), in order of precedence
+    problems = [
+        (CUR_ACCOUNT_COLUMN, 'MISSING_ACCOUNT_ID', frame['account_id'].isin([*NAN_STRINGS, ''])),
+    ]
+
+    for field, column in CUR_DATE_COLUMNS.items():
+        raw = _column(df, column, '').fillna('').astype(str)
+        dates = parse_cur_dates(raw)
+        problems.append((column, 'INVALID_DATE', dates.isna() & (raw.str.strip() != '')))
+        frame[field] = dates
+
+    for field, column in CUR_COST_COLUMNS.items():
+        raw = _column(df, column, 0.0)
+        numbers = pd.to_numeric(raw, errors='coerce')
+        problems.append((column, 'INVALID_NUMBER', unparsed_cells(raw, numbers)))
+        frame[field] = parse_cur_numbers(numbers, decimals=10)
+        if field in CUR_MONEY_FIELDS:
+            amounts[field] = (raw, numbers)
+
+    for field, (column, default) in CUR_TEXT_COLUMNS.items():
+        # Missing cells have always been stored as the string "nan"; keep that so re-ingested rows compare equal.
+        frame[field] = _column(df, column, default).fillna('nan')
+
+    for field, column in CUR_NUMERIC_COLUMNS.items():
+        raw = _column(df, column, 0.0)
+        numbers = pd.to_numeric(raw, errors='coerce')
+        problems.append((column, 'INVALID_NUMBER', unparsed_cells(raw, numbers)))
+        frame[field] = parse_cur_numbers(numbers)
+        if field in CUR_MONEY_FIELDS:
+            amounts[field] = (raw, numbers)
+
+    rejected_mask = np.logical_or.reduce([mask.to_numpy() for _, _, mask in problems])
+    rejected = pd.DataFrame(index=df.index[rejected_mask], columns=['reason', 'columns'], dtype=object)
+    if rejected_mask.any():
+        reasons = {}
+        columns = {index: [] for index in rejected.index}
+        for column, reason, mask in reversed(problems):
+            for index in mask.index[mask.to_numpy() & rejected_mask]:
+                reasons[index] = reason
+                columns[index].insert(0, column)
+        rejected['reason'] = pd.Series(reasons)
+        rejected['columns'] = pd.Series(columns)
+        frame = frame[~rejected_mask].copy()
+
+    frame['row_hash'] = row_hashes(frame)
+    # After hashing, so the hashes of stored rows don't depend on how their amounts are stored
+    for field, (raw, numbers) in amounts.items():
+        frame[field] = dollars_to_nanos(raw.loc[frame.index], numbers.loc[frame.index])
+
+    return frame, rejected
+
+
+def row_hashes(frame: pd.DataFrame) -> pd.Series:
+    """Hash the content of every prepared line item into a signed 64-bit integer."""
+    hashes = pd.util.hash_pandas_object(frame[ROW_HASH_COLUMNS], index=False)
+    return pd.Series(hashes.to_numpy().view('int64'), index=frame.index)
+
+
+def build_account_services(frame: pd.DataFrame, invoice, accounts: dict, services: dict) -> list:
+    """
+    Instantiate unsaved AccountService rows for a prepared frame.
+
+    ``accounts`` maps account ids to AwsAccount objects and ``services`` maps
+    ``(name, region)`` to Service objects; both must cover every key in the frame.
+    Its text columns must have been interned (``DimensionResolver.intern_texts``).
+    """
+    from main.models import AccountService
+
+    aws_accounts = frame['account_id'].map(accounts).tolist()
+    service_objs = pd.Series(
+        list(zip(frame['service_name'], frame['region'])), index=frame.index, dtype=object
+    ).map(services).tolist()
+    columns = [
+        [from_nanos(nanos) for nanos in frame[field].tolist()] if field in CUR_MONEY_FIELDS else frame[field].tolist()
+        for field in ACCOUNT_SERVICE_FIELDS
+    ]
+
+    return [
+        AccountService(
+            aws_account=aws_account,
+            service=service,
+            invoice=invoice,
+            **dict(zip(ACCOUNT_SERVICE_FIELDS, values)),
+        )
+        for aws_account, service, *values in zip(aws_accounts, service_objs, *columns)
+    ]
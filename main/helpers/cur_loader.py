@@ -0,0 +1,188 @@
+import csv
+import io
+import logging
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.db.models.signals import post_save
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from main.helpers.account_service_partitions import create_partition, is_partitioned
+from main.helpers.cur_ingest import ACCOUNT_SERVICE_FIELDS, CUR_DATE_COLUMNS, build_account_services
+from main.helpers.ingest_metrics import IngestMetrics
+from main.models import AccountService
+from main.signals.ingest import account_services_bulk_created
+
+logger = logging.getLogger(__name__)
+
+
+class AccountServiceLoader:
+    """
+    Base class for the strategies that write prepared CUR frames into AccountService.
+
+    Subclasses implement ``write`` and return the number of rows stored; the base
+    class keeps the row count and time spent so throughput can be reported per backend.
+    Subclasses time their steps as phases of ``metrics``.
+
+    After every ``load`` the base class sends ``account_services_bulk_created``
+    with a queryset of the rows just written, whichever backend wrote them.
+    When AccountService is partitioned, the invoice's partition is created first.
+    """
+    name = None
+
+    def __init__(self, batch_size: int = None, metrics: IngestMetrics = None):
+        self.batch_size = batch_size or settings.CUR_INGEST_BATCH_SIZE
+        self.metrics = metrics or IngestMetrics()
+        self.rows = 0
+        self.seconds = 0.0
+        self.partitioned = is_partitioned()
+        self.partitions = set()
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return True
+
+    def load(self, frame: pd.DataFrame, invoice, accounts: dict, services: dict) -> int:
+        started = time.perf_counter()
+        if self.partitioned and invoice.pk not in self.partitions:
+            create_partition(invoice.pk)
+            self.partitions.add(invoice.pk)
+        notify = account_services_bulk_created.has_listeners(AccountService)
+        if notify:
+            # Primary keys only grow, and only this load writes rows for the invoice
+            last_pk = AccountService.objects.aggregate(last_pk=Max('pk'))['last_pk'] or 0
+        rows = self.write(frame, invoice, accounts, services)
+        if notify and rows:
+            with self.metrics.phase('signals'):
+                account_services_bulk_created.send(
+                    sender=AccountService,
+                    invoice=invoice,
+                    queryset=AccountService.objects.filter(invoice=invoice, pk__gt=last_pk),
+                )
+        self.seconds += time.perf_counter() - started
+        self.rows += rows
+        return rows
+
+    def write(self, frame: pd.DataFrame, invoice, accounts: dict, services: dict) -> int:
+        raise NotImplementedError
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class BulkCreateLoader(AccountServiceLoader):
+    """
+    Portable loader using ``bulk_create``.
+
+    ``post_save`` is re-sent for every created row only when
+    ``CUR_INGEST_SEND_POST_SAVE`` is enabled; prefer ``account_services_bulk_created``.
+    """
+    name = 'bulk_create'
+
+    def write(self, frame, invoice, accounts, services):
+        send_post_save = settings.CUR_INGEST_SEND_POST_SAVE
+        for start in range(0, len(frame), self.batch_size):
+            with self.metrics.phase('build_rows'):
+                bulk_insert_data = build_account_services(
+                    frame.iloc[start:start + self.batch_size], invoice, accounts, services
+                )
+            with self.metrics.phase('bulk_create'):
+                created_objs = AccountService.objects.bulk_create(bulk_insert_data)
+            if send_post_save:
+                with self.metrics.phase('post_save'):
+                    for obj in created_objs:
+                        post_save.send(sender=AccountService, instance=obj, created=True)
+        return len(frame)
+
+
+class PostgresCopyLoader(AccountServiceLoader):
+    """
+    Streams rows into the AccountService table with ``COPY ... FROM STDIN``.
+
+    No model instances are created, so ``post_save`` is not sent for the rows.
+    """
+    name = 'copy'
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return connection.vendor == 'postgresql'
+
+    def __init__(self, batch_size: int = None, metrics: IngestMetrics = None):
+        super().__init__(batch_size, metrics)
+        self.fields = [field for field in AccountService._meta.concrete_fields if not field.primary_key]
+        quote_name = connection.ops.quote_name
+        columns = ', '.join(quote_name(field.column) for field in self.fields)
+        # Every value is quoted so empty strings stay '', except missing dates which must load as NULL.
+        dates = ', '.join(quote_name(AccountService._meta.get_field(name).column) for name in CUR_DATE_COLUMNS)
+        self.sql = f"COPY {quote_name(AccountService._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, FORCE_NULL ({dates}))"
+
+    def _copy_frame(self, frame, invoice, accounts, services):
+        now = timezone.now()
+        service_ids = {key: service.pk for key, service in services.items()}
+        data = {}
+        for field in self.fields:
+            if field.name == 'aws_account':
+                data[field.column] = frame['account_id'].map({key: acc.pk for key, acc in accounts.items()})
+            elif field.name == 'service':
+                data[field.column] = pd.Series(
+                    list(zip(frame['service_name'], frame['region'])), index=frame.index, dtype=object
+                ).map(service_ids)
+            elif field.name == 'invoice':
+                data[field.column] = invoice.pk
+            elif field.attname in ACCOUNT_SERVICE_FIELDS:
+                data[field.column] = frame[field.attname]
+            elif getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                data[field.column] = now
+            else:
+                data[field.column] = field.get_default()
+        return pd.DataFrame(data, index=frame.index)
+
+    def write(self, frame, invoice, accounts, services):
+        with connection.cursor() as cursor:
+            for start in range(0, len(frame), self.batch_size):
+                with self.metrics.phase('build_rows'):
+                    buffer = io.StringIO()
+                    self._copy_frame(
+                        frame.iloc[start:start + self.batch_size], invoice, accounts, services
+                    ).to_csv(buffer, header=False, index=False, quoting=csv.QUOTE_ALL)
+                    buffer.seek(0)
+                with self.metrics.phase('copy'):
+                    if hasattr(cursor, 'copy_expert'):
+                        cursor.copy_expert(self.sql, buffer)
+                    else:
+                        with cursor.copy(self.sql) as copy:
+                            copy.write(buffer.getvalue())
+        return len(frame)
+
+
+ACCOUNT_SERVICE_LOADERS = {
+    BulkCreateLoader.name: BulkCreateLoader,
+    PostgresCopyLoader.name: PostgresCopyLoader,
+}
+
+
+def get_account_service_loader(name: str = None, batch_size: int = None, metrics: IngestMetrics = None) -> AccountServiceLoader:
+    """
+    Return the AccountService loader configured by ``CUR_INGEST_LOADER``.
+
+    ``name`` is a key of ``ACCOUNT_SERVICE_LOADERS``, a dotted path to an
+    ``AccountServiceLoader`` subclass, or ``auto``. ``auto`` picks COPY on
+    PostgreSQL unless per-row ``post_save`` is enabled with ``CUR_INGEST_SEND_POST_SAVE``
+    and something listens to it, and ``bulk_create`` everywhere else. Unsupported choices fall back to ``bulk_create``.
+    """
+    name = name or settings.CUR_INGEST_LOADER
+    if name == 'auto':
+        needs_post_save = settings.CUR_INGEST_SEND_POST_SAVE and post_save.has_listeners(AccountService)
+        use_copy = PostgresCopyLoader.is_supported() and not needs_post_save
+        name = PostgresCopyLoader.name if use_copy else BulkCreateLoader.name
+
+    loader_class = ACCOUNT_SERVICE_LOADERS.get(name) or import_string(name)
+    if not loader_class.is_supported():
+        logger.warning(f"{loader_class.name} loader is not supported on {connection.vendor}, using bulk_create")
+        loader_class = BulkCreateLoader
+    return loader_class(batch_size=batch_size, metrics=metrics)
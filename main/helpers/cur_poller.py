@@ -0,0 +1,62 @@
+import logging
+from datetime import datetime
+
+from django.db import transaction
+
+from main.helpers.cur_sources import CurSource, get_cur_source
+from main.helpers.invoice_jobs import billing_period, previous_billing_period
+from main.helpers.invoice_service import get_billing_period_prefix, get_cur_manifest_key
+from main.helpers.job_queue import get_or_enqueue_job
+from main.models import CurPollCursor
+
+logger = logging.getLogger(__name__)
+
+
+def poll_billing_period(source: CurSource, bill_start_date):
+    """
+    Queue a fetch of the billing period if the CUR source received a delivery since the last poll.
+
+    The period's manifest is rewritten last by every delivery, so when its
+    ETag matches the cursor a single HEAD / stat settles the poll. Otherwise
+    the prefix is listed and only objects modified after the cursor count;
+    the cursor moves forward in the transaction that queues the fetch (or
+    finds one that has not started yet), so a delivery is never lost between
+    the two. Returns the queued job, or None.
+    """
+    prefix = get_billing_period_prefix(source, bill_start_date)
+    cursor, _ = CurPollCursor.objects.get_or_create(prefix=prefix)
+
+    manifest = source.stat(get_cur_manifest_key(source, bill_start_date))
+    if manifest and manifest['ETag'] == cursor.etag:
+        return None
+
+    objects = source.list_objects(prefix)
+    changed = [
+        obj for obj in objects
+        if (cursor.last_modified is None or obj['LastModified'] > cursor.last_modified)
+        and obj['Key'].endswith(('.gz', '-Manifest.json'))
+    ]
+
+    job = None
+    with transaction.atomic():
+        if changed:
+            logger.info(f"📬 {len(changed)} new or changed CUR objects in {prefix}")
+            # A running fetch may have read the manifest before this delivery, so only a queued one is reused
+            job = get_or_enqueue_job(
+                'FETCH_INVOICES', {'bill_start_date': bill_start_date.date().isoformat()}, statuses=['QUEUED']
+            )
+        if objects:
+            newest = max(obj['LastModified'] for obj in objects)
+            cursor.last_modified = max(cursor.last_modified, newest) if cursor.last_modified else newest
+        cursor.etag = manifest['ETag'] if manifest else ''
+        cursor.save()
+    return job
+
+
+def poll_cur_deliveries(source: CurSource = None, today=None) -> list:
+    """Poll the current (month-to-date) and the previous billing period; returns the fetch jobs queued."""
+    source = source or get_cur_source()
+    today = today or datetime.today()
+    periods = [billing_period(today)[0], previous_billing_period(today)[0]]
+    jobs = [poll_billing_period(source, bill_start_date) for bill_start_date in periods]
+    return [job for job in jobs if job]
@@ -0,0 +1,86 @@
+import logging
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from main.helpers.cost_rollup import refresh_daily_cost_rollups, update_account_invoices
+from main.helpers.cur_ingest import prepare_cur_frame
+from main.helpers.cur_loader import get_account_service_loader
+from main.helpers.dimension_resolver import get_dimension_resolver
+from main.models import QuarantinedCurRow
+
+logger = logging.getLogger(__name__)
+
+# read_csv numbers data rows from 0; the header is line 1 of the file
+FIRST_DATA_LINE = 2
+
+
+def quarantine_rows(invoice, chunk: pd.DataFrame, rejected: pd.DataFrame, batch_size: int = None) -> int:
+    """Store the rejected line items of a raw CUR chunk, with their raw values, as QuarantinedCurRows."""
+    batch_size = batch_size or settings.CUR_INGEST_BATCH_SIZE
+    raw = chunk.loc[rejected.index].astype(object)
+    raw = raw.where(raw.notna(), None)
+    QuarantinedCurRow.objects.bulk_create(
+        [
+            QuarantinedCurRow(
+                invoice=invoice,
+                row_number=int(index) + FIRST_DATA_LINE,
+                reason=reason,
+                columns=columns,
+                raw_values=raw_values,
+            )
+            for index, reason, columns, raw_values in zip(
+                rejected.index, rejected['reason'], rejected['columns'], raw.to_dict('records')
+            )
+        ],
+        batch_size=batch_size,
+    )
+    return len(rejected)
+
+
+def redrive_quarantined_rows(invoice, batch_size: int = None) -> dict:
+    """
+    Validate the quarantined rows of a RootInvoice again and load the ones that pass.
+
+    Meant to be run after the raw values were fixed (e.g. in the admin). Loaded
+    rows are marked REDRIVEN, rows that still fail keep their new reason, and
+    the invoice's rollups and account totals are refreshed, all in one transaction.
+    """
+    rows = {
+        row.row_number - FIRST_DATA_LINE: row
+        for row in QuarantinedCurRow.objects.filter(invoice=invoice, status='QUARANTINED')
+    }
+    if not rows:
+        return {'redriven': 0, 'quarantined': 0}
+
+    df = pd.DataFrame.from_dict({index: row.raw_values for index, row in rows.items()}, orient='index')
+    frame, rejected = prepare_cur_frame(df)
+
+    with transaction.atomic():
+        if len(frame):
+            accounts, services = {}, {}
+            resolver = get_dimension_resolver()
+            resolver.resolve(frame, accounts, services)
+            frame = resolver.intern_texts(frame)
+            get_account_service_loader(batch_size=batch_size).load(frame, invoice, accounts, services)
+            QuarantinedCurRow.objects.filter(pk__in=[rows[index].pk for index in frame.index]).update(
+                status='REDRIVEN', updated_at=timezone.now()
+            )
+
+        still_rejected = []
+        now = timezone.now()
+        for index, reason, columns in rejected.itertuples():
+            row = rows[index]
+            row.reason = reason
+            row.columns = columns
+            row.updated_at = now
+            still_rejected.append(row)
+        QuarantinedCurRow.objects.bulk_update(still_rejected, ['reason', 'columns', 'updated_at'])
+
+        refresh_daily_cost_rollups([invoice.pk])
+        update_account_invoices(invoice)
+
+    logger.info(f"🔁 Re-drove {len(frame)} quarantined rows of invoice {invoice.pk}, {len(rejected)} still rejected")
+    return {'redriven': len(frame), 'quarantined': len(rejected)}
@@ -0,0 +1,284 @@
+import json
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import boto3
+from boto3.s3.transfer import TransferConfig
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+class CurSource:
+    """
+    Base class for the places CUR exports are read from.
+
+    Objects are addressed by S3-style keys under ``bucket_prefix``. Subclasses
+    implement ``list_objects``, ``stat`` and ``open``; listing and stat return
+    dicts with the ``Key``, ``ETag``, ``Size`` and ``LastModified`` of S3's
+    responses, so callers handle every source alike. Remote sources are
+    downloaded (and cached); local ones are read where they are.
+    """
+    name = None
+    remote = True
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.bucket_prefix = settings.BUCKET_PREFIX
+
+    def list_objects(self, prefix: str) -> list:
+        raise NotImplementedError
+
+    def stat(self, key: str):
+        """The object's ``Key``, ``ETag``, ``Size`` and ``LastModified``, or None if it doesn't exist."""
+        raise NotImplementedError
+
+    def open(self, key: str):
+        """A binary stream of the object's content; raises FileNotFoundError if it doesn't exist."""
+        raise NotImplementedError
+
+    def local_path(self, key: str):
+        """The path the object can be read from in place, or None if it has to be downloaded."""
+        return None
+
+    def holds(self, path: str) -> bool:
+        """Whether ``path`` is one of the source's own files, which must not be removed after use."""
+        return False
+
+    def list_files(self, prefix: str):
+        """List all files under the given prefix."""
+        return [obj['Key'] for obj in self.list_objects(prefix)]
+
+    def read_json(self, key: str):
+        """Read and parse a JSON object. Returns None if the key doesn't exist."""
+        try:
+            with self.open(key) as stream:
+                return json.load(stream)
+        except FileNotFoundError:
+            self.logger.warning(f"Object not found: {key}")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error reading {key}: {str(e)}")
+            raise
+
+    def download_file(self, key: str, local_path: str):
+        """Copy an object into ``local_path`` and return the local file."""
+        try:
+            os.makedirs(local_path, exist_ok=True)
+            local_filename = os.path.join(local_path, os.path.basename(key))
+            started = time.perf_counter()
+            with self.open(key) as stream, open(local_filename, 'wb') as local_file:
+                shutil.copyfileobj(stream, local_file, 1024 * 1024)
+            seconds = time.perf_counter() - started
+            size_mb = os.path.getsize(local_filename) / 1024 / 1024
+            self.logger.info(
+                f"File downloaded successfully: {local_filename} "
+                f"({size_mb:.1f} MiB in {seconds:.2f}s, {size_mb / seconds if seconds else 0:.1f} MiB/s)"
+            )
+            return local_filename
+        except Exception as e:
+            self.logger.error(f"Error downloading file: {str(e)}")
+            raise
+
+    def download_files(self, keys: list, local_path: str, workers: int = None):
+        """
+        Download several files at once, ``workers`` files at a time (default: CUR_DOWNLOAD_WORKERS).
+
+        Files that fail are logged and left out. Returns the local path of every downloaded key.
+        """
+        workers = max(1, min(workers or settings.CUR_DOWNLOAD_WORKERS, len(keys) or 1))
+        started = time.perf_counter()
+        downloaded = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(self.download_file, key, local_path): key for key in keys}
+            for future in as_completed(futures):
+                try:
+                    downloaded[futures[future]] = future.result()
+                except Exception as e:
+                    self.logger.error(f"Error downloading {futures[future]}: {e}")
+
+        seconds = time.perf_counter() - started
+        size_mb = sum(os.path.getsize(path) for path in downloaded.values()) / 1024 / 1024
+        self.logger.info(
+            f"⬇️ Downloaded {len(downloaded)}/{len(keys)} files ({size_mb:.1f} MiB) in {seconds:.2f}s "
+            f"({size_mb / seconds if seconds else 0:.1f} MiB/s, {workers} at a time)"
+        )
+        return downloaded
+
+
+class S3FileFetcher(CurSource):
+    """CUR exports in the S3 bucket of ``BUCKET_NAME``; large objects are downloaded in parallel ranged parts."""
+    name = 's3'
+
+    def __init__(self):
+        """Initialize S3 Client using credentials from settings."""
+        super().__init__()
+
+        # Fetch AWS credentials and settings from environment variables
+        self.bucket_name = settings.BUCKET_NAME
+        self.region = settings.BUCKET_REGION
+        self.aws_access_key_id = settings.AWS_ACCESS_KEY_ID
+        self.aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY
+
+        if not all([self.bucket_name, self.region, self.aws_access_key_id, self.aws_secret_access_key]):
+            self.logger.error("Missing AWS credentials or configurations.")
+            raise ValueError("Missing AWS credentials or configurations.")
+
+        # ✅ Initialize S3 client
+        try:
+            self.s3_client = boto3.client(
+                's3',
+                aws_access_key_id=self.aws_access_key_id,
+                aws_secret_access_key=self.aws_secret_access_key,
+                region_name=self.region
+            )
+            self.logger.info(f"S3 client initialized successfully.")
+        except Exception as e:
+            self.logger.error(f"Failed to initialize S3 client: {str(e)}")
+            raise
+
+        part_size = settings.CUR_DOWNLOAD_PART_SIZE_MB * 1024 * 1024
+        self.transfer_config = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=settings.CUR_DOWNLOAD_MAX_CONCURRENCY,
+        )
+
+    def list_objects(self, prefix: str):
+        """List the objects (``Key``, ``ETag``, ``Size``, ...) under the given prefix, following every page of 1,000 keys."""
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            objects = [
+                obj
+                for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix)
+                for obj in page.get('Contents', [])
+            ]
+
+            if objects:
+                self.logger.info(f"Found {len(objects)} files in {prefix}")
+            else:
+                self.logger.warning(f"No files found in {prefix}")
+            return objects
+        except Exception as e:
+            self.logger.error(f"Error listing files: {str(e)}")
+            raise
+
+    def stat(self, key: str):
+        try:
+            response = self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+        except self.s3_client.exceptions.ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return {
+            'Key': key,
+            'ETag': response['ETag'],
+            'Size': response['ContentLength'],
+            'LastModified': response['LastModified'],
+        }
+
+    def open(self, key: str):
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket_name, Key=key)['Body']
+        except self.s3_client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+
+    def download_file(self, s3_key: str, local_path: str):
+        """Download a specific file from S3, in parallel ranged parts once it is larger than one part."""
+        try:
+            os.makedirs(local_path, exist_ok=True)
+            local_filename = os.path.join(local_path, os.path.basename(s3_key))
+            started = time.perf_counter()
+            self.s3_client.download_file(self.bucket_name, s3_key, local_filename, Config=self.transfer_config)
+            seconds = time.perf_counter() - started
+            size_mb = os.path.getsize(local_filename) / 1024 / 1024
+            self.logger.info(
+                f"File downloaded successfully: {local_filename} "
+                f"({size_mb:.1f} MiB in {seconds:.2f}s, {size_mb / seconds if seconds else 0:.1f} MiB/s)"
+            )
+            return local_filename
+        except Exception as e:
+            self.logger.error(f"Error downloading file: {str(e)}")
+            raise
+
+
+class LocalCurSource(CurSource):
+    """
+    CUR exports mirrored to a local directory or NFS mount (``CUR_SOURCE_DIR``), laid out like the bucket.
+
+    The key ``<prefix>/<period>/<assembly>/<report>-1.csv.gz`` is the file of that
+    relative path. Files are read in place instead of being downloaded; their
+    ETag is made of the modification time and size, which change when the
+    mirror replaces a file.
+    """
+    name = 'local'
+    remote = False
+
+    def __init__(self, directory=None):
+        super().__init__()
+        self.directory = os.path.abspath(str(directory or settings.CUR_SOURCE_DIR or ''))
+        if not os.path.isdir(self.directory):
+            self.logger.error(f"CUR source directory {self.directory} does not exist.")
+            raise ValueError(f"CUR source directory {self.directory} does not exist.")
+
+    def local_path(self, key: str):
+        return os.path.join(self.directory, *key.split('/'))
+
+    def holds(self, path: str) -> bool:
+        return os.path.abspath(path).startswith(self.directory + os.sep)
+
+    def _object(self, key: str, stat: os.stat_result) -> dict:
+        return {
+            'Key': key,
+            'ETag': f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            'Size': stat.st_size,
+            'LastModified': datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+        }
+
+    def list_objects(self, prefix: str):
+        """List the files whose key starts with ``prefix``, in key order like S3."""
+        # Only the directory the prefix points into has to be walked
+        top = os.path.dirname(self.local_path(prefix)) if '/' in prefix else self.directory
+        objects = []
+        for root, _, files in os.walk(top):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                key = os.path.relpath(path, self.directory).replace(os.sep, '/')
+                if key.startswith(prefix):
+                    objects.append(self._object(key, os.stat(path)))
+        objects.sort(key=lambda obj: obj['Key'])
+
+        if objects:
+            self.logger.info(f"Found {len(objects)} files in {prefix}")
+        else:
+            self.logger.warning(f"No files found in {prefix}")
+        return objects
+
+    def stat(self, key: str):
+        try:
+            return self._object(key, os.stat(self.local_path(key)))
+        except FileNotFoundError:
+            return None
+
+    def open(self, key: str):
+        return open(self.local_path(key), 'rb')
+
+
+CUR_SOURCES = {
+    S3FileFetcher.name: S3FileFetcher,
+    LocalCurSource.name: LocalCurSource,
+}
+
+
+def get_cur_source(name: str = None) -> CurSource:
+    """
+    Return the CUR source configured by ``CUR_SOURCE``.
+
+    ``name`` is a key of ``CUR_SOURCES`` or a dotted path to a ``CurSource`` subclass.
+    """
+    name = name or settings.CUR_SOURCE
+    source_class = CUR_SOURCES.get(name) or import_string(name)
+    return source_class()
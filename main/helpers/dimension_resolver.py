@@ -0,0 +1,256 @@
+import logging
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from main.helpers.cur_ingest import INTERNED_TEXT_COLUMNS
+from main.models import AwsAccount, LineItemText, Service
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """A small least-recently-used mapping with a fixed number of entries."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+def _chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _upsert_options(unique_fields: list) -> dict:
+    """
+    ``bulk_create`` options that add missing dimension rows without failing on the ones stored meanwhile.
+
+    Where the backend can name the conflicting unique fields the rows are
+    upserted, which returns their pks on PostgreSQL and SQLite. MySQL can't,
+    so conflicts are ignored there; the rows come back without pks and are
+    selected again by their natural key.
+    """
+    if connection.features.supports_update_conflicts_with_target:
+        return {'update_conflicts': True, 'unique_fields': unique_fields, 'update_fields': ['updated_at']}
+    return {'ignore_conflicts': True}
+
+
+class DimensionResolver:
+    """
+    Maps the account ids and ``(service, region)`` keys of CUR line items to AwsAccount and Service rows,
+    and their low-cardinality text values to LineItemText ids.
+
+    Keys are looked up in a bounded in-process LRU first, then in the database
+    with chunked ``IN`` queries, and whatever is still missing is created with
+    an upsert that returns the primary keys (on MySQL, an insert that ignores
+    conflicts and a second lookup; see ``_upsert_options``). Upserts go in unique key order,
+    so concurrent ingest workers creating overlapping text values (which,
+    unlike accounts and services, are not resolved up front) lock them in
+    the same order instead of deadlocking. Rows created inside a transaction
+    are only cached once it commits, so a rolled back ingest never leaves
+    dangling ids in the cache.
+
+    The cache is per process. The ``post_delete`` receivers of
+    ``main.signals.ingest`` only evict rows deleted through the ORM in the same
+    process; raw SQL deletes and deletes in other workers or web processes
+    leave stale rows behind until ``clear`` is called. Loads that then fail
+    with an IntegrityError clear it and retry (see ``main.utils.forget_dimensions``).
+    """
+
+    def __init__(self, cache_size: int = None, lookup_chunk_size: int = None):
+        cache_size = cache_size or settings.CUR_DIMENSION_CACHE_SIZE
+        self.lookup_chunk_size = lookup_chunk_size or settings.CUR_DIMENSION_LOOKUP_CHUNK_SIZE
+        self.accounts = LRUCache(cache_size)
+        self.services = LRUCache(cache_size)
+        self.texts = LRUCache(cache_size)
+
+    def resolve(self, frame: pd.DataFrame, accounts: dict, services: dict):
+        """
+        Add every account and ``(service, region)`` of a prepared CUR frame to ``accounts`` / ``services``.
+
+        Keys already present in the given dicts are skipped, so they can be
+        reused across the chunks of a file.
+        """
+        account_ids = [key for key in frame['account_id'].unique().tolist() if key not in accounts]
+        service_keys = [
+            key for key in frame[['service_name', 'region']].drop_duplicates().itertuples(index=False, name=None)
+            if key not in services
+        ]
+        if account_ids:
+            accounts.update(self._resolve_accounts(account_ids))
+        if service_keys:
+            services.update(self._resolve_services(service_keys))
+
+    def _resolve_accounts(self, account_ids: list) -> dict:
+        resolved, missing = self._from_cache(self.accounts, account_ids)
+
+        for chunk in _chunks(missing, self.lookup_chunk_size):
+            for acc in AwsAccount.objects.filter(account_id__in=chunk):
+                resolved[acc.account_id] = acc
+                self.accounts.put(acc.account_id, acc)
+
+        new_ids = sorted(key for key in missing if key not in resolved)
+        if new_ids:
+            created = AwsAccount.objects.bulk_create(
+                [AwsAccount(account_id=key, name=f"AWS Account {key}") for key in new_ids],
+                **_upsert_options(['account_id']),
+            )
+            if any(acc.pk is None for acc in created):
+                # Backends that can't return rows from an upsert
+                created = [
+                    acc
+                    for chunk in _chunks(new_ids, self.lookup_chunk_size)
+                    for acc in AwsAccount.objects.filter(account_id__in=chunk)
+                ]
+            created = {acc.account_id: acc for acc in created}
+            resolved.update(created)
+            self._cache_on_commit(self.accounts, created)
+
+        return resolved
+
+    def _resolve_services(self, service_keys: list) -> dict:
+        resolved, missing = self._from_cache(self.services, service_keys)
+
+        wanted = set(missing)
+        names = sorted({name for name, _ in missing})
+        for chunk in _chunks(names, self.lookup_chunk_size):
+            for srv in Service.objects.filter(name__in=chunk):
+                key = (srv.name, srv.region)
+                if key in wanted:
+                    resolved[key] = srv
+                    self.services.put(key, srv)
+
+        new_keys = sorted((key for key in missing if key not in resolved), key=lambda key: (key[0], key[1] or ''))
+        if new_keys:
+            created = Service.objects.bulk_create(
+                [Service(name=name, region=region) for name, region in new_keys],
+                **_upsert_options(['name', 'region']),
+            )
+            if any(srv.pk is None for srv in created):
+                new_names = sorted({name for name, _ in new_keys})
+                created = [
+                    srv
+                    for chunk in _chunks(new_names, self.lookup_chunk_size)
+                    for srv in Service.objects.filter(name__in=chunk)
+                    if (srv.name, srv.region) in wanted
+                ]
+            created = {(srv.name, srv.region): srv for srv in created}
+            resolved.update(created)
+            self._cache_on_commit(self.services, created)
+
+        return resolved
+
+    def intern_texts(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """
+        Return a prepared CUR frame with its ``INTERNED_TEXT_COLUMNS`` replaced by LineItemText ids.
+
+        Text values not stored yet are added, the same way as missing accounts and services.
+        """
+        fields = [field for field in INTERNED_TEXT_COLUMNS if field in frame.columns]
+        if not fields:
+            return frame
+        values = pd.unique(np.concatenate([frame[field].to_numpy(dtype=object) for field in fields])).tolist()
+        text_ids = self._resolve_texts(values)
+        interned = {INTERNED_TEXT_COLUMNS[field]: frame[field].map(text_ids) for field in fields}
+        return frame.drop(columns=fields).assign(**interned)
+
+    def _resolve_texts(self, values: list) -> dict:
+        resolved, missing = self._from_cache(self.texts, values)
+
+        # Texts are unique by their hash, which is what is looked up and upserted
+        hashes = {LineItemText.hash_value(value): value for value in missing}
+        for chunk in _chunks(list(hashes), self.lookup_chunk_size):
+            for pk, value_hash in LineItemText.objects.filter(value_hash__in=chunk).values_list('pk', 'value_hash'):
+                resolved[hashes[value_hash]] = pk
+                self.texts.put(hashes[value_hash], pk)
+
+        new_hashes = sorted(value_hash for value_hash, value in hashes.items() if value not in resolved)
+        if new_hashes:
+            created = LineItemText.objects.bulk_create(
+                [LineItemText(value=hashes[value_hash], value_hash=value_hash) for value_hash in new_hashes],
+                **_upsert_options(['value_hash']),
+            )
+            if any(text.pk is None for text in created):
+                created = [
+                    text
+                    for chunk in _chunks(new_hashes, self.lookup_chunk_size)
+                    for text in LineItemText.objects.filter(value_hash__in=chunk)
+                ]
+            created = {text.value: text.pk for text in created}
+            resolved.update(created)
+            self._cache_on_commit(self.texts, created)
+
+        return resolved
+
+    @staticmethod
+    def _from_cache(cache: LRUCache, keys: list):
+        resolved, missing = {}, []
+        for key in keys:
+            value = cache.get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                resolved[key] = value
+        return resolved, missing
+
+    @staticmethod
+    def _cache_on_commit(cache: LRUCache, created: dict):
+        def cache_created():
+            for key, value in created.items():
+                cache.put(key, value)
+        transaction.on_commit(cache_created)
+
+    def forget_account(self, account_id):
+        self.accounts.discard(account_id)
+
+    def forget_service(self, name, region):
+        self.services.discard((name, region))
+
+    def forget_text(self, value):
+        self.texts.discard(value)
+
+    def clear(self):
+        self.accounts.clear()
+        self.services.clear()
+        self.texts.clear()
+
+
+_resolver = None
+
+
+def get_dimension_resolver() -> DimensionResolver:
+    """Return the resolver shared by every ingest run in this process (its cache is not shared across processes)."""
+    global _resolver
+    if _resolver is None:
+        _resolver = DimensionResolver()
+    return _resolver
@@ -0,0 +1,121 @@
+import json
+import os
+from datetime import date
+
+from django.core.files import File
+from django.db import connection
+from django.test.utils import override_settings
+
+from main.helpers.ingest_metrics import peak_memory_mb
+from main.models import AccountService, IngestRun, RootInvoice
+from main.utils import process_invoice_csv_data
+
+# Synthetic reports the ingest is benchmarked on (arguments of write_cur_report)
+BENCHMARK_SCENARIOS = {
+    'small': {'rows': 20000, 'accounts': 20, 'services': 8, 'regions': 4},
+    'medium': {'rows': 200000, 'accounts': 200, 'services': 15, 'regions': 8},
+    'large': {'rows': 2000000, 'accounts': 1000, 'services': 40, 'regions': 13},
+}
+
+# Fixed, so every run of a scenario ingests the very same file
+BENCHMARK_BILLING_PERIOD = date(2025, 5, 1)
+
+BENCHMARK_ENGINES = {
+    'sqlite': 'django.db.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+# Metrics kept in the baseline file
+BASELINE_METRICS = ['rows', 'rows_per_second', 'peak_memory_mb', 'queries']
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` counting the statements run, without keeping their SQL like CaptureQueriesContext."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def run_ingest_benchmark(path, workdir) -> dict:
+    """
+    Ingest the CUR file at ``path`` into a throwaway database and measure it.
+
+    A test database is created for the ``default`` connection (a file in
+    ``workdir`` on SQLite), the file is loaded as a RootInvoice with
+    ``process_invoice_csv_data`` and the database is destroyed again. Returns
+    the metrics of the IngestRun, the number of SQL statements run (COPY
+    excluded) and the peak RSS of the process, which is why every benchmark
+    runs in a fresh process.
+    """
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'benchmark.sqlite3')
+    else:
+        connection.settings_dict['TEST']['NAME'] = 'cur_ingest_benchmark'
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        with override_settings(MEDIA_ROOT=os.path.join(workdir, 'media')), open(path, 'rb') as file_data:
+            invoice = RootInvoice(
+                invoice_file=File(file_data, name=os.path.basename(path)),
+                invoice_date=BENCHMARK_BILLING_PERIOD,
+                bill_start_date=BENCHMARK_BILLING_PERIOD,
+                bill_end_date=BENCHMARK_BILLING_PERIOD.replace(day=31),
+            )
+            invoice.skip_processing = True
+            invoice.save()
+
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries):
+                process_invoice_csv_data(invoice)
+
+        run = IngestRun.objects.filter(invoice=invoice).first()
+        if run is None or run.status != 'SUCCEEDED':
+            raise RuntimeError(f"Ingest of {path} failed: {run.error if run else 'no ingest run recorded'}")
+        return {
+            'engine': connection.vendor,
+            'loader': run.loader,
+            'rows': run.rows_read,
+            'rows_stored': AccountService.objects.count(),
+            'seconds': round(run.duration_seconds, 3),
+            'rows_per_second': round(run.rows_per_second, 1),
+            'peak_memory_mb': round(peak_memory_mb() or 0.0, 1),
+            'queries': queries.count,
+            'phase_seconds': run.phase_seconds,
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def load_baselines(path) -> dict:
+    """Baseline metrics by ``<engine>/<scenario>``, empty when no baseline file was saved yet."""
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baselines(path, results: dict) -> None:
+    """Store the metrics of ``results`` as the baselines of their benchmarks, keeping the other baselines."""
+    baselines = load_baselines(path)
+    for key, result in results.items():
+        baselines[key] = {metric: result[metric] for metric in BASELINE_METRICS}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as baseline_file:
+        json.dump(dict(sorted(baselines.items())), baseline_file, indent=2)
+        baseline_file.write('\n')
+
+
+def compare_to_baseline(result: dict, baseline: dict, tolerance: float) -> list:
+    """Describe every metric of ``result`` that is more than ``tolerance`` (a fraction) worse than its baseline."""
+    if result['rows'] != baseline['rows']:
+        return [f"read {result['rows']} rows but the baseline read {baseline['rows']}, not comparable"]
+    regressions = []
+    if result['rows_per_second'] < baseline['rows_per_second'] * (1 - tolerance):
+        regressions.append(f"rows/s {result['rows_per_second']:.0f} < baseline {baseline['rows_per_second']:.0f}")
+    for metric in ['peak_memory_mb', 'queries']:
+        if result[metric] > baseline[metric] * (1 + tolerance):
+            regressions.append(f"{metric} {result[metric]} > baseline {baseline[metric]}")
+    return regressions
@@ -0,0 +1,57 @@
+import logging
+import os
+
+from django.db import transaction
+
+from main.helpers.account_service_partitions import delete_account_services
+from main.models import DailyCostRollup, IngestCheckpoint, QuarantinedCurRow
+
+logger = logging.getLogger(__name__)
+
+
+def start_checkpoint(invoice, resume: bool = False) -> IngestCheckpoint:
+    """
+    Return the IngestCheckpoint a load of ``invoice``'s CUR file starts from.
+
+    With ``resume`` the existing checkpoint is continued, unless it was taken
+    on another file. Otherwise everything an earlier load of the invoice left
+    behind is removed and the checkpoint is reset to the start of the file, so
+    no row is ever stored twice.
+    """
+    file_name = invoice.invoice_file.name
+    file_size = os.path.getsize(invoice.invoice_file.path)
+    checkpoint = IngestCheckpoint.objects.filter(invoice=invoice).first()
+    if resume and checkpoint and (checkpoint.file_name, checkpoint.file_size) == (file_name, file_size):
+        if checkpoint.rows_committed:
+            logger.info(f"⏩ Resuming invoice {invoice.pk} after {checkpoint.rows_committed} rows ({checkpoint.status})")
+        return checkpoint
+
+    with transaction.atomic():
+        delete_account_services([invoice.pk])
+        DailyCostRollup.objects.filter(invoice=invoice).delete()
+        QuarantinedCurRow.objects.filter(invoice=invoice).delete()
+        checkpoint, _ = IngestCheckpoint.objects.update_or_create(
+            invoice=invoice,
+            defaults={
+                'status': 'IN_PROGRESS',
+                'file_name': file_name,
+                'file_size': file_size,
+                'byte_offset': 0,
+                'rows_committed': 0,
+                'chunks_committed': 0,
+            },
+        )
+    return checkpoint
+
+
+def commit_chunk(checkpoint: IngestCheckpoint, rows: int, byte_offset: int) -> None:
+    """Advance the checkpoint past a chunk; must run in the transaction that stores the chunk's rows."""
+    checkpoint.rows_committed += rows
+    checkpoint.byte_offset = byte_offset
+    checkpoint.chunks_committed += 1
+    checkpoint.save(update_fields=['rows_committed', 'byte_offset', 'chunks_committed', 'updated_at'])
+
+
+def complete_checkpoint(checkpoint: IngestCheckpoint) -> None:
+    checkpoint.status = 'COMPLETED'
+    checkpoint.save(update_fields=['status', 'updated_at'])
@@ -0,0 +1,162 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+import pandas as pd
+from django.conf import settings
+from django.db import connection, transaction
+
+from main.helpers.cur_ingest import read_dimension_keys
+from main.helpers.ingest_checkpoint import start_checkpoint
+from main.helpers.ingest_metrics import record_ingest_run
+from main.models import RootInvoice, IngestRun
+from main.helpers.cost_rollup import update_account_invoices
+from main.utils import resolve_dimensions, ingest_invoice_rows, ingest_invoice_delta
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_invoice_dimensions(invoices, chunk_size=None):
+    """
+    Create every AwsAccount and Service referenced by a set of CUR parts.
+
+    Only the columns the dimension keys are derived from are read, so this pass
+    is cheap compared to the ingest itself. Running it once before the parts are
+    fanned out means workers never race each other on the account and service
+    upserts; they only look the existing rows up. Text values are interned by
+    the workers, in sorted order (see ``DimensionResolver``), as reading the
+    text columns here would cost nearly as much as parsing the parts.
+    """
+    chunk_size = chunk_size or settings.CUR_INGEST_CHUNK_SIZE
+    existing_accounts = {}
+    existing_services = {}
+
+    keys = [
+        chunk_keys
+        for invoice in invoices
+        for chunk_keys in read_dimension_keys(invoice.invoice_file.path, chunk_size)
+    ]
+    if keys:
+        with transaction.atomic():
+            resolve_dimensions(pd.concat(keys).drop_duplicates(), existing_accounts, existing_services)
+
+    return existing_accounts, existing_services
+
+
+def _ingest_part(invoice_id, chunk_size, batch_size, resume, incremental=False):
+    """
+    Load a single CUR part, recorded as an IngestRun, and return the rows read.
+
+    Parts are loaded chunk by chunk from their checkpoint or, with
+    ``incremental``, diffed against the rows already stored for them.
+    """
+    invoice = RootInvoice.objects.get(pk=invoice_id)
+    existing_accounts = {}
+    existing_services = {}
+    with record_ingest_run(invoice, incremental=incremental) as metrics:
+        if incremental:
+            # The period's totals are written once every part is loaded
+            return ingest_invoice_delta(
+                invoice, existing_accounts, existing_services,
+                chunk_size=chunk_size, batch_size=batch_size, metrics=metrics, update_totals=False,
+            )
+        checkpoint = start_checkpoint(invoice, resume=resume)
+        return ingest_invoice_rows(
+            invoice, existing_accounts, existing_services,
+            chunk_size=chunk_size, batch_size=batch_size, metrics=metrics, checkpoint=checkpoint,
+        )
+
+
+def ingest_invoices(invoices, workers=None, chunk_size=None, batch_size=None, resume=False, replaces=None, refresh=None):
+    """
+    Load the CUR parts (RootInvoices) of one billing period across a pool of worker processes.
+
+    Dimensions are resolved once up front, then every part is loaded by a
+    spawned worker with its own database connection, committing chunk by chunk
+    to the part's IngestCheckpoint. With ``resume`` every part continues from
+    its checkpoint, so a retry skips the parts and chunks already loaded.
+    SQLite serialises writers, so parts are loaded one after the other
+    in-process there.
+
+    Parts can be stored inactive (``is_active=False``, as fetched assemblies
+    are), which keeps them out of the period's totals while they load. Once
+    every part is loaded they are activated, and the RootInvoices in
+    ``replaces`` (ids of the parts of an earlier assembly) deleted, in the
+    transaction that then writes the per-account totals of the period to
+    AWSAccountInvoice, so the period is never counted twice. If a part fails
+    nothing is swapped and the totals stay those of the active invoices.
+
+    The RootInvoices in ``refresh`` are parts that were already loaded and
+    whose file was replaced by a re-delivered copy: they stay active and are
+    loaded incrementally, each in one transaction, so only the lines that
+    changed since the previous delivery are written.
+
+    Returns the number of rows loaded and the ids of the parts that failed.
+    """
+    invoices = list(invoices)
+    refresh = list(refresh or [])
+    # Part -> whether it is loaded incrementally
+    parts = {**{invoice: False for invoice in invoices}, **{invoice: True for invoice in refresh}}
+    if not parts:
+        return {'rows': 0, 'failed': []}
+    if len({(invoice.bill_start_date, invoice.bill_end_date) for invoice in parts}) > 1:
+        raise ValueError("All CUR parts must belong to the same billing period.")
+
+    workers = workers or settings.CUR_INGEST_WORKERS
+    if connection.vendor == 'sqlite':
+        workers = 1
+    workers = max(1, min(workers, len(parts)))
+
+    resolve_invoice_dimensions(parts, chunk_size)
+
+    results = {}
+    failed = []
+    if workers == 1:
+        for invoice, incremental in parts.items():
+            try:
+                results[invoice.pk] = _ingest_part(invoice.pk, chunk_size, batch_size, resume, incremental)
+            except Exception as e:
+                logger.error(f"❌ Failed to process invoice {invoice.pk}: {e}")
+                failed.append(invoice.pk)
+    else:
+        # Workers are spawned rather than forked: the job's heartbeat thread may hold a lock
+        # (logging, the database driver) at fork time, which would deadlock the child
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context('spawn'), initializer=django.setup,
+        ) as executor:
+            futures = {
+                executor.submit(_ingest_part, invoice.pk, chunk_size, batch_size, resume, incremental): invoice.pk
+                for invoice, incremental in parts.items()
+            }
+            for future in as_completed(futures):
+                invoice_id = futures[future]
+                try:
+                    results[invoice_id] = future.result()
+                except Exception as e:
+                    logger.error(f"❌ Failed to process invoice {invoice_id}: {e}")
+                    failed.append(invoice_id)
+
+    started = time.perf_counter()
+    with transaction.atomic():
+        if not failed:
+            RootInvoice.objects.filter(pk__in=[invoice.pk for invoice in invoices]).update(is_active=True)
+            RootInvoice.objects.filter(pk__in=replaces or []).exclude(
+                pk__in=[invoice.pk for invoice in parts]
+            ).delete()
+        first_part = next(iter(parts))
+        account_count = update_account_invoices(first_part)
+    account_invoices_seconds = time.perf_counter() - started
+    logger.info(f"🧾 Updated {account_count} account invoices in {account_invoices_seconds:.2f}s")
+
+    # The totals are written once for the whole period; book their time on the run of the part they are dated by
+    run = IngestRun.objects.filter(invoice=first_part).order_by('-created_at').first()
+    if run:
+        run.phase_seconds['account_invoices'] = round(account_invoices_seconds, 4)
+        run.duration_seconds += account_invoices_seconds
+        run.save(update_fields=['phase_seconds', 'duration_seconds', 'updated_at'])
+
+    total_rows = sum(results.values())
+    logger.info(f"✅ Processed {total_rows} rows from {len(results)} CUR parts with {workers} workers")
+    return {'rows': total_rows, 'failed': failed}
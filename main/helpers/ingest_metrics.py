@@ -0,0 +1,146 @@
+import logging
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+from main.models import IngestRun
+
+logger = logging.getLogger(__name__)
+
+
+def peak_memory_mb():
+    """Peak resident set size of the current process in MiB, or None where it can't be read."""
+    # ru_maxrss carries over the peak of the parent process through fork and exec; Linux's VmHWM doesn't
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class IngestMetrics:
+    """
+    Collects phase timings and row counters while a CUR file is ingested.
+
+    Phases are timed exclusively: while a nested phase runs (e.g. ``post_save``
+    inside a loader call), the enclosing phase's clock is paused, so the phase
+    timings add up to the time spent inside ``phase`` blocks.
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.loader = ''
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.rows_quarantined = 0
+        self.invalid_values = 0
+        self._active = []
+        self._since = None
+
+    def reset_counters(self):
+        """Zero the row counters, e.g. before a failed load is retried; phase timings keep both attempts."""
+        self.rows_read = 0
+        self.rows_written = 0
+        self.rows_skipped = 0
+        self.rows_quarantined = 0
+        self.invalid_values = 0
+
+    def _flush(self, now):
+        name = self._active[-1]
+        self.phases[name] = self.phases.get(name, 0.0) + now - self._since
+        self._since = now
+
+    @contextmanager
+    def phase(self, name: str):
+        now = time.perf_counter()
+        if self._active:
+            self._flush(now)
+        self._active.append(name)
+        self._since = now
+        try:
+            yield
+        finally:
+            self._flush(time.perf_counter())
+            self._active.pop()
+
+    def timed(self, name: str, iterable):
+        """Iterate over ``iterable``, timing the production of every item as phase ``name``."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+
+@contextmanager
+def record_ingest_run(invoice, incremental: bool = False):
+    """
+    Record an IngestRun for the block that loads ``invoice`` and yield its IngestMetrics.
+
+    The run row is written outside the caller's transaction, before and after
+    the block, so failed loads are recorded too. Exceptions are re-raised.
+    """
+    run = IngestRun.objects.create(invoice=invoice, incremental=incremental)
+    metrics = IngestMetrics()
+    started = time.perf_counter()
+    try:
+        yield metrics
+    except Exception as e:
+        run.status = 'FAILED'
+        run.error = str(e)
+        raise
+    else:
+        run.status = 'SUCCEEDED'
+    finally:
+        run.duration_seconds = time.perf_counter() - started
+        run.loader = metrics.loader
+        run.rows_read = metrics.rows_read
+        run.rows_written = metrics.rows_written
+        run.rows_skipped = metrics.rows_skipped
+        run.rows_quarantined = metrics.rows_quarantined
+        run.invalid_values = metrics.invalid_values
+        run.rows_per_second = metrics.rows_read / run.duration_seconds if run.duration_seconds else 0.0
+        run.peak_memory_mb = peak_memory_mb()
+        run.phase_seconds = {name: round(seconds, 4) for name, seconds in metrics.phases.items()}
+        run.save()
+        log_ingest_run(run)
+
+
+def log_ingest_run(run: IngestRun):
+    phases = ', '.join(f"{name}={seconds:.2f}s" for name, seconds in run.phase_seconds.items())
+    logger.info(
+        f"📊 Ingest run {run.pk} of invoice {run.invoice_id} {run.status}: "
+        f"{run.rows_read} read, {run.rows_written} written, {run.rows_skipped} skipped, "
+        f"{run.rows_quarantined} quarantined ({run.invalid_values} invalid values) in {run.duration_seconds:.2f}s "
+        f"({run.rows_per_second:.0f} rows/s, peak {run.peak_memory_mb or 0:.0f} MiB) [{phases}]",
+        extra={'ingest_run': {
+            'id': run.pk,
+            'invoice_id': run.invoice_id,
+            'status': run.status,
+            'loader': run.loader,
+            'incremental': run.incremental,
+            'rows_read': run.rows_read,
+            'rows_written': run.rows_written,
+            'rows_skipped': run.rows_skipped,
+            'rows_quarantined': run.rows_quarantined,
+            'invalid_values': run.invalid_values,
+            'duration_seconds': run.duration_seconds,
+            'rows_per_second': run.rows_per_second,
+            'peak_memory_mb': run.peak_memory_mb,
+            'phase_seconds': run.phase_seconds,
+        }},
+    )
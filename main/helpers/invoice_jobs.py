@@ -0,0 +1,160 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+from django.core.files import File
+
+from main.helpers.ingest_coordinator import ingest_invoices
+from main.helpers.cur_sources import get_cur_source
+from main.helpers.invoice_service import get_cur_manifest, get_current_month_gz_files
+from main.helpers.job_queue import enqueue_job
+from main.helpers.s3_cache import S3ObjectCache
+from main.models import CurReportAssembly, RootInvoice
+
+logger = logging.getLogger(__name__)
+
+
+def previous_billing_period(today=None):
+    """Return the first and last day of the month before ``today``."""
+    today = today or datetime.today()
+    # Last day of the previous month = 1st of this month - 1 day
+    bill_end_date = today.replace(day=1) - timedelta(days=1)
+    return bill_end_date.replace(day=1), bill_end_date
+
+
+def billing_period(day):
+    """Return the first and last day of the month of ``day``."""
+    bill_start_date = day.replace(day=1)
+    return bill_start_date, (bill_start_date + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+
+
+def fetch_invoices_job(payload: dict) -> dict:
+    """
+    Fetch a month's CUR parts from the CUR source, store them as RootInvoices and queue their ingest.
+
+    The month is the payload's ``bill_start_date`` (ISO date), last month by
+    default. Nothing is downloaded when the manifest's assembly (or, without
+    a manifest, any active invoice of the period) was already ingested.
+
+    When the period was loaded before, the re-delivered parts are matched, in
+    order, with its active invoices, whose files are replaced so the ingest
+    job only applies what changed (see ``LineItemReconciler``). Parts beyond
+    those are stored inactive; the ingest job activates them in place of the
+    period's remaining invoices once all of them are loaded.
+    """
+    today = datetime.today()
+    if payload.get('bill_start_date'):
+        bill_start_date, bill_end_date = billing_period(datetime.fromisoformat(payload['bill_start_date']))
+    else:
+        bill_start_date, bill_end_date = previous_billing_period(today)
+
+    source = get_cur_source()
+    manifest = get_cur_manifest(source, bill_start_date)
+
+    period_invoices = RootInvoice.objects.filter(bill_start_date=bill_start_date, bill_end_date=bill_end_date)
+    if manifest:
+        existing_invoice = CurReportAssembly.objects.filter(
+            bill_start_date=bill_start_date, bill_end_date=bill_end_date, assembly_id=manifest['assemblyId']
+        ).exists()
+    else:
+        existing_invoice = period_invoices.filter(is_active=True).exists()
+    if existing_invoice:
+        return {"message": "Invoice already exists."}
+
+    cache = S3ObjectCache()
+    gz_files = get_current_month_gz_files(source, manifest, cache, bill_start_date)
+    if not gz_files:
+        return {"message": "No CSV files found."}
+
+    loaded_invoices = list(period_invoices.filter(is_active=True).order_by('pk'))
+    refreshed_invoices = []
+    created_invoices = []
+    try:
+        for index, gz_file in enumerate(gz_files):
+            # The compressed part is stored as is; the ingest reads it as a gzip stream
+            with open(gz_file, 'rb') as file_data:
+                if index < len(loaded_invoices):
+                    invoice = loaded_invoices[index]
+                    previous_file = invoice.invoice_file.name
+                    invoice.invoice_file.save(os.path.basename(gz_file), File(file_data), save=False)
+                    invoice.invoice_date = today.date()
+                    invoice.save(update_fields=['invoice_file', 'invoice_date', 'updated_at'])
+                    if previous_file and previous_file != invoice.invoice_file.name:
+                        invoice.invoice_file.storage.delete(previous_file)
+                    refreshed_invoices.append(invoice)
+                    continue
+                invoice = RootInvoice(
+                    invoice_file=File(file_data, name=os.path.basename(gz_file)),
+                    invoice_date=today.date(),
+                    bill_start_date=bill_start_date,
+                    bill_end_date=bill_end_date,
+                    is_active=False,
+                )
+                # The report parts are ingested together by the job queued below instead of one by one in post_save
+                invoice.skip_processing = True
+                invoice.save()
+                created_invoices.append(invoice)
+    except Exception:
+        # Leave nothing behind for the retry to duplicate; a refreshed part is simply refreshed again
+        for invoice in created_invoices:
+            invoice.delete()
+        raise
+    finally:
+        for gz_file in gz_files:
+            if not (cache.holds(gz_file) or source.holds(gz_file)):
+                os.remove(gz_file)
+        # Every part has been copied into its RootInvoice, so the cached entries may be evicted again
+        cache.release()
+
+    # Includes the inactive parts of an earlier fetch that never finished loading, so they are cleaned up too
+    previous_invoice_ids = list(
+        period_invoices.exclude(pk__in=[invoice.pk for invoice in refreshed_invoices + created_invoices])
+        .values_list('pk', flat=True)
+    )
+    ingest_job = enqueue_job('INGEST_INVOICES', {
+        'invoice_ids': [invoice.pk for invoice in created_invoices],
+        'refresh_invoice_ids': [invoice.pk for invoice in refreshed_invoices],
+        'previous_invoice_ids': previous_invoice_ids,
+        'assembly': {
+            'assembly_id': manifest['assemblyId'],
+            'report_keys': manifest.get('reportKeys', []),
+        } if manifest else None,
+    })
+    return {
+        "invoices": [invoice.invoice_file.url for invoice in refreshed_invoices + created_invoices],
+        "ingest_job_id": ingest_job.pk,
+        "cache": {"hits": cache.hits, "misses": cache.misses, "hit_rate": cache.stats()['hit_rate']},
+    }
+
+
+def ingest_invoices_job(payload: dict) -> dict:
+    """
+    Load the CUR parts listed in the payload into AccountService.
+
+    Parts are loaded from their IngestCheckpoints, so a retry continues after
+    the chunks an earlier attempt committed instead of starting over, and the
+    re-delivered parts listed in ``refresh_invoice_ids`` incrementally. Once
+    every part is loaded, they replace the invoices they supersede (see
+    ``ingest_invoices``) and the report assembly is recorded.
+    """
+    invoices = list(RootInvoice.objects.filter(pk__in=payload['invoice_ids']))
+    refreshed_invoices = list(RootInvoice.objects.filter(pk__in=payload.get('refresh_invoice_ids', [])))
+    if not invoices and not refreshed_invoices:
+        return {'rows': 0}
+
+    ingest_result = ingest_invoices(
+        invoices, resume=True, replaces=payload.get('previous_invoice_ids'), refresh=refreshed_invoices,
+    )
+    if ingest_result['failed']:
+        raise RuntimeError(f"Failed to process invoices: {ingest_result['failed']}")
+
+    assembly = payload.get('assembly')
+    if assembly:
+        period_invoice = (invoices + refreshed_invoices)[0]
+        CurReportAssembly.objects.update_or_create(
+            bill_start_date=period_invoice.bill_start_date,
+            bill_end_date=period_invoice.bill_end_date,
+            defaults=assembly
+        )
+
+    return {'rows': ingest_result['rows']}
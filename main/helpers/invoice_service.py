@@ -1,149 +1,81 @@
-import boto3
 import os
 import logging
-import gzip
-import shutil
-from pathlib import Path
+from main.helpers.cur_sources import CurSource
+from main.helpers.s3_cache import S3ObjectCache
 from django.conf import settings
 from datetime import datetime, timedelta
 
-class S3FileFetcher:
-    def __init__(self):
-        """Initialize S3 Client using credentials from settings."""
-        self.logger = logging.getLogger(__name__)  # ✅ Initialize logger at the beginning
-
-        # Fetch AWS credentials and settings from environment variables
-        self.bucket_name = settings.BUCKET_NAME
-        self.region = settings.BUCKET_REGION
-        self.aws_access_key_id = settings.AWS_ACCESS_KEY_ID
-        self.aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY
-        self.bucket_prefix = settings.BUCKET_PREFIX
-
-        if not all([self.bucket_name, self.region, self.aws_access_key_id, self.aws_secret_access_key]):
-            self.logger.error("Missing AWS credentials or configurations.")
-            raise ValueError("Missing AWS credentials or configurations.")
-
-        # ✅ Initialize S3 client
-        try:
-            self.s3_client = boto3.client(
-                's3',
-                aws_access_key_id=self.aws_access_key_id,
-                aws_secret_access_key=self.aws_secret_access_key,
-                region_name=self.region
-            )
-            self.logger.info(f"S3 client initialized successfully.")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize S3 client: {str(e)}")
-            raise
-
-    def list_files(self, prefix: str):
-        """List all files in the S3 bucket under the given prefix."""
-        try:
-            response = self.s3_client.list_objects_v2(Bucket=self.bucket_name, Prefix=prefix)
-
-            if 'Contents' in response:
-                files = [obj['Key'] for obj in response['Contents']]
-                self.logger.info(f"Found {len(files)} files in {prefix}")
-                return files
-            else:
-                self.logger.warning(f"No files found in {prefix}")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error listing files: {str(e)}")
-            raise
-
-    def download_file(self, s3_key: str, local_path: str):
-        """Download a specific file from S3."""
-        try:
-            os.makedirs(local_path, exist_ok=True)
-            local_filename = os.path.join(local_path, os.path.basename(s3_key))
-            self.s3_client.download_file(self.bucket_name, s3_key, local_filename)
-            self.logger.info(f"File downloaded successfully: {local_filename}")
-            return local_filename
-        except Exception as e:
-            self.logger.error(f"Error downloading file: {str(e)}")
-            raise
-
-def get_current_month_gz_files(s3_fetcher: S3FileFetcher):
-    """Fetch .gz files for the current billing month from the S3 bucket."""
+def get_billing_period_prefix(source: CurSource, bill_start_date=None):
+    """Return the prefix of the CUR billing period starting on ``bill_start_date`` (default: the previous month)."""
     today = datetime.today()
-    first_day_of_prev_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-    first_day_of_current_month = today.replace(day=1)
+    first_day_of_period = bill_start_date or (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+    first_day_of_next_period = (first_day_of_period + timedelta(days=32)).replace(day=1)
 
     # ✅ Use the bucket prefix from settings
-    prefix = f"/{first_day_of_prev_month.strftime('%Y%m%d')}-{first_day_of_current_month.strftime('%Y%m%d')}/"
-    prefix = s3_fetcher.bucket_prefix + prefix  # Correct bucket prefix
-
-    logging.info(f"Looking for files in prefix: {prefix}")
-
-    # Fetch and filter .gz files
-    all_files = s3_fetcher.list_files(prefix)
-    gz_files = [file for file in all_files if file.endswith('.gz')]
+    prefix = f"/{first_day_of_period.strftime('%Y%m%d')}-{first_day_of_next_period.strftime('%Y%m%d')}/"
+    return source.bucket_prefix + prefix  # Correct bucket prefix
+
+def get_cur_manifest_key(source: CurSource, bill_start_date=None):
+    report_name = settings.CUR_REPORT_NAME or source.bucket_prefix.rstrip('/').split('/')[-1]
+    return f"{get_billing_period_prefix(source, bill_start_date)}{report_name}-Manifest.json"
+
+def get_cur_manifest(source: CurSource, bill_start_date=None):
+    """
+    Read the CUR manifest of a billing period (default: the previous month's).
+
+    The manifest names the current report assembly (``assemblyId``) and the
+    exact keys that make it up (``reportKeys``). Returns None when the
+    billing period has no manifest.
+    """
+    return source.read_json(get_cur_manifest_key(source, bill_start_date))
+
+def get_current_month_gz_files(source: CurSource, manifest=None, cache: S3ObjectCache = None, bill_start_date=None):
+    """
+    Fetch .gz files of a billing period (default: the previous month's) from the CUR source, several at a time.
+
+    With a CUR ``manifest`` only the report keys of its assembly are downloaded;
+    otherwise every .gz under the billing period prefix is. Files whose key and
+    ETag are already in the local ``cache`` are served from it instead of
+    being downloaded again, and downloads are added to it. A local source's
+    files are returned where they are.
+    """
+    cache = cache or S3ObjectCache()
+    use_cache = cache.enabled and source.remote
+    if manifest:
+        logging.info(f"Downloading assembly {manifest.get('assemblyId')}")
+        gz_files = [key for key in manifest.get('reportKeys', []) if key.endswith('.gz')]
+        # One listing gives the ETags of every part
+        objects = source.list_objects(os.path.commonprefix(gz_files)) if gz_files and use_cache else []
+    else:
+        prefix = get_billing_period_prefix(source, bill_start_date)
+        logging.info(f"Looking for files in prefix: {prefix}")
+
+        # Fetch and filter .gz files
+        objects = source.list_objects(prefix)
+        gz_files = [obj['Key'] for obj in objects if obj['Key'].endswith('.gz')]
+    etags = {obj['Key']: obj['ETag'] for obj in objects} if use_cache else {}
 
     if not gz_files:
         logging.warning(f"No .gz files found.")
         return []
 
-    # ✅ Save .gz files in `gz_downloads/`
-    gz_download_path = os.path.join(settings.BASE_DIR, "gz_downloads")
-    os.makedirs(gz_download_path, exist_ok=True)
-
-    downloaded_files = []
-    for file in gz_files:
-        try:
-            downloaded_file = s3_fetcher.download_file(file, gz_download_path)
-            downloaded_files.append(downloaded_file)
-        except Exception as e:
-            logging.error(f"Error downloading {file}: {e}")
+    if not source.remote:
+        return [source.local_path(key) for key in gz_files if source.stat(key)]
 
-    return downloaded_files
-
-def get_this_month_csv_bills(s3_fetcher: S3FileFetcher):
-    """Fetch, extract, and delete .gz billing files for the current month from S3."""
+    # ✅ Save .gz files in `gz_downloads/`
     gz_download_path = os.path.join(settings.BASE_DIR, "gz_downloads")
-    extracted_path = os.path.join(settings.BASE_DIR, "extracted_csvs")
-
     os.makedirs(gz_download_path, exist_ok=True)
-    os.makedirs(extracted_path, exist_ok=True)
-
-    # ✅ Fetch .gz files and save in `gz_downloads/`
-    downloaded_files = get_current_month_gz_files(s3_fetcher)
-    if not downloaded_files:
-        logging.warning(f"No .gz files downloaded.")
-        return []
-
-    logging.info(f"Downloaded {len(downloaded_files)} .gz files. Extracting...")
 
-    extracted_files = []
-    for gz_file in downloaded_files:
-        try:
-            if not gz_file.endswith('.gz'):
-                logging.warning(f"Skipping non-gz file: {gz_file}")
-                continue
+    local_files = {}
+    for key in gz_files:
+        cached_file = cache.get(key, etags[key]) if key in etags else None
+        if cached_file:
+            local_files[key] = cached_file
 
-            csv_filename = os.path.basename(gz_file).replace('.gz', '')
-            extracted_csv_path = os.path.join(extracted_path, csv_filename)
-
-            with gzip.open(gz_file, 'rb') as f_in:
-                with open(extracted_csv_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
-
-            # ✅ Ensure the file was actually extracted
-            if os.path.exists(extracted_csv_path):
-                logging.info(f"✅ Extracted and saved: {extracted_csv_path}")
-                extracted_files.append(extracted_csv_path)
-            else:
-                logging.error(f"❌ Extraction failed, file not found: {extracted_csv_path}")
-
-            # ✅ Delete the .gz file immediately after extraction
-            os.remove(gz_file)
-            logging.info(f"🗑️ Deleted: {gz_file}")
-
-        except Exception as e:
-            logging.error(f"⚠️ Error extracting {gz_file}: {e}")
-
-    if not extracted_files:
-        logging.error("❌ No CSV files were extracted. Check file permissions or paths.")
-        return []
+    downloaded = source.download_files([key for key in gz_files if key not in local_files], gz_download_path)
+    for key, downloaded_file in downloaded.items():
+        local_files[key] = cache.put(key, etags[key], downloaded_file) if key in etags else downloaded_file
 
-    return extracted_files
+    if use_cache:
+        logging.info(f"📦 CUR cache: {cache.hits} hits, {cache.misses} misses ({cache.stats()['hit_rate']:.0%} hit rate overall)")
+    return [local_files[key] for key in gz_files if key in local_files]
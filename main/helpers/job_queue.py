@@ -0,0 +1,153 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from main.models import BackgroundJob
+
+logger = logging.getLogger(__name__)
+
+# Job type -> dotted path of the handler. Handlers take the job payload and return a JSON-serialisable result.
+JOB_HANDLERS = {
+    'FETCH_INVOICES': 'main.helpers.invoice_jobs.fetch_invoices_job',
+    'INGEST_INVOICES': 'main.helpers.invoice_jobs.ingest_invoices_job',
+}
+
+ACTIVE_JOB_STATUSES = ['QUEUED', 'RUNNING']
+
+
+def enqueue_job(job_type: str, payload: dict = None, **kwargs) -> BackgroundJob:
+    """Queue a background job for the ``run_jobs`` worker."""
+    if job_type not in JOB_HANDLERS:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = BackgroundJob.objects.create(job_type=job_type, payload=payload or {}, **kwargs)
+    logger.info(f"📨 Queued {job}")
+    return job
+
+
+def get_or_enqueue_job(job_type: str, payload: dict = None, statuses: list = None) -> BackgroundJob:
+    """
+    Return the job with the same type and payload in one of ``statuses`` (default: queued or running), or queue a new one.
+
+    Pass ``['QUEUED']`` when the job must see state that changed after it was
+    queued: a running job may already have read it.
+    """
+    job = BackgroundJob.objects.filter(
+        job_type=job_type, payload=payload or {}, status__in=statuses or ACTIVE_JOB_STATUSES
+    ).order_by('created_at').first()
+    return job or enqueue_job(job_type, payload)
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next attempt of a job that failed ``attempts`` times, doubled per attempt."""
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** (attempts - 1))
+
+
+def requeue_stale_jobs() -> int:
+    """
+    Put RUNNING jobs whose worker stopped heart-beating (e.g. was killed) back on the queue.
+
+    A lost worker counts as a failed attempt: jobs out of attempts are marked
+    FAILED, so a job that keeps killing its worker does not loop forever, and
+    the rest are retried with the usual backoff.
+    """
+    now = timezone.now()
+    stale = BackgroundJob.objects.filter(status='RUNNING', updated_at__lt=now - timedelta(seconds=settings.JOB_LOCK_TIMEOUT))
+
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status='FAILED', locked_by=None, finished_at=now,
+        last_error="Worker lost: no heartbeat for the last attempt",
+    )
+    if failed:
+        logger.error(f"❌ {failed} jobs failed after losing their worker on the last attempt")
+
+    requeued = 0
+    for job in stale.filter(attempts__lt=F('max_attempts')).only('pk', 'attempts'):
+        # Conditional on the job still being stale, in case its worker came back meanwhile
+        requeued += stale.filter(pk=job.pk).update(
+            status='QUEUED', locked_by=None, run_after=now + retry_delay(job.attempts),
+            last_error="Worker lost: no heartbeat",
+        )
+    return requeued
+
+
+class JobHeartbeat(threading.Thread):
+    """Touches a running job's ``updated_at`` so long jobs are not mistaken for dead ones."""
+
+    def __init__(self, job_id):
+        super().__init__(daemon=True)
+        self.job_id = job_id
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(settings.JOB_HEARTBEAT_INTERVAL):
+                try:
+                    BackgroundJob.objects.filter(pk=self.job_id, status='RUNNING').update(updated_at=timezone.now())
+                except Exception as e:
+                    logger.warning(f"⚠️ Heartbeat for job {self.job_id} failed: {e}")
+        finally:
+            connection.close()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def claim_next_job(worker_id: str):
+    """
+    Atomically take the oldest due job off the queue.
+
+    The claim is a conditional UPDATE on the job's QUEUED status, so it is safe
+    with concurrent workers on every supported database without row locks.
+    """
+    while True:
+        job = BackgroundJob.objects.filter(status='QUEUED', run_after__lte=timezone.now()).order_by('run_after', 'pk').first()
+        if job is None:
+            return None
+        now = timezone.now()
+        claimed = BackgroundJob.objects.filter(pk=job.pk, status='QUEUED').update(
+            status='RUNNING', locked_by=worker_id, started_at=now, attempts=job.attempts + 1, updated_at=now
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job: BackgroundJob):
+    """Run a claimed job and record its outcome, re-queueing it with backoff while attempts remain."""
+    handler = import_string(JOB_HANDLERS[job.job_type])
+    logger.info(f"▶️ Running {job} (attempt {job.attempts}/{job.max_attempts})")
+    heartbeat = JobHeartbeat(job.pk)
+    heartbeat.start()
+    try:
+        result = handler(job.payload)
+    except Exception as e:
+        heartbeat.stop()
+        job.last_error = traceback.format_exc()
+        job.locked_by = None
+        if job.attempts < job.max_attempts:
+            job.status = 'QUEUED'
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning(f"⚠️ {job} failed, retrying after {job.run_after}: {e}")
+        else:
+            job.status = 'FAILED'
+            job.finished_at = timezone.now()
+            logger.error(f"❌ {job} failed: {e}")
+        job.save()
+        return job
+
+    heartbeat.stop()
+    job.status = 'SUCCEEDED'
+    job.result = result
+    job.locked_by = None
+    job.finished_at = timezone.now()
+    job.save()
+    logger.info(f"✅ {job} finished")
+    return job
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+STATS_FILE = 'stats.json'
+
+
+class S3ObjectCache:
+    """
+    A local copy of S3 objects, keyed by S3 key and ETag, capped in size with least-recently-used eviction.
+
+    An object is stored in a directory named by the hash of its key and ETag, so a changed
+    object is simply a different entry and an unchanged one is served from
+    disk without downloading it again. Reading an entry refreshes its
+    modification time, which eviction goes by. Hits and misses are counted
+    per instance and in total in ``stats.json`` next to the entries.
+
+    Every entry served or stored by an instance is pinned: eviction skips it
+    until ``release`` is called, so the parts of one fetch can't evict each
+    other before their RootInvoices have copied them.
+    """
+
+    def __init__(self, directory=None, max_size_mb: int = None):
+        self.directory = str(directory or settings.CUR_CACHE_DIR)
+        max_size_mb = settings.CUR_CACHE_MAX_SIZE_MB if max_size_mb is None else max_size_mb
+        self.max_size = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.pinned = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def path_for(self, s3_key: str, etag: str) -> str:
+        # S3 returns ETags quoted
+        etag = etag.strip('"')
+        digest = hashlib.sha256(f"{s3_key}\0{etag}".encode()).hexdigest()
+        # The file keeps its name, which its RootInvoice is named after
+        return os.path.join(self.directory, digest, os.path.basename(s3_key))
+
+    def get(self, s3_key: str, etag: str):
+        """The local path of the object's cached copy, or None on a miss."""
+        path = self.path_for(s3_key, etag)
+        with self._lock:
+            try:
+                os.utime(path)
+            except FileNotFoundError:
+                self.misses += 1
+                self._record(misses=1)
+                return None
+            self.hits += 1
+            self.pinned.add(path)
+            self._record(hits=1, bytes_served=os.path.getsize(path))
+        logger.info(f"📦 Cache hit for {s3_key}")
+        return path
+
+    def put(self, s3_key: str, etag: str, local_file: str) -> str:
+        """Move a freshly downloaded object into the cache, evicting the least recently used entries over the cap."""
+        path = self.path_for(s3_key, etag)
+        with self._lock:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(local_file, path)
+            self.pinned.add(path)
+            self._record(bytes_downloaded=os.path.getsize(path))
+            self._evict()
+        return path
+
+    def release(self):
+        """Unpin the entries served or stored so far and evict down to the cap again."""
+        with self._lock:
+            self.pinned.clear()
+            self._evict()
+
+    def holds(self, path: str) -> bool:
+        """Whether ``path`` is an entry of this cache, as opposed to a download it did not keep."""
+        return os.path.dirname(os.path.dirname(os.path.abspath(path))) == os.path.abspath(self.directory)
+
+    def entries(self) -> list:
+        """``(path, size, last used)`` of every cached object, least recently used first."""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for directory in os.scandir(self.directory):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                stat = entry.stat()
+                entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def _evict(self):
+        entries = self.entries()
+        size = sum(entry_size for _, entry_size, _ in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_size:
+                break
+            if path in self.pinned:
+                continue
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            size -= entry_size
+            logger.info(f"🧹 Evicted {os.path.basename(path)} from the CUR cache")
+
+    def stats(self) -> dict:
+        """Totals since the cache was created (or cleared), with the hit rate."""
+        stats = {'hits': 0, 'misses': 0, 'bytes_served': 0, 'bytes_downloaded': 0}
+        try:
+            with open(os.path.join(self.directory, STATS_FILE)) as stats_file:
+                stats.update(json.load(stats_file))
+        except (FileNotFoundError, ValueError):
+            pass
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+    def _record(self, **counters):
+        stats = self.stats()
+        stats.pop('hit_rate')
+        for name, value in counters.items():
+            stats[name] += value
+        os.makedirs(self.directory, exist_ok=True)
+        # Written aside and renamed over the old file, so a reader never sees it half written
+        with tempfile.NamedTemporaryFile('w', dir=self.directory, prefix=STATS_FILE, delete=False) as stats_file:
+            json.dump(stats, stats_file)
+        os.replace(stats_file.name, os.path.join(self.directory, STATS_FILE))
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+        try:
+            os.remove(os.path.join(self.directory, STATS_FILE))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from main.helpers.account_service_partitions import (
+    create_partition,
+    drop_partition,
+    existing_partitions,
+    is_partitioned,
+    partition_account_services,
+    unpartition_account_services,
+)
+from main.models import RootInvoice
+
+
+class Command(BaseCommand):
+    help = "Maintain the per-invoice partitions of AccountService (PostgreSQL only)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--partition', action='store_true', help="Convert an unpartitioned AccountService table")
+        parser.add_argument('--unpartition', action='store_true', help="Merge the partitions back into one table")
+        parser.add_argument('--drop-orphans', action='store_true', help="Drop partitions whose RootInvoice no longer exists")
+        parser.add_argument('--create-missing', action='store_true', help="Create a partition for every RootInvoice without one")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError("AccountService partitioning needs PostgreSQL")
+
+        if options['partition']:
+            copied = partition_account_services()
+            self.stdout.write(self.style.SUCCESS(f"Partitioned AccountService ({copied} rows moved)"))
+        if options['unpartition']:
+            copied = unpartition_account_services()
+            self.stdout.write(self.style.SUCCESS(f"Merged the AccountService partitions ({copied} rows moved)"))
+
+        if not is_partitioned():
+            self.stdout.write("AccountService is not partitioned")
+            return
+
+        partitions = existing_partitions()
+        invoice_ids = set(RootInvoice.objects.values_list('pk', flat=True))
+        if options['drop_orphans']:
+            for invoice_id in sorted(set(partitions) - invoice_ids):
+                with transaction.atomic():
+                    drop_partition(invoice_id)
+                self.stdout.write(f"Dropped {partitions.pop(invoice_id)}")
+        if options['create_missing']:
+            for invoice_id in sorted(invoice_ids - set(partitions)):
+                with transaction.atomic():
+                    create_partition(invoice_id)
+                self.stdout.write(f"Created partition for invoice {invoice_id}")
+            partitions = existing_partitions()
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname, GREATEST(reltuples, 0)::bigint, pg_total_relation_size(oid) FROM pg_class WHERE relname = ANY(%s) ORDER BY relname",
+                [list(partitions.values())],
+            )
+            for name, rows, size in cursor.fetchall():
+                self.stdout.write(f"{name}: ~{rows} rows, {size / 1024 / 1024:.1f} MB")
@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from main.helpers.cur_generator import write_cur_report
+from main.helpers.ingest_benchmark import (
+    BENCHMARK_BILLING_PERIOD,
+    BENCHMARK_ENGINES,
+    BENCHMARK_SCENARIOS,
+    compare_to_baseline,
+    load_baselines,
+    run_ingest_benchmark,
+    save_baselines,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the CUR ingest on synthetic reports against SQLite and/or PostgreSQL "
+        "and compare rows/s, peak RSS and query counts to the stored baselines."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario', action='append', choices=list(BENCHMARK_SCENARIOS),
+            help="Synthetic report to ingest, repeatable (default: small)",
+        )
+        parser.add_argument('--file', action='append', default=[], help="Also benchmark this CUR file, repeatable")
+        parser.add_argument(
+            '--engine', action='append', choices=list(BENCHMARK_ENGINES),
+            help="Database to ingest into, repeatable; the other DATABASE_* settings are kept (default: the configured one)",
+        )
+        parser.add_argument('--repeat', type=int, default=1, help="Runs per benchmark, the fastest is reported (default: 1)")
+        parser.add_argument('--baselines', default=settings.CUR_BENCHMARK_BASELINES, help="Baseline file (default: CUR_BENCHMARK_BASELINES)")
+        parser.add_argument('--save-baseline', action='store_true', help="Store the results as the new baselines")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Fraction by which a metric may be worse than its baseline before the command fails (default: 0.25)",
+        )
+        # Runs one benchmark in this process and prints its result; used by the parent command for every run
+        parser.add_argument('--run-file', help=argparse.SUPPRESS)
+        parser.add_argument('--workdir', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['run_file']:
+            result = run_ingest_benchmark(options['run_file'], options['workdir'])
+            self.stdout.write(json.dumps(result))
+            return
+
+        scenarios = options['scenario'] or ([] if options['file'] else ['small'])
+        engines = options['engine'] or [
+            engine for engine, backend in BENCHMARK_ENGINES.items() if backend == settings.DATABASES['default']['ENGINE']
+        ] or [connection.vendor]
+
+        results = {}
+        with tempfile.TemporaryDirectory(prefix='cur-benchmark-') as workdir:
+            files = {}
+            for scenario in scenarios:
+                files[scenario] = os.path.join(workdir, f"{scenario}.csv")
+                self.stdout.write(f"Generating the {scenario} report ({BENCHMARK_SCENARIOS[scenario]['rows']} rows)")
+                write_cur_report(files[scenario], billing_period=BENCHMARK_BILLING_PERIOD, **BENCHMARK_SCENARIOS[scenario])
+            for path in options['file']:
+                files[os.path.basename(path)] = os.path.abspath(path)
+
+            for engine in engines:
+                for name, path in files.items():
+                    runs = [self.run_benchmark(engine, path, workdir) for _ in range(max(1, options['repeat']))]
+                    results[f"{engine}/{name}"] = max(runs, key=lambda run: run['rows_per_second'])
+
+        baselines = load_baselines(options['baselines'])
+        regressions = {}
+        for key, result in results.items():
+            line = (
+                f"{key}: {result['rows']} rows in {result['seconds']:.2f}s, {result['rows_per_second']:.0f} rows/s, "
+                f"peak {result['peak_memory_mb']:.0f} MiB, {result['queries']} queries ({result['loader']} loader)"
+            )
+            baseline = baselines.get(key)
+            if baseline:
+                line += (
+                    f" | baseline {baseline['rows_per_second']:.0f} rows/s "
+                    f"({result['rows_per_second'] / baseline['rows_per_second'] - 1:+.0%}), "
+                    f"{baseline['peak_memory_mb']:.0f} MiB, {baseline['queries']} queries"
+                )
+                regressions[key] = compare_to_baseline(result, baseline, options['tolerance'])
+            self.stdout.write(self.style.ERROR(line) if regressions.get(key) else line)
+            phases = ', '.join(f"{phase}={seconds:.2f}s" for phase, seconds in result['phase_seconds'].items())
+            self.stdout.write(f"    {phases}")
+
+        if options['save_baseline']:
+            save_baselines(options['baselines'], results)
+            self.stdout.write(self.style.SUCCESS(f"Saved {len(results)} baselines to {options['baselines']}"))
+            return
+
+        failures = [f"{key}: {'; '.join(problems)}" for key, problems in regressions.items() if problems]
+        if failures:
+            raise CommandError("Ingest benchmark regressed:\n" + '\n'.join(failures))
+
+    def run_benchmark(self, engine: str, path: str, workdir: str) -> dict:
+        """Run one benchmark in a fresh process, so its peak RSS is its own, against the given database engine."""
+        self.stdout.write(f"Ingesting {os.path.basename(path)} into {engine}")
+        completed = subprocess.run(
+            [sys.executable, '-m', 'django', 'benchmark_ingest', '--run-file', path, '--workdir', workdir],
+            env={**os.environ, 'DATABASE_ENGINE': BENCHMARK_ENGINES[engine]},
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f"Benchmark of {path} on {engine} failed:\n{completed.stderr[-2000:]}")
+        # The ingest prints its progress too; the result is the last line
+        return json.loads(completed.stdout.strip().splitlines()[-1])
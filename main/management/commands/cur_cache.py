@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from main.helpers.s3_cache import S3ObjectCache
+
+
+class Command(BaseCommand):
+    help = "Show the size and hit rate of the local cache of downloaded CUR report parts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clear', action='store_true', help="Remove every cached part and reset the counters")
+
+    def handle(self, *args, **options):
+        cache = S3ObjectCache()
+        if options['clear']:
+            cache.clear()
+            self.stdout.write(self.style.SUCCESS(f"Cleared {cache.directory}"))
+            return
+
+        entries = cache.entries()
+        stats = cache.stats()
+        size_mb = sum(size for _, size, _ in entries) / 1024 / 1024
+        self.stdout.write(f"{cache.directory}: {len(entries)} parts, {size_mb:.1f} of {cache.max_size / 1024 / 1024:.0f} MiB")
+        self.stdout.write(
+            f"{stats['hits']} hits, {stats['misses']} misses ({stats['hit_rate']:.0%} hit rate), "
+            f"{stats['bytes_served'] / 1024 / 1024:.1f} MiB served, {stats['bytes_downloaded'] / 1024 / 1024:.1f} MiB downloaded"
+        )
@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from main.helpers.cur_generator import write_cur_report
+from main.helpers.invoice_jobs import previous_billing_period
+
+
+class Command(BaseCommand):
+    help = "Write a synthetic CUR CSV (gzipped if the path ends in .gz) for testing and benchmarking the ingest."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to write, e.g. report.csv or report.csv.gz")
+        parser.add_argument('--rows', type=int, default=100000, help="Line items to generate (default: 100000)")
+        parser.add_argument('--accounts', type=int, default=50, help="Usage accounts (default: 50)")
+        parser.add_argument('--services', type=int, default=10, help="Products (default: 10)")
+        parser.add_argument('--regions', type=int, default=5, help="Regions (default: 5)")
+        parser.add_argument('--savings-plan-ratio', type=float, default=0.2, help="Share of savings plan covered line items (default: 0.2)")
+        parser.add_argument('--tax-ratio', type=float, default=0.02, help="Share of tax line items (default: 0.02)")
+        parser.add_argument('--nan-ratio', type=float, default=0.05, help="Chance of an optional cell being empty (default: 0.05)")
+        parser.add_argument('--billing-period', help="Month of the line items as YYYY-MM (default: last month)")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same arguments and seed give the same file")
+
+    def handle(self, *args, **options):
+        if options['billing_period']:
+            try:
+                billing_period = datetime.strptime(options['billing_period'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError(f"Invalid billing period {options['billing_period']}, expected YYYY-MM")
+        else:
+            billing_period = previous_billing_period()[0].date()
+        if min(options['rows'], options['accounts'], options['services'], options['regions']) < 1:
+            raise CommandError("--rows, --accounts, --services and --regions must be at least 1")
+
+        rows = write_cur_report(
+            options['path'],
+            rows=options['rows'],
+            accounts=options['accounts'],
+            services=options['services'],
+            regions=options['regions'],
+            savings_plan_ratio=options['savings_plan_ratio'],
+            tax_ratio=options['tax_ratio'],
+            nan_ratio=options['nan_ratio'],
+            billing_period=billing_period,
+            seed=options['seed'],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} line items of {billing_period:%Y-%m} to {options['path']}"))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import RootInvoice
+from main.utils import process_invoice_csv_data
+
+
+class Command(BaseCommand):
+    help = "Load the CUR file of a RootInvoice into AccountService rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('invoice_id', type=int, help="ID of the RootInvoice to process")
+        parser.add_argument(
+            '--incremental',
+            action='store_true',
+            help="Diff the file against the rows already stored for this invoice and only write the changes",
+        )
+        parser.add_argument('--chunk-size', type=int, help="CSV rows parsed per chunk (default: CUR_INGEST_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            invoice = RootInvoice.objects.get(pk=options['invoice_id'])
+        except RootInvoice.DoesNotExist:
+            raise CommandError(f"RootInvoice {options['invoice_id']} does not exist")
+
+        process_invoice_csv_data(invoice, chunk_size=options['chunk_size'], incremental=options['incremental'])
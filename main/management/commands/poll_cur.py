@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.helpers.cur_poller import poll_cur_deliveries
+from main.helpers.cur_sources import get_cur_source
+
+
+class Command(BaseCommand):
+    help = "Watch the CUR source for new deliveries of this and last month's report and queue their fetch."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Poll once and exit")
+        parser.add_argument('--interval', type=int, help="Seconds between polls (default: CUR_POLL_INTERVAL)")
+
+    def handle(self, *args, **options):
+        interval = options['interval'] or settings.CUR_POLL_INTERVAL
+        source = get_cur_source()
+        self.stdout.write(f"🔭 Polling the {source.name} CUR source every {interval}s")
+
+        try:
+            while True:
+                close_old_connections()
+                try:
+                    for job in poll_cur_deliveries(source):
+                        self.stdout.write(f"Queued {job} for {job.payload['bill_start_date']}")
+                except Exception as e:
+                    # A failed poll is retried on the next one
+                    self.stderr.write(self.style.ERROR(f"Poll failed: {e}"))
+                    if options['once']:
+                        raise
+                if options['once']:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write("👋 Poller stopped")
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from main.helpers.cost_rollup import refresh_daily_cost_rollups
+from main.models import RootInvoice
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily cost rollups of RootInvoices from their AccountService rows."
+
+    def add_arguments(self, parser):
+        parser.add_argument('invoice_ids', nargs='*', type=int, help="IDs of the RootInvoices to rebuild (default: all)")
+
+    def handle(self, *args, **options):
+        invoice_ids = options['invoice_ids'] or RootInvoice.objects.values_list('pk', flat=True)
+        written = 0
+        for invoice_id in invoice_ids:
+            with transaction.atomic():
+                written += refresh_daily_cost_rollups([invoice_id])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} daily cost rollups"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.helpers.cur_quarantine import redrive_quarantined_rows
+from main.models import RootInvoice
+
+
+class Command(BaseCommand):
+    help = "Load the fixed quarantined CUR rows of a RootInvoice without reprocessing its file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('invoice_id', type=int, help="ID of the RootInvoice whose quarantined rows to re-drive")
+
+    def handle(self, *args, **options):
+        try:
+            invoice = RootInvoice.objects.get(pk=options['invoice_id'])
+        except RootInvoice.DoesNotExist:
+            raise CommandError(f"RootInvoice {options['invoice_id']} does not exist")
+
+        result = redrive_quarantined_rows(invoice)
+        self.stdout.write(self.style.SUCCESS(
+            f"Re-drove {result['redriven']} rows, {result['quarantined']} still quarantined"
+        ))
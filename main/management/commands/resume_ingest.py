@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.models import IngestCheckpoint, RootInvoice
+from main.utils import process_invoice_csv_data
+
+
+class Command(BaseCommand):
+    help = "Continue interrupted CUR loads after their last committed chunk."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'invoice_ids', nargs='*', type=int,
+            help="RootInvoices to resume (default: every invoice with an unfinished checkpoint)",
+        )
+        parser.add_argument('--chunk-size', type=int, help="CSV rows per chunk (default: CUR_INGEST_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        if options['invoice_ids']:
+            invoices = list(RootInvoice.objects.filter(pk__in=options['invoice_ids']))
+            missing = set(options['invoice_ids']) - {invoice.pk for invoice in invoices}
+            if missing:
+                raise CommandError(f"RootInvoice {', '.join(map(str, sorted(missing)))} does not exist")
+        else:
+            invoices = list(RootInvoice.objects.filter(ingest_checkpoint__status='IN_PROGRESS').order_by('pk'))
+
+        if not invoices:
+            self.stdout.write("No unfinished CUR loads")
+            return
+
+        for invoice in invoices:
+            checkpoint = IngestCheckpoint.objects.filter(invoice=invoice).first()
+            self.stdout.write(
+                f"Resuming invoice {invoice.pk} after {checkpoint.rows_committed} rows"
+                if checkpoint else f"Loading invoice {invoice.pk} from the start (no checkpoint)"
+            )
+            process_invoice_csv_data(invoice, chunk_size=options['chunk_size'], resume=True)
+            checkpoint = IngestCheckpoint.objects.filter(invoice=invoice).first()
+            if checkpoint and checkpoint.status == 'COMPLETED':
+                self.stdout.write(self.style.SUCCESS(f"Invoice {invoice.pk} loaded ({checkpoint.rows_committed} rows)"))
+            else:
+                self.stdout.write(self.style.ERROR(f"Invoice {invoice.pk} is still unfinished"))
@@ -0,0 +1,42 @@
+import os
+import socket
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from main.helpers.job_queue import claim_next_job, requeue_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (invoice fetching and CUR ingestion)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Exit once the queue is empty instead of polling")
+        parser.add_argument('--sleep', type=int, help="Seconds to wait when the queue is empty (default: JOB_POLL_INTERVAL)")
+        parser.add_argument('--worker-id', help="Name recorded on claimed jobs (default: host:pid)")
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id'] or f"{socket.gethostname()}:{os.getpid()}"
+        sleep = options['sleep'] or settings.JOB_POLL_INTERVAL
+        self.stdout.write(f"👷 Worker {worker_id} started")
+
+        try:
+            while True:
+                close_old_connections()
+                requeued = requeue_stale_jobs()
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f"Re-queued {requeued} stale jobs"))
+
+                job = claim_next_job(worker_id)
+                if job is None:
+                    if options['once']:
+                        break
+                    time.sleep(sleep)
+                    continue
+
+                job = run_job(job)
+                self.stdout.write(f"{job}")
+        except KeyboardInterrupt:
+            self.stdout.write(f"👋 Worker {worker_id} stopped")
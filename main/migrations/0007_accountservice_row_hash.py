@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0006_alter_customer_business_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accountservice",
+            name="row_hash",
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name="accountservice",
+            index=models.Index(
+                fields=["invoice", "line_item_id"],
+                name="main_accoun_invoice_5c3df7_idx",
+            ),
+        ),
+    ]
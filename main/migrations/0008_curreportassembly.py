@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0007_accountservice_row_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurReportAssembly",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("bill_start_date", models.DateField()),
+                ("bill_end_date", models.DateField()),
+                ("assembly_id", models.CharField(max_length=100)),
+                ("report_keys", models.JSONField(default=list)),
+            ],
+            options={
+                "verbose_name": "CUR Report Assembly",
+                "verbose_name_plural": "CUR Report Assemblies",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("bill_start_date", "bill_end_date"),
+                        name="unique_cur_assembly_billing_period",
+                    )
+                ],
+            },
+        ),
+    ]
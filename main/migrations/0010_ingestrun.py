@@ -0,0 +1,67 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0009_backgroundjob"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("SUCCEEDED", "Succeeded"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RUNNING",
+                        max_length=20,
+                    ),
+                ),
+                ("loader", models.CharField(blank=True, default="", max_length=100)),
+                ("incremental", models.BooleanField(default=False)),
+                ("rows_read", models.PositiveIntegerField(default=0)),
+                ("rows_written", models.PositiveIntegerField(default=0)),
+                ("rows_skipped", models.PositiveIntegerField(default=0)),
+                ("invalid_values", models.PositiveIntegerField(default=0)),
+                ("duration_seconds", models.FloatField(default=0.0)),
+                ("rows_per_second", models.FloatField(default=0.0)),
+                ("peak_memory_mb", models.FloatField(blank=True, null=True)),
+                ("phase_seconds", models.JSONField(blank=True, default=dict)),
+                ("error", models.TextField(blank=True, null=True)),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingest_runs",
+                        to="main.rootinvoice",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ingest Run",
+                "verbose_name_plural": "Ingest Runs",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0010_ingestrun"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyCostRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("usage_date", models.DateField(blank=True, null=True)),
+                (
+                    "currency_code",
+                    models.CharField(blank=True, max_length=10, null=True),
+                ),
+                ("blended_cost", models.FloatField(default=0)),
+                ("unblendend_cost", models.FloatField(default=0)),
+                ("usage_amount", models.FloatField(default=0)),
+                ("line_items", models.PositiveIntegerField(default=0)),
+                (
+                    "aws_account",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_cost_rollups",
+                        to="main.awsaccount",
+                    ),
+                ),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_cost_rollups",
+                        to="main.rootinvoice",
+                    ),
+                ),
+                (
+                    "service",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_cost_rollups",
+                        to="main.service",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Daily Cost Rollup",
+                "verbose_name_plural": "Daily Cost Rollups",
+                "indexes": [
+                    models.Index(
+                        fields=["usage_date", "aws_account"],
+                        name="main_dailyc_usage_d_d729f6_idx",
+                    ),
+                    models.Index(
+                        fields=["aws_account", "usage_date"],
+                        name="main_dailyc_aws_acc_c6c1d3_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
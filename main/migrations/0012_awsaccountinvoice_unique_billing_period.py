@@ -0,0 +1,39 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+def delete_duplicate_account_invoices(apps, schema_editor):
+    """Keep only the most recently updated AWSAccountInvoice per account and billing period."""
+    AWSAccountInvoice = apps.get_model("main", "AWSAccountInvoice")
+    seen = set()
+    duplicate_ids = []
+    rows = AWSAccountInvoice.objects.order_by("-updated_at", "-pk").values_list(
+        "pk", "aws_account_id", "bill_start_date", "bill_end_date"
+    )
+    for pk, *key in rows.iterator():
+        key = tuple(key)
+        if key in seen:
+            duplicate_ids.append(pk)
+        else:
+            seen.add(key)
+    for start in range(0, len(duplicate_ids), 500):
+        AWSAccountInvoice.objects.filter(pk__in=duplicate_ids[start : start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0011_dailycostrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_account_invoices, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="awsaccountinvoice",
+            constraint=models.UniqueConstraint(
+                fields=("aws_account", "bill_start_date", "bill_end_date"),
+                name="unique_aws_account_invoice_billing_period",
+            ),
+        ),
+    ]
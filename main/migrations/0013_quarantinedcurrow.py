@@ -0,0 +1,80 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0012_awsaccountinvoice_unique_billing_period"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="ingestrun",
+            name="rows_quarantined",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="QuarantinedCurRow",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("row_number", models.PositiveIntegerField()),
+                (
+                    "reason",
+                    models.CharField(
+                        choices=[
+                            ("MISSING_ACCOUNT_ID", "Missing account id"),
+                            ("INVALID_DATE", "Invalid date"),
+                            ("INVALID_NUMBER", "Invalid number"),
+                        ],
+                        max_length=50,
+                    ),
+                ),
+                ("columns", models.JSONField(blank=True, default=list)),
+                ("raw_values", models.JSONField(default=dict)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("QUARANTINED", "Quarantined"),
+                            ("REDRIVEN", "Redriven"),
+                        ],
+                        default="QUARANTINED",
+                        max_length=20,
+                    ),
+                ),
+                (
+                    "invoice",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="quarantined_rows",
+                        to="main.rootinvoice",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Quarantined CUR Row",
+                "verbose_name_plural": "Quarantined CUR Rows",
+                "ordering": ["invoice", "row_number"],
+                "indexes": [
+                    models.Index(
+                        fields=["invoice", "status"],
+                        name="main_quaran_invoice_8cb3d0_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.6 on 2026-10-18 14:05
+
+from django.conf import settings
+from django.db import migrations
+
+
+def partition_account_services(apps, schema_editor):
+    """Partition AccountService by invoice when CUR_PARTITION_ACCOUNT_SERVICES is on (PostgreSQL only)."""
+    if schema_editor.connection.vendor != "postgresql" or not settings.CUR_PARTITION_ACCOUNT_SERVICES:
+        return
+    from main.helpers.account_service_partitions import partition_account_services
+
+    partition_account_services()
+
+
+def unpartition_account_services(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    from main.helpers.account_service_partitions import unpartition_account_services
+
+    unpartition_account_services()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0013_quarantinedcurrow"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_account_services, unpartition_account_services),
+    ]
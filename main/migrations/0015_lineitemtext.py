@@ -0,0 +1,113 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0014_partition_accountservice"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LineItemText",
+            fields=[
+                ("id", models.AutoField(primary_key=True, serialize=False)),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("value", models.TextField()),
+                ("value_hash", models.CharField(max_length=64, unique=True)),
+            ],
+            options={
+                "verbose_name": "Line Item Text",
+                "verbose_name_plural": "Line Item Texts",
+            },
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="currency_code_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="product_code_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="product_description_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_savings_plan_arn_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="tax_type_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="usage_term_pricing_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="usage_unit_pricing_text",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="main.lineitemtext",
+            ),
+        ),
+    ]
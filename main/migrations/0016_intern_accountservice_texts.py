@@ -0,0 +1,85 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:48
+
+import hashlib
+
+from django.db import migrations
+from django.db.models import OuterRef, Subquery
+
+TEXT_FIELDS = [
+    "currency_code",
+    "product_code",
+    "product_description",
+    "savings_plan_savings_plan_arn",
+    "tax_type",
+    "usage_term_pricing",
+    "usage_unit_pricing",
+]
+BATCH_SIZE = 1000
+
+
+def intern_texts(apps, schema_editor):
+    """Store every distinct value of the text columns once and point AccountService at it."""
+    AccountService = apps.get_model("main", "AccountService")
+    LineItemText = apps.get_model("main", "LineItemText")
+    values = set()
+    for field in TEXT_FIELDS:
+        values.update(
+            AccountService.objects.exclude(**{field: None})
+            .values_list(field, flat=True)
+            .distinct()
+        )
+    LineItemText.objects.bulk_create(
+        [
+            LineItemText(
+                value=value, value_hash=hashlib.sha256(value.encode()).hexdigest()
+            )
+            for value in values
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    text_ids = dict(LineItemText.objects.values_list("value", "pk"))
+
+    # ``value`` is not indexed, so the rows are mapped here in one pass by primary key
+    last_pk = 0
+    while True:
+        rows = list(
+            AccountService.objects.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", *TEXT_FIELDS)[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        updated = []
+        for pk, *row_values in rows:
+            row = AccountService(pk=pk)
+            for field, value in zip(TEXT_FIELDS, row_values):
+                setattr(row, f"{field}_text_id", text_ids.get(value))
+            updated.append(row)
+        AccountService.objects.bulk_update(
+            updated, [f"{field}_text" for field in TEXT_FIELDS]
+        )
+        last_pk = rows[-1][0]
+
+
+def restore_texts(apps, schema_editor):
+    AccountService = apps.get_model("main", "AccountService")
+    LineItemText = apps.get_model("main", "LineItemText")
+    for field in TEXT_FIELDS:
+        value = LineItemText.objects.filter(pk=OuterRef(f"{field}_text")).values(
+            "value"
+        )[:1]
+        AccountService.objects.exclude(**{f"{field}_text": None}).update(
+            **{field: Subquery(value)}
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0015_lineitemtext"),
+    ]
+
+    operations = [
+        migrations.RunPython(intern_texts, restore_texts),
+    ]
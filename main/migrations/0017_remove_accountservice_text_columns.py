@@ -0,0 +1,41 @@
+# Generated by Django 5.1.6 on 2026-10-18 11:48
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0016_intern_accountservice_texts"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="currency_code",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="product_code",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="product_description",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_savings_plan_arn",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="tax_type",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="usage_term_pricing",
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="usage_unit_pricing",
+        ),
+    ]
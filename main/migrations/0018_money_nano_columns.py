@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0017_remove_accountservice_text_columns"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accountservice",
+            name="blended_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="unblendend_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="public_on_demand_rate_pricing_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_used_commitment_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_total_commitment_to_date_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_savings_plan_effective_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_recurring_commitment_for_billing_period_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="accountservice",
+            name="savings_plan_amortized_upfront_commitment_for_billing_period_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="awsaccountinvoice",
+            name="total_ammount_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="awscostmanagement",
+            name="cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="dailycostrollup",
+            name="blended_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="dailycostrollup",
+            name="unblendend_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="monthlycostbyaccount",
+            name="total_cost_nanos",
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
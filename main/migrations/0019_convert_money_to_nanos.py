@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:20
+
+from django.db import migrations
+from django.db.models import BigIntegerField, F, FloatField
+from django.db.models.functions import Cast, Round
+
+NANOS_PER_DOLLAR = 10**9
+
+MONEY_FIELDS = {
+    "accountservice": [
+        "blended_cost",
+        "unblendend_cost",
+        "public_on_demand_rate_pricing",
+        "savings_plan_used_commitment",
+        "savings_plan_total_commitment_to_date",
+        "savings_plan_savings_plan_effective_cost",
+        "savings_plan_recurring_commitment_for_billing_period",
+        "savings_plan_amortized_upfront_commitment_for_billing_period",
+    ],
+    "awsaccountinvoice": ["total_ammount"],
+    "awscostmanagement": ["cost"],
+    "dailycostrollup": ["blended_cost", "unblendend_cost"],
+    "monthlycostbyaccount": ["total_cost"],
+}
+
+
+def dollars_to_nanos(apps, schema_editor):
+    for model_name, fields in MONEY_FIELDS.items():
+        model = apps.get_model("main", model_name)
+        model.objects.update(
+            **{
+                f"{field}_nanos": Cast(
+                    Round(F(field) * NANOS_PER_DOLLAR), BigIntegerField()
+                )
+                for field in fields
+            }
+        )
+
+
+def nanos_to_dollars(apps, schema_editor):
+    for model_name, fields in MONEY_FIELDS.items():
+        model = apps.get_model("main", model_name)
+        model.objects.update(
+            **{
+                field: Cast(F(f"{field}_nanos"), FloatField()) / NANOS_PER_DOLLAR
+                for field in fields
+            }
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0018_money_nano_columns"),
+    ]
+
+    operations = [
+        migrations.RunPython(dollars_to_nanos, nanos_to_dollars),
+    ]
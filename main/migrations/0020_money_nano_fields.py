@@ -0,0 +1,196 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:20
+
+import main.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0019_convert_money_to_nanos"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="blended_cost",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="blended_cost_nanos",
+            new_name="blended_cost",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="blended_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="unblendend_cost",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="unblendend_cost_nanos",
+            new_name="unblendend_cost",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="unblendend_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="public_on_demand_rate_pricing",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="public_on_demand_rate_pricing_nanos",
+            new_name="public_on_demand_rate_pricing",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="public_on_demand_rate_pricing",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_used_commitment",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="savings_plan_used_commitment_nanos",
+            new_name="savings_plan_used_commitment",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="savings_plan_used_commitment",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_total_commitment_to_date",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="savings_plan_total_commitment_to_date_nanos",
+            new_name="savings_plan_total_commitment_to_date",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="savings_plan_total_commitment_to_date",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_savings_plan_effective_cost",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="savings_plan_savings_plan_effective_cost_nanos",
+            new_name="savings_plan_savings_plan_effective_cost",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="savings_plan_savings_plan_effective_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_recurring_commitment_for_billing_period",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="savings_plan_recurring_commitment_for_billing_period_nanos",
+            new_name="savings_plan_recurring_commitment_for_billing_period",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="savings_plan_recurring_commitment_for_billing_period",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="accountservice",
+            name="savings_plan_amortized_upfront_commitment_for_billing_period",
+        ),
+        migrations.RenameField(
+            model_name="accountservice",
+            old_name="savings_plan_amortized_upfront_commitment_for_billing_period_nanos",
+            new_name="savings_plan_amortized_upfront_commitment_for_billing_period",
+        ),
+        migrations.AlterField(
+            model_name="accountservice",
+            name="savings_plan_amortized_upfront_commitment_for_billing_period",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="awsaccountinvoice",
+            name="total_ammount",
+        ),
+        migrations.RenameField(
+            model_name="awsaccountinvoice",
+            old_name="total_ammount_nanos",
+            new_name="total_ammount",
+        ),
+        migrations.AlterField(
+            model_name="awsaccountinvoice",
+            name="total_ammount",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="awscostmanagement",
+            name="cost",
+        ),
+        migrations.RenameField(
+            model_name="awscostmanagement",
+            old_name="cost_nanos",
+            new_name="cost",
+        ),
+        migrations.AlterField(
+            model_name="awscostmanagement",
+            name="cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="dailycostrollup",
+            name="blended_cost",
+        ),
+        migrations.RenameField(
+            model_name="dailycostrollup",
+            old_name="blended_cost_nanos",
+            new_name="blended_cost",
+        ),
+        migrations.AlterField(
+            model_name="dailycostrollup",
+            name="blended_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="dailycostrollup",
+            name="unblendend_cost",
+        ),
+        migrations.RenameField(
+            model_name="dailycostrollup",
+            old_name="unblendend_cost_nanos",
+            new_name="unblendend_cost",
+        ),
+        migrations.AlterField(
+            model_name="dailycostrollup",
+            name="unblendend_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+        migrations.RemoveField(
+            model_name="monthlycostbyaccount",
+            name="total_cost",
+        ),
+        migrations.RenameField(
+            model_name="monthlycostbyaccount",
+            old_name="total_cost_nanos",
+            new_name="total_cost",
+        ),
+        migrations.AlterField(
+            model_name="monthlycostbyaccount",
+            name="total_cost",
+            field=main.fields.NanoDollarField(default=0),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0020_money_nano_fields"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IngestCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("IN_PROGRESS", "In progress"),
+                            ("COMPLETED", "Completed"),
+                        ],
+                        default="IN_PROGRESS",
+                        max_length=20,
+                    ),
+                ),
+                ("file_name", models.CharField(max_length=255)),
+                ("file_size", models.PositiveBigIntegerField(default=0)),
+                ("byte_offset", models.PositiveBigIntegerField(default=0)),
+                ("rows_committed", models.PositiveBigIntegerField(default=0)),
+                ("chunks_committed", models.PositiveIntegerField(default=0)),
+                (
+                    "invoice",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ingest_checkpoint",
+                        to="main.rootinvoice",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Ingest Checkpoint",
+                "verbose_name_plural": "Ingest Checkpoints",
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("main", "0021_ingestcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CurPollCursor",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("is_active", models.BooleanField(default=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("prefix", models.CharField(max_length=255, unique=True)),
+                ("last_modified", models.DateTimeField(blank=True, null=True)),
+                ("etag", models.CharField(blank=True, default="", max_length=100)),
+            ],
+            options={
+                "verbose_name": "CUR Poll Cursor",
+                "verbose_name_plural": "CUR Poll Cursors",
+            },
+        ),
+    ]
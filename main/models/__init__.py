@@ -1,3 +1,4 @@
 from .core import *
 from .invoice import *
 from .service import *
+from .jobs import *
@@ -1,4 +1,5 @@
 from django.db import models
+from main.fields import NanoDollarField
 import datetime
 import random
 
@@ -20,7 +21,7 @@ class RootInvoice(BaseModel):
     
 class AWSAccountInvoice(BaseModel):
     aws_account = models.ForeignKey(AwsAccount, on_delete=models.CASCADE, related_name='aws_account_invoices')
-    total_ammount = models.FloatField(default=0.0)
+    total_ammount = NanoDollarField(default=0)
     invoice_date = models.DateField()
     bill_start_date = models.DateField()
     bill_end_date = models.DateField()
@@ -28,6 +29,133 @@ class AWSAccountInvoice(BaseModel):
     class Meta:
         verbose_name = "AWS Account Invoice"
         verbose_name_plural = "AWS Account Invoices"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['aws_account', 'bill_start_date', 'bill_end_date'], name='unique_aws_account_invoice_billing_period'
+            )
+        ]
 
     def __str__(self):
-        return self.aws_account.name + ' - ' + str(self.invoice_date)
\ No newline at end of file
+        return self.aws_account.name + ' - ' + str(self.invoice_date)
+
+
+class CurReportAssembly(BaseModel):
+    """The last Cost and Usage Report assembly ingested for a billing period."""
+    bill_start_date = models.DateField()
+    bill_end_date = models.DateField()
+    assembly_id = models.CharField(max_length=100)
+    report_keys = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name = "CUR Report Assembly"
+        verbose_name_plural = "CUR Report Assemblies"
+        constraints = [
+            models.UniqueConstraint(fields=['bill_start_date', 'bill_end_date'], name='unique_cur_assembly_billing_period')
+        ]
+
+    def __str__(self):
+        return f"{self.assembly_id} - Bill Start {self.bill_start_date} - Bill End: {self.bill_end_date}"
+
+
+INGEST_RUN_STATUS_CHOICES = (
+    ('RUNNING', 'Running'),
+    ('SUCCEEDED', 'Succeeded'),
+    ('FAILED', 'Failed'),
+)
+
+
+class IngestRun(BaseModel):
+    """Timings and counters of one load of a RootInvoice's CUR file."""
+    invoice = models.ForeignKey(RootInvoice, on_delete=models.CASCADE, related_name='ingest_runs')
+    status = models.CharField(max_length=20, choices=INGEST_RUN_STATUS_CHOICES, default='RUNNING')
+    loader = models.CharField(max_length=100, blank=True, default='')
+    incremental = models.BooleanField(default=False)
+    rows_read = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    rows_skipped = models.PositiveIntegerField(default=0)
+    rows_quarantined = models.PositiveIntegerField(default=0)
+    invalid_values = models.PositiveIntegerField(default=0)
+    duration_seconds = models.FloatField(default=0.0)
+    rows_per_second = models.FloatField(default=0.0)
+    peak_memory_mb = models.FloatField(null=True, blank=True)
+    phase_seconds = models.JSONField(default=dict, blank=True)
+    error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Ingest Run"
+        verbose_name_plural = "Ingest Runs"
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Ingest of invoice {self.invoice_id} - {self.status} - {self.rows_read} rows"
+
+
+QUARANTINE_REASON_CHOICES = (
+    ('MISSING_ACCOUNT_ID', 'Missing account id'),
+    ('INVALID_DATE', 'Invalid date'),
+    ('INVALID_NUMBER', 'Invalid number'),
+)
+
+QUARANTINE_STATUS_CHOICES = (
+    ('QUARANTINED', 'Quarantined'),
+    ('REDRIVEN', 'Redriven'),
+)
+
+
+class QuarantinedCurRow(BaseModel):
+    """A CUR line item rejected at ingest, kept with its raw values so it can be fixed and re-driven."""
+    invoice = models.ForeignKey(RootInvoice, on_delete=models.CASCADE, related_name='quarantined_rows')
+    row_number = models.PositiveIntegerField()  # line in the CUR file, counting the header as line 1
+    reason = models.CharField(max_length=50, choices=QUARANTINE_REASON_CHOICES)
+    columns = models.JSONField(default=list, blank=True)  # CUR columns that failed validation
+    raw_values = models.JSONField(default=dict)  # CUR column -> raw cell, null for empty cells
+    status = models.CharField(max_length=20, choices=QUARANTINE_STATUS_CHOICES, default='QUARANTINED')
+
+    class Meta:
+        verbose_name = "Quarantined CUR Row"
+        verbose_name_plural = "Quarantined CUR Rows"
+        ordering = ['invoice', 'row_number']
+        indexes = [
+            models.Index(fields=['invoice', 'status']),
+        ]
+
+    def __str__(self):
+        return f"Invoice {self.invoice_id} line {self.row_number} - {self.reason}"
+
+
+INGEST_CHECKPOINT_STATUS_CHOICES = (
+    ('IN_PROGRESS', 'In progress'),
+    ('COMPLETED', 'Completed'),
+)
+
+
+class IngestCheckpoint(BaseModel):
+    """How far the CUR file of a RootInvoice was loaded, committed together with every chunk of rows."""
+    invoice = models.OneToOneField(RootInvoice, on_delete=models.CASCADE, related_name='ingest_checkpoint')
+    status = models.CharField(max_length=20, choices=INGEST_CHECKPOINT_STATUS_CHOICES, default='IN_PROGRESS')
+    file_name = models.CharField(max_length=255)  # the file the offsets refer to; a different file starts over
+    file_size = models.PositiveBigIntegerField(default=0)
+    byte_offset = models.PositiveBigIntegerField(default=0)  # of the first line not loaded yet, in the uncompressed file
+    rows_committed = models.PositiveBigIntegerField(default=0)  # CSV rows before byte_offset
+    chunks_committed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Ingest Checkpoint"
+        verbose_name_plural = "Ingest Checkpoints"
+
+    def __str__(self):
+        return f"Ingest of invoice {self.invoice_id} - {self.status} - {self.rows_committed} rows"
+
+
+class CurPollCursor(BaseModel):
+    """The newest CUR delivery the poller has seen under a billing period prefix of the CUR source."""
+    prefix = models.CharField(max_length=255, unique=True)
+    last_modified = models.DateTimeField(null=True, blank=True)  # of the newest object listed
+    etag = models.CharField(max_length=100, blank=True, default='')  # of the manifest; unchanged means nothing was delivered
+
+    class Meta:
+        verbose_name = "CUR Poll Cursor"
+        verbose_name_plural = "CUR Poll Cursors"
+
+    def __str__(self):
+        return f"{self.prefix} - {self.last_modified}"
@@ -0,0 +1,41 @@
+from django.db import models
+from django.utils import timezone
+
+from .core import *
+
+JOB_TYPE_CHOICES = (
+    ('FETCH_INVOICES', 'Fetch Invoices'),
+    ('INGEST_INVOICES', 'Ingest Invoices'),
+)
+
+JOB_STATUS_CHOICES = (
+    ('QUEUED', 'Queued'),
+    ('RUNNING', 'Running'),
+    ('SUCCEEDED', 'Succeeded'),
+    ('FAILED', 'Failed'),
+)
+
+
+class BackgroundJob(BaseModel):
+    job_type = models.CharField(max_length=50, choices=JOB_TYPE_CHOICES)
+    status = models.CharField(max_length=20, choices=JOB_STATUS_CHOICES, default='QUEUED')
+    payload = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=255, null=True, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Background Job"
+        verbose_name_plural = "Background Jobs"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'run_after']),  # queue polling
+        ]
+
+    def __str__(self):
+        return f"{self.job_type} #{self.pk} - {self.status}"
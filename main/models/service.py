@@ -1,4 +1,7 @@
+import hashlib
+
 from django.db import models
+from main.fields import NanoDollarField
 from main.models import *
 from .core import *
 
@@ -24,40 +27,73 @@ class Service(BaseModel):
     
 
 
+class LineItemText(BaseModel):
+    """A distinct value of the low-cardinality CUR text columns, stored once and referenced by AccountService."""
+    id = models.AutoField(primary_key=True)  # 4 byte keys keep the seven references per line item small
+    value = models.TextField()
+    # Unique in place of ``value``: TEXT can't have a unique index on MySQL, and long values overflow a btree row on PostgreSQL
+    value_hash = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        verbose_name = "Line Item Text"
+        verbose_name_plural = "Line Item Texts"
+
+    def __str__(self):
+        return self.value
+
+    @staticmethod
+    def hash_value(value: str) -> str:
+        return hashlib.sha256(value.encode()).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.value_hash = self.hash_value(self.value)
+        super().save(*args, **kwargs)
+
+
+def _text_value(field_name):
+    """Read-only property returning the text behind one of AccountService's LineItemText foreign keys."""
+    def value(self):
+        text = getattr(self, field_name)
+        return text.value if text is not None else None
+    return property(value)
+
+
 class AccountService(BaseModel):
     aws_account = models.ForeignKey(AwsAccount, on_delete=models.CASCADE, related_name='account_services')
     service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='account_services')
     
     invoice = models.ForeignKey(RootInvoice, on_delete=models.CASCADE)
 
-    blended_cost = models.FloatField(default=0) #csv_column_name = lineItem/BlendedCost
+    blended_cost = NanoDollarField(default=0) #csv_column_name = lineItem/BlendedCost
     usage_amount = models.FloatField(default=0)  #csv_column_name = lineItem/UsageAmount
-    unblendend_cost = models.FloatField(default=0) #csv_column_name = lineItem/UnblendedCost
+    unblendend_cost = NanoDollarField(default=0) #csv_column_name = lineItem/UnblendedCost
     usage_start_date = models.DateField(null=True, blank=True) #csv_column_name = lineItem/UsageStartDate
     usage_end_date = models.DateField(null=True, blank=True) #csv_column_name = lineItem/UsageEndDate
-    product_description = models.TextField(blank=True, null=True) #csv_column_name = product/description
-    tax_type = models.CharField(max_length=255, blank=True, null=True) #csv_column_name = lineItem/TaxType
+    product_description_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = product/description
+    tax_type_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = lineItem/TaxType
     line_item_id = models.CharField(max_length=255, blank=True, null=True)  #csv_column_name = identity/LineItemId
-    product_code = models.CharField(max_length=255, blank=True, null=True)  #csv_column_name = lineItem/ProductCode
-    currency_code = models.CharField(max_length=10, default='USD', blank=True, null=True) #csv_column_name = lineItem/CurrencyCode
+    product_code_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = lineItem/ProductCode
+    currency_code_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = lineItem/CurrencyCode
 
 
     public_on_demand_cost_pricing = models.FloatField(default=0) #csv_column_name = pricing/publicOnDemandRate
-    usage_unit_pricing = models.CharField(max_length=255, blank=True, null=True) #csv_column_name = pricing/unit
-    usage_term_pricing = models.CharField(max_length=255, blank=True, null=True) #csv_column_name = pricing/term
-    public_on_demand_rate_pricing = models.FloatField(default=0) #csv_column_name = pricing/publicOnDemandCost
+    usage_unit_pricing_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = pricing/unit
+    usage_term_pricing_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = pricing/term
+    public_on_demand_rate_pricing = NanoDollarField(default=0) #csv_column_name = pricing/publicOnDemandCost
     
-    savings_plan_used_commitment = models.FloatField(default=0) #csv_column_name = savingsPlan/UsedCommitment
+    savings_plan_used_commitment = NanoDollarField(default=0) #csv_column_name = savingsPlan/UsedCommitment
     savings_plan_savings_plan_rate = models.FloatField(default=0) #csv_column_name = savingsPlan/SavingsPlanRate
-    savings_plan_total_commitment_to_date = models.FloatField(default=0) #csv_column_name = savingsPlan/TotalCommitmentToDate
-    savings_plan_savings_plan_effective_cost = models.FloatField(default=0) #csv_column_name = savingsPlan/SavingsPlanEffectiveCost
-    savings_plan_savings_plan_arn = models.CharField(max_length=255, blank=True, null=True) #csv_column_name = savingsPlan/SavingsPlanARN
-    savings_plan_recurring_commitment_for_billing_period = models.FloatField(default=0) #csv_column_name = savingsPlan/RecurringCommitmentForBillingPeriod
-    savings_plan_amortized_upfront_commitment_for_billing_period = models.FloatField(default=0) #csv_column_name = savingsPlan/AmortizedUpfrontCommitmentForBillingPeriod
+    savings_plan_total_commitment_to_date = NanoDollarField(default=0) #csv_column_name = savingsPlan/TotalCommitmentToDate
+    savings_plan_savings_plan_effective_cost = NanoDollarField(default=0) #csv_column_name = savingsPlan/SavingsPlanEffectiveCost
+    savings_plan_savings_plan_arn_text = models.ForeignKey(LineItemText, on_delete=models.PROTECT, blank=True, null=True, related_name='+', db_index=False) #csv_column_name = savingsPlan/SavingsPlanARN
+    savings_plan_recurring_commitment_for_billing_period = NanoDollarField(default=0) #csv_column_name = savingsPlan/RecurringCommitmentForBillingPeriod
+    savings_plan_amortized_upfront_commitment_for_billing_period = NanoDollarField(default=0) #csv_column_name = savingsPlan/AmortizedUpfrontCommitmentForBillingPeriod
 
     extra_rate_type = models.CharField(max_length=50, choices=GENERIC_UNIT_CHOICES, default='Percentage')
     extra_rate_value = models.FloatField(default=0)
 
+    row_hash = models.BigIntegerField(blank=True, null=True)  # hash of the CUR line item content, used by incremental ingestion
+
 
     class Meta:
         verbose_name = "Account Service"
@@ -65,12 +101,47 @@ class AccountService(BaseModel):
         indexes = [
             models.Index(fields=['aws_account', 'invoice']),  # index on aws_account and invoice
             models.Index(fields=['usage_end_date']),  # index on usage_end_date
+            models.Index(fields=['invoice', 'line_item_id']),  # incremental re-ingestion lookups
         ]
     
+    # The interned text columns, under their original names (use select_related on the *_text fields when reading many rows)
+    product_description = _text_value('product_description_text')
+    tax_type = _text_value('tax_type_text')
+    product_code = _text_value('product_code_text')
+    currency_code = _text_value('currency_code_text')
+    usage_unit_pricing = _text_value('usage_unit_pricing_text')
+    usage_term_pricing = _text_value('usage_term_pricing_text')
+    savings_plan_savings_plan_arn = _text_value('savings_plan_savings_plan_arn_text')
+
     def __str__(self):
         return self.aws_account.name + ' - ' + self.service.name
 
 
+class DailyCostRollup(BaseModel):
+    """AccountService costs summed per invoice, account, service (and its region), usage day and currency."""
+    aws_account = models.ForeignKey(AwsAccount, on_delete=models.CASCADE, related_name='daily_cost_rollups')
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name='daily_cost_rollups')
+    invoice = models.ForeignKey(RootInvoice, on_delete=models.CASCADE, related_name='daily_cost_rollups')
+    usage_date = models.DateField(null=True, blank=True)  # AccountService.usage_start_date
+    currency_code = models.CharField(max_length=10, blank=True, null=True)
+
+    blended_cost = NanoDollarField(default=0)
+    unblendend_cost = NanoDollarField(default=0)
+    usage_amount = models.FloatField(default=0)
+    line_items = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Daily Cost Rollup"
+        verbose_name_plural = "Daily Cost Rollups"
+        indexes = [
+            models.Index(fields=['usage_date', 'aws_account']),  # dashboard date range queries
+            models.Index(fields=['aws_account', 'usage_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.aws_account_id} - {self.service_id} - {self.usage_date}"
+
+
     
 class AwsCostManagement(BaseModel):
     aws_account = models.ForeignKey(AwsAccount, on_delete=models.CASCADE)
@@ -80,7 +151,7 @@ class AwsCostManagement(BaseModel):
     account_name = models.CharField(max_length=255, null=True, blank=True)
     account_email = models.CharField(max_length=255, null=True, blank=True)
     service = models.CharField(max_length=255)
-    cost = models.FloatField(default=0)
+    cost = NanoDollarField(default=0)
     cost_unit = models.CharField(max_length=25)
     usage = models.FloatField(default=0)
     usage_unit = models.CharField(max_length=25, default='-')
@@ -97,7 +168,7 @@ class AwsCostManagement(BaseModel):
 class MonthlyCostByAccount(BaseModel):
     aws_account = models.ForeignKey(AwsAccount, on_delete=models.CASCADE, related_name='monthly_cost_by_account')
     month = models.DateField()
-    total_cost = models.FloatField(default=0)
+    total_cost = NanoDollarField(default=0)
 
     class Meta:
         verbose_name = "Monthly Cost by Account"
@@ -1,5 +1,9 @@
 import boto3
-from datetime import datetime, timedelta
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
 import pandas as pd
 from typing import List, Dict, Optional
 import logging
@@ -7,6 +11,8 @@ import time
 import os
 from pathlib import Path
 import environ
+from django.conf import settings
+from django.core.cache import caches
 
 env = environ.Env(
     DEBUG=(bool, True)
@@ -29,6 +35,9 @@ class AWSAccountManager:
         self.secret_key = secret_key
         self.master_account_id = self.get_master_account_id()
         self.region = region
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache_lock = threading.Lock()
         
           # Initialize logging
         logging.basicConfig(level=logging.INFO)
@@ -249,21 +258,109 @@ class AWSAccountManager:
 
     def get_cost_and_usage(self, start_date: str, end_date: str, 
                           account_id: Optional[str] = None,
-                          granularity: str = 'MONTHLY') -> Dict:
-        # print('-'*15, start_date, end_date)
+                          granularity: str = 'MONTHLY',
+                          window_days: Optional[int] = None,
+                          max_workers: Optional[int] = None) -> Dict:
         """
         Get cost and usage data for specified period and account.
+
+        Every page of the Cost Explorer response is followed, so large
+        SERVICE x LINKED_ACCOUNT groupings are complete. Long ranges can be split
+        into date windows fetched concurrently; each window is a separate
+        (billed) request, and the results are merged back in date order.
+
+        Each window's result is cached (see ``COST_EXPLORER_CACHE``) under its
+        normalized request. Windows are also split where the last
+        ``COST_EXPLORER_CACHE_SETTLE_DAYS`` begin, so settled days are kept for
+        ``COST_EXPLORER_CACHE_TTL_CLOSED`` and only the still-changing days
+        expire after ``COST_EXPLORER_CACHE_TTL_RECENT``.
         
         Args:
             start_date (str): Start date in YYYY-MM-DD format
             end_date (str): End date in YYYY-MM-DD format
             account_id (str, optional): Specific account ID to query
             granularity (str): Time granularity (DAILY|MONTHLY)
+            window_days (int, optional): Days per window (default: COST_EXPLORER_WINDOW_DAYS, 0 = one window)
+            max_workers (int, optional): Windows fetched at the same time (default: COST_EXPLORER_MAX_WORKERS)
             
         Returns:
             Dict: Cost and usage data
         """
-        # try:
+        window_days = settings.COST_EXPLORER_WINDOW_DAYS if window_days is None else window_days
+        settled_before = self._settled_before() if settings.COST_EXPLORER_CACHE else None
+        windows = self._date_windows(start_date, end_date, window_days, granularity, split_at=settled_before)
+        if len(windows) == 1:
+            pages = self._get_cached_cost_and_usage_pages(start_date, end_date, account_id, granularity)
+        else:
+            workers = min(max_workers or settings.COST_EXPLORER_MAX_WORKERS, len(windows))
+            self.logger.info(f"Fetching cost and usage from {start_date} to {end_date} in {len(windows)} windows, {workers} at a time")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                window_pages = executor.map(
+                    lambda window: self._get_cached_cost_and_usage_pages(window[0], window[1], account_id, granularity), windows
+                )
+                pages = [page for window in window_pages for page in window]
+        return self._merge_cost_and_usage_pages(pages)
+
+    @staticmethod
+    def _settled_before() -> date:
+        """The first day whose costs may still change."""
+        return datetime.now().date() - timedelta(days=settings.COST_EXPLORER_CACHE_SETTLE_DAYS)
+
+    def _get_cached_cost_and_usage_pages(self, start_date: str, end_date: str,
+                                         account_id: Optional[str], granularity: str) -> List[Dict]:
+        """``_get_cost_and_usage_pages`` through the Cost Explorer cache, counting hits and misses."""
+        if not settings.COST_EXPLORER_CACHE:
+            return self._get_cost_and_usage_pages(start_date, end_date, account_id, granularity)
+
+        cache = caches[settings.COST_EXPLORER_CACHE]
+        request = {
+            'access_key': self.access_key,
+            'start': start_date,
+            'end': end_date,
+            'account_id': account_id,
+            'granularity': granularity,
+        }
+        key = 'cost_explorer:' + hashlib.sha256(json.dumps(request, sort_keys=True).encode()).hexdigest()
+        pages = cache.get(key)
+        hit = pages is not None
+        with self._cache_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        self._count_cache_lookup(cache, hit)
+        if hit:
+            self.logger.info(f"Cost Explorer cache hit for {start_date} to {end_date}")
+            return pages
+
+        pages = self._get_cost_and_usage_pages(start_date, end_date, account_id, granularity)
+        closed = datetime.strptime(end_date, '%Y-%m-%d').date() <= self._settled_before()
+        cache.set(key, pages, settings.COST_EXPLORER_CACHE_TTL_CLOSED if closed else settings.COST_EXPLORER_CACHE_TTL_RECENT)
+        return pages
+
+    @staticmethod
+    def _count_cache_lookup(cache, hit: bool):
+        counter = 'cost_explorer:hits' if hit else 'cost_explorer:misses'
+        # Totals outlive the entries they count
+        if not cache.add(counter, 1, timeout=None):
+            try:
+                cache.incr(counter)
+            except ValueError:
+                cache.set(counter, 1, timeout=None)
+
+    @staticmethod
+    def get_cache_stats() -> Dict:
+        """Cost Explorer cache hits and misses in total, with the hit rate."""
+        if not settings.COST_EXPLORER_CACHE:
+            return {'hits': 0, 'misses': 0, 'hit_rate': 0.0}
+        cache = caches[settings.COST_EXPLORER_CACHE]
+        hits = cache.get('cost_explorer:hits', 0)
+        misses = cache.get('cost_explorer:misses', 0)
+        return {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses) if hits + misses else 0.0}
+
+    def _get_cost_and_usage_pages(self, start_date: str, end_date: str,
+                                  account_id: Optional[str], granularity: str) -> List[Dict]:
+        """Every page of one get_cost_and_usage request, following NextPageToken."""
         filters = {
             'TimePeriod': {
                 'Start': start_date,
@@ -285,18 +382,71 @@ class AWSAccountManager:
                 }
             }
         
-        results = self.ce_client.get_cost_and_usage(**filters)
-        return results
-        # except Exception as e:
-        #     self.logger.error(f"Error fetching cost and usage data: {str(e)}")
-        #     raise
+        pages = []
+        while True:
+            response = self.ce_client.get_cost_and_usage(**filters)
+            pages.append(response)
+            if not response.get('NextPageToken'):
+                return pages
+            filters['NextPageToken'] = response['NextPageToken']
+
+    @staticmethod
+    def _date_windows(start_date: str, end_date: str, window_days: int, granularity: str,
+                      split_at: Optional[date] = None) -> List[tuple]:
+        """
+        Split [start_date, end_date) into consecutive windows of ``window_days`` (0 = one window), also split at ``split_at``.
+
+        MONTHLY windows start and end on month boundaries (or the range's ends).
+        """
+        start = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end = datetime.strptime(end_date, '%Y-%m-%d').date()
+        if split_at and granularity == 'MONTHLY':
+            # A month split across windows would come back as two partial results
+            split_at = split_at.replace(day=1)
+        windows = []
+        while start < end:
+            boundary = start + timedelta(days=window_days) if window_days and window_days > 0 else end
+            if granularity == 'MONTHLY' and boundary.day != 1:
+                boundary = (boundary.replace(day=1) + timedelta(days=32)).replace(day=1)
+            if split_at and start < split_at < boundary:
+                boundary = split_at
+            boundary = min(boundary, end)
+            windows.append((start.strftime('%Y-%m-%d'), boundary.strftime('%Y-%m-%d')))
+            start = boundary
+        return windows or [(start_date, end_date)]
+
+    @staticmethod
+    def _merge_cost_and_usage_pages(pages: List[Dict]) -> Dict:
+        """
+        Merge get_cost_and_usage pages into one response.
+
+        A time period whose groups continue on the next page is returned again
+        there, so its groups are appended to the first occurrence.
+        """
+        results = {}
+        dimension_values = {}
+        for page in pages:
+            for result in page.get('ResultsByTime', []):
+                period = (result['TimePeriod']['Start'], result['TimePeriod']['End'])
+                if period in results:
+                    results[period]['Groups'].extend(result.get('Groups', []))
+                else:
+                    results[period] = {**result, 'Groups': list(result.get('Groups', []))}
+            for attributes in page.get('DimensionValueAttributes', []):
+                dimension_values.setdefault(attributes['Value'], attributes)
+        return {
+            'GroupDefinitions': pages[0].get('GroupDefinitions', []) if pages else [],
+            'ResultsByTime': list(results.values()),
+            'DimensionValueAttributes': list(dimension_values.values()),
+        }
 
-    def generate_billing_report(self, date):
+    def generate_billing_report(self, date, window_days: Optional[int] = None):
         """
         Generate a comprehensive billing report for all accounts.
         
         Args:
             date (str): Start date in YYYY-MM-DD format
+            window_days (int, optional): Fetch the range in windows of this many days (see ``get_cost_and_usage``)
             
         Returns:
             pd.DataFrame: Billing report as a pandas DataFrame
@@ -309,7 +459,7 @@ class AWSAccountManager:
         account_email_map = {acc['id']: acc['email'] for acc in accounts}
         
         # Get cost data
-        cost_data = self.get_cost_and_usage(date, (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'))
+        cost_data = self.get_cost_and_usage(date, (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d'), window_days=window_days)
         
         # Process the data
         rows = []
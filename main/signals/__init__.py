@@ -1,2 +1,3 @@
 from .aws_service import *
-from .partner_manager_signal import *
\ No newline at end of file
+from .partner_manager_signal import *
+from .ingest import *
@@ -1,19 +1,28 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from main.models import RootInvoice, AwsAccount, AwsCostManagement, MonthlyCostByAccount, AccountService
 from django.conf import settings
 from django.db.models import Sum
-from main.utils import process_invoice_csv_data
+from main.helpers.job_queue import enqueue_job
+from main.helpers.cost_rollup import update_account_invoices
 from main.services import AWSAccountManager
 
 @receiver(post_save, sender=RootInvoice, weak=False)
 def invoice_created_handler(sender, instance, created, **kwargs):
     """
     Signal triggered when an RootInvoice is created.
-    Processes the invoice CSV immediately after save.
+    Queues a background job that processes the invoice CSV, unless the caller set
+    ``skip_processing`` because it ingests the file itself (e.g. as one part of
+    a multi-file month).
     """
-    if created:
-        process_invoice_csv_data(instance)
+    if created and not getattr(instance, 'skip_processing', False):
+        enqueue_job('INGEST_INVOICES', {'invoice_ids': [instance.pk]})
+
+
+@receiver(post_delete, sender=RootInvoice, weak=False)
+def invoice_deleted_handler(sender, instance, **kwargs):
+    """Recompute the account totals of the billing period without the deleted invoice's costs."""
+    update_account_invoices(instance)
 
 
 
@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, pre_delete
+from django.dispatch import Signal, receiver
+
+from main.helpers.account_service_partitions import drop_partition, is_partitioned
+from main.helpers.dimension_resolver import get_dimension_resolver
+from main.models import AwsAccount, LineItemText, RootInvoice, Service
+
+# Sent with sender=AccountService once per chunk of CUR rows a loader stores, instead of one
+# post_save per row. Arguments: ``invoice`` (the RootInvoice being loaded) and ``queryset``
+# (the AccountService rows just created), so receivers can work on the batch with set-based queries.
+account_services_bulk_created = Signal()
+
+
+@receiver(post_delete, sender=AwsAccount)
+def evict_deleted_account(sender, instance, **kwargs):
+    """Keep deleted accounts out of the ingest dimension cache."""
+    get_dimension_resolver().forget_account(instance.account_id)
+
+
+@receiver(post_delete, sender=Service)
+def evict_deleted_service(sender, instance, **kwargs):
+    """Keep deleted services out of the ingest dimension cache."""
+    get_dimension_resolver().forget_service(instance.name, instance.region)
+
+
+@receiver(post_delete, sender=LineItemText)
+def evict_deleted_text(sender, instance, **kwargs):
+    """Keep deleted text values out of the ingest dimension cache."""
+    get_dimension_resolver().forget_text(instance.value)
+
+
+@receiver(pre_delete, sender=RootInvoice)
+def drop_invoice_partition(sender, instance, **kwargs):
+    """Drop the invoice's AccountService partition, so the cascade does not delete its rows one by one."""
+    if is_partitioned():
+        drop_partition(instance.pk)
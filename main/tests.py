@@ -1,3 +1,279 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.core.files import File
+from django.db.models import Count, Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from main.fields import from_nanos, to_nanos
+from main.helpers.cur_generator import write_cur_report
+from main.helpers.cur_ingest import CUR_ACCOUNT_COLUMN, CUR_COST_COLUMNS, CUR_DATE_COLUMNS
+from main.helpers.cur_quarantine import redrive_quarantined_rows
+from main.helpers.dimension_resolver import get_dimension_resolver
+from main.helpers.ingest_checkpoint import commit_chunk
+from main.helpers.ingest_coordinator import ingest_invoices
+from main.helpers.job_queue import claim_next_job, enqueue_job, requeue_stale_jobs, run_job
+from main.models import (
+    AccountService, AWSAccountInvoice, BackgroundJob, DailyCostRollup, IngestCheckpoint, IngestRun,
+    QuarantinedCurRow, RootInvoice,
+)
+from main.utils import process_invoice_csv_data
+
+BILLING_PERIOD = date(2025, 3, 1)
+BLENDED_COST_COLUMN = CUR_COST_COLUMNS['blended_cost']
+
+
+def read_report(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def expected_totals(*reports) -> dict:
+    """Blended cost per account of CUR reports, summed exactly from their raw cells."""
+    totals = {}
+    for report in reports:
+        for account_id, cost in zip(report[CUR_ACCOUNT_COLUMN], report[BLENDED_COST_COLUMN]):
+            totals[account_id] = totals.get(account_id, 0) + (to_nanos(cost) if cost else 0)
+    return {account_id: from_nanos(nanos) for account_id, nanos in totals.items()}
+
+
+def stored_totals() -> dict:
+    return {
+        account_id: total
+        for account_id, total in AWSAccountInvoice.objects.values_list('aws_account__account_id', 'total_ammount')
+    }
+
+
+class IngestTestCase(TestCase):
+    """Loads generated CUR reports into a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=os.path.join(self.workdir, 'media'), CUR_INGEST_WORKERS=1)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        # Rows cached by an earlier test were rolled back with it
+        get_dimension_resolver().clear()
+
+    def write_report(self, name, rows, seed=0, **kwargs) -> str:
+        path = os.path.join(self.workdir, name)
+        write_cur_report(path, rows, accounts=5, services=4, regions=3, billing_period=BILLING_PERIOD, seed=seed, **kwargs)
+        return path
+
+    def save_report(self, name, report: pd.DataFrame) -> str:
+        path = os.path.join(self.workdir, name)
+        report.to_csv(path, index=False)
+        return path
+
+    def create_invoice(self, path, **kwargs) -> RootInvoice:
+        with open(path, 'rb') as file_data:
+            invoice = RootInvoice(
+                invoice_file=File(file_data, name=os.path.basename(path)),
+                invoice_date=BILLING_PERIOD + timedelta(days=31),
+                bill_start_date=BILLING_PERIOD,
+                bill_end_date=BILLING_PERIOD.replace(day=31),
+                **kwargs
+            )
+            invoice.skip_processing = True
+            invoice.save()
+        return invoice
+
+    def assertRollupsMatchRows(self, invoice):
+        rollups = DailyCostRollup.objects.filter(invoice=invoice).aggregate(cost=Sum('blended_cost'), rows=Sum('line_items'))
+        rows = AccountService.objects.filter(invoice=invoice).aggregate(cost=Sum('blended_cost'), rows=Count('id'))
+        self.assertEqual(rollups, rows)
+
+
+class ChunkedIngestTests(IngestTestCase):
+    def test_chunked_totals_match_exact_sums(self):
+        path = self.write_report('report.csv', 2000, nan_ratio=0.0)
+        invoice = self.create_invoice(path)
+
+        process_invoice_csv_data(invoice, chunk_size=300)
+
+        self.assertEqual(AccountService.objects.filter(invoice=invoice).count(), 2000)
+        self.assertEqual(stored_totals(), expected_totals(read_report(path)))
+        self.assertRollupsMatchRows(invoice)
+        checkpoint = IngestCheckpoint.objects.get(invoice=invoice)
+        self.assertEqual((checkpoint.status, checkpoint.rows_committed, checkpoint.chunks_committed), ('COMPLETED', 2000, 7))
+
+    def test_resume_after_mid_file_failure(self):
+        path = self.write_report('report.csv', 1000, nan_ratio=0.0)
+        invoice = self.create_invoice(path)
+
+        calls = []
+
+        def fail_third_chunk(*args):
+            calls.append(args)
+            if len(calls) == 3:
+                raise RuntimeError("worker killed")
+            commit_chunk(*args)
+
+        with mock.patch('main.utils.commit_chunk', side_effect=fail_third_chunk):
+            process_invoice_csv_data(invoice, chunk_size=200)
+
+        checkpoint = IngestCheckpoint.objects.get(invoice=invoice)
+        self.assertEqual((checkpoint.status, checkpoint.rows_committed), ('IN_PROGRESS', 400))
+        self.assertEqual(AccountService.objects.filter(invoice=invoice).count(), 400)
+        self.assertRollupsMatchRows(invoice)
+
+        process_invoice_csv_data(invoice, chunk_size=200, resume=True)
+
+        checkpoint.refresh_from_db()
+        self.assertEqual((checkpoint.status, checkpoint.rows_committed), ('COMPLETED', 1000))
+        stored = AccountService.objects.filter(invoice=invoice)
+        self.assertEqual(stored.count(), 1000)
+        self.assertEqual(stored.values('line_item_id').distinct().count(), 1000)
+        self.assertEqual(stored_totals(), expected_totals(read_report(path)))
+        self.assertRollupsMatchRows(invoice)
+
+
+class IncrementalIngestTests(IngestTestCase):
+    def test_refresh_one_part_of_a_multi_part_month(self):
+        first_path = self.write_report('part-1.csv', 600, seed=1)
+        second_path = self.write_report('part-2.csv', 400, seed=2)
+        first = self.create_invoice(first_path)
+        second = self.create_invoice(second_path)
+        ingest_invoices([first, second], chunk_size=250)
+        second_rows = set(AccountService.objects.filter(invoice=second).values_list('pk', 'row_hash'))
+
+        # The redelivered first part: a few costs corrected, a few lines gone and a few new ones
+        report = read_report(first_path)
+        report.loc[:9, BLENDED_COST_COLUMN] = '1.2345678901'
+        extra = read_report(self.write_report('extra.csv', 5, seed=3))
+        redelivered = pd.concat([report.iloc[:-4], extra], ignore_index=True)
+        with open(self.save_report('part-1-v2.csv', redelivered), 'rb') as file_data:
+            first.invoice_file.save('part-1-v2.csv', File(file_data))
+
+        process_invoice_csv_data(first, chunk_size=250, incremental=True)
+
+        run = IngestRun.objects.filter(invoice=first, incremental=True).get()
+        self.assertEqual(run.rows_written, 15)
+        self.assertEqual(run.rows_skipped, 586)
+        self.assertEqual(AccountService.objects.filter(invoice=first).count(), 601)
+        self.assertEqual(set(AccountService.objects.filter(invoice=second).values_list('pk', 'row_hash')), second_rows)
+        self.assertEqual(stored_totals(), expected_totals(redelivered, read_report(second_path)))
+        self.assertRollupsMatchRows(first)
+
+    def test_new_assembly_replaces_the_previous_one(self):
+        previous = self.create_invoice(self.write_report('old.csv', 300, seed=1))
+        ingest_invoices([previous])
+        path = self.write_report('new.csv', 200, seed=2)
+        current = self.create_invoice(path, is_active=False)
+
+        # A failed load keeps the previous assembly and its totals
+        with mock.patch('main.helpers.ingest_coordinator._ingest_part', side_effect=RuntimeError("boom")):
+            result = ingest_invoices([current], replaces=[previous.pk])
+        self.assertEqual(result['failed'], [current.pk])
+        self.assertTrue(RootInvoice.objects.filter(pk=previous.pk).exists())
+        self.assertEqual(stored_totals(), expected_totals(read_report(previous.invoice_file.path)))
+
+        ingest_invoices([current], replaces=[previous.pk], resume=True)
+
+        self.assertEqual(list(RootInvoice.objects.values_list('pk', 'is_active')), [(current.pk, True)])
+        expected = expected_totals(read_report(path))
+        # Accounts billed only by the previous assembly are reset to 0
+        self.assertEqual({account_id: total for account_id, total in stored_totals().items() if account_id in expected}, expected)
+        self.assertFalse(any(total for account_id, total in stored_totals().items() if account_id not in expected))
+
+
+class QuarantineTests(IngestTestCase):
+    def test_quarantine_and_redrive(self):
+        report = read_report(self.write_report('report.csv', 500, nan_ratio=0.0))
+        report.loc[[10, 20, 30], BLENDED_COST_COLUMN] = 'abc'
+        report.loc[40, CUR_DATE_COLUMNS['usage_start_date']] = 'yesterday'
+        invoice = self.create_invoice(self.save_report('broken.csv', report))
+
+        process_invoice_csv_data(invoice, chunk_size=200)
+
+        quarantined = QuarantinedCurRow.objects.filter(invoice=invoice)
+        self.assertEqual(
+            list(quarantined.values_list('row_number', 'reason', 'columns')),
+            [
+                (12, 'INVALID_NUMBER', [BLENDED_COST_COLUMN]),
+                (22, 'INVALID_NUMBER', [BLENDED_COST_COLUMN]),
+                (32, 'INVALID_NUMBER', [BLENDED_COST_COLUMN]),
+                (42, 'INVALID_DATE', [CUR_DATE_COLUMNS['usage_start_date']]),
+            ],
+        )
+        self.assertEqual(AccountService.objects.filter(invoice=invoice).count(), 496)
+        self.assertEqual(stored_totals(), expected_totals(report.drop(index=[10, 20, 30, 40])))
+
+        # Fix all but one row, as in the admin
+        for row in quarantined.exclude(row_number=32):
+            row.raw_values[BLENDED_COST_COLUMN] = '2.5'
+            row.raw_values[CUR_DATE_COLUMNS['usage_start_date']] = '2025-03-05T00:00:00Z'
+            row.save()
+
+        self.assertEqual(redrive_quarantined_rows(invoice), {'redriven': 3, 'quarantined': 1})
+
+        self.assertEqual(quarantined.filter(status='REDRIVEN').count(), 3)
+        self.assertEqual(list(quarantined.filter(status='QUARANTINED').values_list('row_number', flat=True)), [32])
+        self.assertEqual(AccountService.objects.filter(invoice=invoice).count(), 499)
+        report.loc[[10, 20, 40], BLENDED_COST_COLUMN] = '2.5'
+        self.assertEqual(stored_totals(), expected_totals(report.drop(index=[30])))
+        self.assertRollupsMatchRows(invoice)
+
+
+def failing_job(payload):
+    raise RuntimeError(payload['error'])
+
+
+def succeeding_job(payload):
+    return {'echo': payload}
+
+
+@override_settings(JOB_RETRY_BACKOFF=60, JOB_LOCK_TIMEOUT=600)
+class JobQueueTests(TestCase):
+    def run_next(self):
+        job = claim_next_job('test-worker')
+        self.assertIsNotNone(job)
+        return run_job(job)
+
+    @mock.patch.dict('main.helpers.job_queue.JOB_HANDLERS', {'FETCH_INVOICES': 'main.tests.failing_job'})
+    def test_failed_job_is_retried_with_backoff_until_out_of_attempts(self):
+        job = enqueue_job('FETCH_INVOICES', {'error': 'S3 unavailable'}, max_attempts=2)
+
+        job = self.run_next()
+        self.assertEqual((job.status, job.attempts, job.locked_by), ('QUEUED', 1, None))
+        self.assertIn('S3 unavailable', job.last_error)
+        self.assertGreater(job.run_after, timezone.now() + timedelta(seconds=50))
+        # Not due before its backoff has passed
+        self.assertIsNone(claim_next_job('test-worker'))
+
+        BackgroundJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        job = self.run_next()
+        self.assertEqual((job.status, job.attempts), ('FAILED', 2))
+        self.assertIsNotNone(job.finished_at)
+
+    @mock.patch.dict('main.helpers.job_queue.JOB_HANDLERS', {'FETCH_INVOICES': 'main.tests.succeeding_job'})
+    def test_succeeded_job_records_its_result(self):
+        enqueue_job('FETCH_INVOICES', {'month': '2025-03'})
+
+        job = self.run_next()
+
+        self.assertEqual((job.status, job.attempts, job.result), ('SUCCEEDED', 1, {'echo': {'month': '2025-03'}}))
+
+    def test_stale_running_jobs_are_requeued(self):
+        retried = enqueue_job('FETCH_INVOICES', max_attempts=3)
+        exhausted = enqueue_job('FETCH_INVOICES', max_attempts=1)
+        alive = enqueue_job('FETCH_INVOICES', max_attempts=3)
+        for job in (retried, exhausted, alive):
+            self.assertIsNotNone(claim_next_job('lost-worker'))
+        # Only the live job's worker is still heart-beating
+        BackgroundJob.objects.exclude(pk=alive.pk).update(updated_at=timezone.now() - timedelta(seconds=601))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+
+        retried.refresh_from_db()
+        self.assertEqual((retried.status, retried.locked_by, retried.attempts), ('QUEUED', None, 1))
+        self.assertGreater(retried.run_after, timezone.now())
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, 'FAILED')
+        alive.refresh_from_db()
+        self.assertEqual((alive.status, alive.locked_by), ('RUNNING', 'lost-worker'))
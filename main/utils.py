@@ -1,10 +1,17 @@
-import pandas as pd
 import os
-from django.db import transaction
-from main.models import AwsAccount, Service, AccountService, AWSAccountInvoice
-from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from main.models import QuarantinedCurRow
 import math
-from django.db.models.signals import post_save
+from contextlib import nullcontext
+from main.helpers.cur_ingest import read_cur_chunks, prepare_cur_frame
+from main.helpers.cur_loader import get_account_service_loader
+from main.helpers.cur_incremental import LineItemReconciler
+from main.helpers.ingest_metrics import IngestMetrics, record_ingest_run
+from main.helpers.dimension_resolver import get_dimension_resolver
+from main.helpers.cost_rollup import add_daily_cost_rollups, refresh_daily_cost_rollups, update_account_invoices
+from main.helpers.cur_quarantine import quarantine_rows
+from main.helpers.ingest_checkpoint import commit_chunk, complete_checkpoint, start_checkpoint
 
 def handle_nan(value):
     if isinstance(value, float) and (math.isnan(value) or value == 'NaN'):
@@ -12,140 +19,237 @@ def handle_nan(value):
     return value
 
 
-def process_invoice_csv_data(invoice):
+def resolve_dimensions(frame, existing_accounts, existing_services):
+    """
+    Make sure every account and (service, region) in a prepared CUR frame exists.
+
+    Only the keys present in the frame are looked up (or created) through the
+    process-wide DimensionResolver, and the ``existing_accounts`` /
+    ``existing_services`` lookups are updated in place, so they can be reused
+    for the next chunk.
+    """
+    get_dimension_resolver().resolve(frame, existing_accounts, existing_services)
+
+
+def forget_dimensions(existing_accounts, existing_services):
+    """
+    Drop the dimension rows cached by this process: the DimensionResolver's and
+    the given ``existing_accounts`` / ``existing_services`` lookups.
+
+    Used when a load hits an IntegrityError, since rows deleted by another
+    process or with raw SQL are never evicted from these caches.
+    """
+    get_dimension_resolver().clear()
+    existing_accounts.clear()
+    existing_services.clear()
+
+
+def _ingest_chunk(chunk, next_offset, invoice, existing_accounts, existing_services, loader, reconciler, checkpoint, batch_size, metrics):
+    """Quarantine, resolve and load (or diff) one chunk of a CUR file; returns the prepared frame and the rejected rows."""
+    with metrics.phase('prepare'):
+        frame, rejected = prepare_cur_frame(chunk)
+    if len(rejected):
+        with metrics.phase('quarantine'):
+            quarantine_rows(invoice, chunk, rejected, batch_size)
+
+    with metrics.phase('dimensions'):
+        resolve_dimensions(frame, existing_accounts, existing_services)
+        interned = get_dimension_resolver().intern_texts(frame)
+
+    if reconciler is not None:
+        with metrics.phase('reconcile'):
+            reconciler.filter_changed(interned)
+    else:
+        loader.load(interned, invoice, existing_accounts, existing_services)
+        with metrics.phase('rollups'):
+            add_daily_cost_rollups(invoice, frame, existing_accounts, existing_services, batch_size)
+
+    if checkpoint is not None:
+        with metrics.phase('checkpoint'):
+            commit_chunk(checkpoint, len(frame) + len(rejected), next_offset)
+    return frame, rejected
+
+
+def ingest_invoice_rows(invoice, existing_accounts, existing_services, chunk_size=None, batch_size=None, incremental=False, metrics=None, checkpoint=None):
+    """
+    Stream the CUR file of a RootInvoice into AccountService rows.
+
+    The CSV is read ``chunk_size`` rows at a time and each chunk is written in
+    batches of ``batch_size`` by the loader selected with ``CUR_INGEST_LOADER``
+    (COPY on PostgreSQL, ``bulk_create`` elsewhere), so memory use is bounded by
+    the chunk size rather than the file size.
+
+    With ``incremental=True`` the file is treated as a fresh copy of the
+    invoice's CUR part: it is diffed against the AccountService rows already
+    stored for the invoice (by ``line_item_id`` and content hash) and only new,
+    changed and vanished lines are written, instead of appending every row
+    again. Rows of the period's other parts are never touched.
+
+    With an IngestCheckpoint (see ``start_checkpoint``) reading starts where the
+    checkpoint stopped and every chunk is committed in its own transaction
+    together with the advanced checkpoint and the chunk's rollups, so an
+    interrupted load can resume without reading or storing any row twice.
+    Incremental loads can't be checkpointed. A checkpointed chunk
+    that fails with an IntegrityError (a cached account, service or text was
+    deleted meanwhile) is retried once with the dimension caches cleared.
+
+    Line items that fail validation are not loaded; they are stored with their
+    raw values as QuarantinedCurRows of the invoice instead. An incremental
+    load first drops the invoice's rows still waiting in quarantine.
+
+    The DailyCostRollup rows of the invoice are updated with every chunk
+    loaded (see ``add_daily_cost_rollups``); an incremental load rebuilds them
+    from the stored rows at the end.
+
+    Phase timings and row counters are collected in ``metrics`` when given.
+
+    Must run inside a transaction unless checkpointed. Returns the number of rows read.
+    """
+    if incremental and checkpoint is not None:
+        raise ValueError("Incremental loads can't be checkpointed.")
+    chunk_size = chunk_size or settings.CUR_INGEST_CHUNK_SIZE
+    csv_file_path = invoice.invoice_file.path
+    metrics = metrics or IngestMetrics()
+    # Each chunk commits on its own when checkpointed, otherwise in the caller's transaction
+    chunk_transaction = transaction.atomic if checkpoint is not None else nullcontext
+
+    total_rows = 0
+    loader = get_account_service_loader(batch_size=batch_size, metrics=metrics)
+    metrics.loader = loader.name
+
+    reconciler = None
+    if incremental:
+        # The file is quarantined afresh; rows still waiting from an earlier pass would be stored twice
+        with metrics.phase('quarantine'):
+            QuarantinedCurRow.objects.filter(invoice=invoice, status='QUARANTINED').delete()
+        with metrics.phase('reconcile'):
+            reconciler = LineItemReconciler(invoice)
+
+    offset, first_row = (checkpoint.byte_offset, checkpoint.rows_committed) if checkpoint is not None else (0, 0)
+    chunks = read_cur_chunks(csv_file_path, chunk_size, offset=offset, first_row=first_row)
+    for chunk, next_offset in metrics.timed('parse_csv', chunks):
+        loaded_rows = loader.rows
+        try:
+            with chunk_transaction():
+                frame, rejected = _ingest_chunk(
+                    chunk, next_offset, invoice, existing_accounts, existing_services,
+                    loader, reconciler, checkpoint, batch_size, metrics,
+                )
+        except IntegrityError:
+            if checkpoint is None:
+                raise
+            # The cached dimension rows may have been deleted by another process; look them up again
+            print(f"⚠️ Integrity error while loading invoice {invoice.id}, retrying the chunk with fresh dimensions")
+            forget_dimensions(existing_accounts, existing_services)
+            loader.rows = loaded_rows
+            loader.partitions.discard(invoice.pk)
+            checkpoint.refresh_from_db()
+            with chunk_transaction():
+                frame, rejected = _ingest_chunk(
+                    chunk, next_offset, invoice, existing_accounts, existing_services,
+                    loader, reconciler, checkpoint, batch_size, metrics,
+                )
+        del chunk
+        if len(rejected):
+            metrics.rows_quarantined += len(rejected)
+            metrics.invalid_values += int(rejected['columns'].str.len().sum())
+        total_rows += len(frame) + len(rejected)
+        metrics.rows_read += len(frame) + len(rejected)
+    if metrics.rows_quarantined:
+        print(f"⚠️ Quarantined {metrics.rows_quarantined} invalid rows of invoice {invoice.id}")
+
+    if reconciler is not None:
+        with metrics.phase('reconcile'):
+            changes = reconciler.apply(existing_accounts, existing_services, loader, batch_size)
+        metrics.rows_written += changes['inserted'] + changes['updated']
+        metrics.rows_skipped += changes['unchanged']
+        print(
+            f"🔁 Incremental sync: {changes['inserted']} inserted, {changes['updated']} updated, "
+            f"{changes['deleted']} deleted, {changes['unchanged']} unchanged"
+        )
+    else:
+        metrics.rows_written += loader.rows
+
+    with chunk_transaction(), metrics.phase('rollups'):
+        if reconciler is not None:
+            # The delta also updated and deleted stored rows, so the rollups are rebuilt from what is stored now
+            refresh_daily_cost_rollups([invoice.pk])
+        if checkpoint is not None:
+            complete_checkpoint(checkpoint)
+
+    print(f"📥 {loader.name} loader wrote {loader.rows} rows in {loader.seconds:.2f}s ({loader.rows_per_second:.0f} rows/s)")
+    return total_rows
+
+
+def _ingest_incremental(invoice, existing_accounts, existing_services, chunk_size, batch_size, metrics, update_totals):
+    with transaction.atomic():
+        total_rows = ingest_invoice_rows(
+            invoice, existing_accounts, existing_services,
+            chunk_size=chunk_size, batch_size=batch_size, incremental=True, metrics=metrics,
+        )
+        if update_totals:
+            with metrics.phase('account_invoices'):
+                update_account_invoices(invoice)
+    return total_rows
+
+
+def ingest_invoice_delta(invoice, existing_accounts, existing_services, chunk_size=None, batch_size=None, metrics=None, update_totals=True):
+    """
+    Refresh the rows of a RootInvoice from its (re-delivered) CUR file with an
+    incremental load (see ``ingest_invoice_rows``) in one transaction, together
+    with the period's AWSAccountInvoice totals unless ``update_totals`` is off.
+
+    Foreign keys are checked on commit, so a cached dimension deleted meanwhile
+    fails the whole load; it is retried once with the dimension caches cleared.
+    Returns the number of rows read.
+    """
+    metrics = metrics or IngestMetrics()
+    try:
+        return _ingest_incremental(invoice, existing_accounts, existing_services, chunk_size, batch_size, metrics, update_totals)
+    except IntegrityError:
+        print(f"⚠️ Integrity error while loading invoice {invoice.id}, retrying with fresh dimensions")
+        forget_dimensions(existing_accounts, existing_services)
+        metrics.reset_counters()
+        return _ingest_incremental(invoice, existing_accounts, existing_services, chunk_size, batch_size, metrics, update_totals)
+
+
+def process_invoice_csv_data(invoice, chunk_size=None, batch_size=None, incremental=False, resume=False):
+    """
+    Load the CUR file of a RootInvoice into AccountService rows and update the
+    per-account AWSAccountInvoice totals. The load is recorded as an IngestRun.
+
+    Full loads are checkpointed chunk by chunk (see ``ingest_invoice_rows``):
+    rows an earlier load left behind are removed first, or, with ``resume``,
+    the load continues after the last committed chunk. Incremental loads run
+    in one transaction (see ``ingest_invoice_delta``).
+
+    See ``ingest_invoice_rows`` for the chunking and ``incremental`` options.
+    """
     try:
         csv_file_path = invoice.invoice_file.path
         if not os.path.exists(csv_file_path):
             print(f"❌ CSV file not found: {csv_file_path}")
             return
 
-        df = pd.read_csv(csv_file_path, low_memory=False, dtype=str)
-
-        existing_accounts = {acc.account_id: acc for acc in AwsAccount.objects.all()}
-        existing_services = {f"{srv.name}-{srv.region}": srv for srv in Service.objects.all()}
-
-        new_accounts = {}
-        new_services = {}
-        bulk_insert_data = []
-
-        def clean_date(date_str):
-            try:
-                if pd.isna(date_str) or date_str.strip() == "":
-                    return None
-                return datetime.strptime(date_str.split("T")[0], "%Y-%m-%d").date()
-            except Exception as e:
-                print(f"⚠️ Error parsing date: {date_str} - {e}")
-                return None
-
-        def format_float(value):
-            try:
-                num = pd.to_numeric(value, errors='coerce')
-                return float(format(num, ".10f")) if not pd.isna(num) else 0.0
-            except Exception:
-                return 0.0
-
-        each_aws_account_total_bill_dict = {}
-
-        for _, row in df.iterrows():
-            try:
-                aws_account_id = str(row.get('lineItem/UsageAccountId', '')).strip()
-                service_name = str(row.get('product/ProductName', '')).strip()
-                
-                if service_name == "nan" or service_name == "NaN" or service_name == None:
-                    service_name = str(row.get('lineItem/LineItemDescription', '')).strip()
-                    if service_name == "nan" or service_name == "NaN" or service_name == None:
-                        service_name = "Unknown Service"
-                    
-                region = str(row.get('product/region', 'us-east-1')).strip() or "us-east-1"
-                
-                if region == "nan" or region == "NaN" or region == None:
-                    region = "global"
-
-                usage_start_date = clean_date(row.get('lineItem/UsageStartDate', ''))
-                usage_end_date = clean_date(row.get('lineItem/UsageEndDate', ''))
-
-                if aws_account_id in existing_accounts:
-                    aws_account = existing_accounts[aws_account_id]
-                elif aws_account_id in new_accounts:
-                    aws_account = new_accounts[aws_account_id]
-                else:
-                    aws_account = AwsAccount(account_id=aws_account_id, name=f"AWS Account {aws_account_id}")
-                    new_accounts[aws_account_id] = aws_account
-
-                service_key = f"{service_name}-{region}"
-                if service_key in existing_services:
-                    service = existing_services[service_key]
-                elif service_key in new_services:
-                    service = new_services[service_key]
-                else:
-                    service = Service(name=service_name, region=region)
-                    new_services[service_key] = service
-
-                bulk_insert_data.append(AccountService(
-                    aws_account=aws_account,
-                    service=service,
-                    invoice=invoice,
-                    blended_cost=handle_nan(format_float(row.get('lineItem/BlendedCost', 0.0))),
-                    usage_amount=handle_nan(format_float(row.get('lineItem/UsageAmount', 0.0))),
-                    unblendend_cost=handle_nan(format_float(row.get('lineItem/UnblendedCost', 0.0))),
-                    usage_start_date=usage_start_date,
-                    usage_end_date=usage_end_date,
-                    product_description=row.get('product/description', ''),
-                    tax_type=row.get('lineItem/TaxType', ''),
-                    line_item_id=row.get('identity/LineItemId', ''),
-                    product_code=row.get('lineItem/ProductCode', ''),
-                    currency_code=row.get('lineItem/CurrencyCode', 'USD'),
-                    public_on_demand_cost_pricing=handle_nan(row.get('pricing/publicOnDemandRate', 0.0)),
-                    usage_unit_pricing=row.get('pricing/unit', ''),
-                    usage_term_pricing=row.get('pricing/term', ''),
-                    public_on_demand_rate_pricing=handle_nan(row.get('pricing/publicOnDemandCost', 0.0)),
-                    savings_plan_used_commitment=handle_nan(row.get('savingsPlan/UsedCommitment', 0.0)),
-                    savings_plan_savings_plan_rate=handle_nan(row.get('savingsPlan/SavingsPlanRate', 0.0)),
-                    savings_plan_total_commitment_to_date=handle_nan(row.get('savingsPlan/TotalCommitmentToDate', 0.0)),
-                    savings_plan_savings_plan_effective_cost=handle_nan(row.get('savingsPlan/SavingsPlanEffectiveCost', 0.0)),
-                    savings_plan_savings_plan_arn=row.get('savingsPlan/SavingsPlanARN', ''),
-                    savings_plan_recurring_commitment_for_billing_period=handle_nan(row.get('savingsPlan/RecurringCommitmentForBillingPeriod', 0.0)),
-                    savings_plan_amortized_upfront_commitment_for_billing_period=handle_nan(row.get('savingsPlan/AmortizedUpfrontCommitmentForBillingPeriod', 0.0))
-                ))
-                
-                each_aws_account_total_bill_dict[aws_account_id] = each_aws_account_total_bill_dict.get(aws_account_id, 0.0) + format_float(row.get('lineItem/BlendedCost', 0.0))
-
-            except Exception as e:
-                print(f"⚠️ Skipping row due to error: {e}")
-
-        with transaction.atomic():
-            if new_accounts:
-                AwsAccount.objects.bulk_create(new_accounts.values(), ignore_conflicts=True)
-                existing_accounts.update({acc.account_id: acc for acc in AwsAccount.objects.all()})
-
-            if new_services:
-                Service.objects.bulk_create(new_services.values(), ignore_conflicts=True)
-                existing_services.update({f"{srv.name}-{srv.region}": srv for srv in Service.objects.all()})
-
-            for account_service in bulk_insert_data:
-                account_service.aws_account = existing_accounts[account_service.aws_account.account_id]
-                service_key = f"{account_service.service.name}-{account_service.service.region}"
-                account_service.service = existing_services[service_key]
-
-            created_objs  = AccountService.objects.bulk_create(bulk_insert_data)
-            for obj in created_objs:
-                post_save.send(sender=AccountService, instance=obj, created=True)
-
-
-
-            for aws_account_id, total_bill in each_aws_account_total_bill_dict.items():
-                aws_account = existing_accounts[aws_account_id]
-                aws_invoice, created = AWSAccountInvoice.objects.get_or_create(
-                    aws_account=aws_account,
-                    bill_start_date=invoice.bill_start_date,
-                    bill_end_date=invoice.bill_end_date,
-                    defaults={'total_ammount': total_bill, 'invoice_date': invoice.invoice_date}
+        existing_accounts = {}
+        existing_services = {}
+
+        with record_ingest_run(invoice, incremental=incremental) as metrics:
+            if incremental:
+                total_rows = ingest_invoice_delta(
+                    invoice, existing_accounts, existing_services,
+                    chunk_size=chunk_size, batch_size=batch_size, metrics=metrics,
+                )
+            else:
+                checkpoint = start_checkpoint(invoice, resume=resume)
+                total_rows = ingest_invoice_rows(
+                    invoice, existing_accounts, existing_services,
+                    chunk_size=chunk_size, batch_size=batch_size, metrics=metrics, checkpoint=checkpoint,
                 )
-                if not created:
-                    aws_invoice.total_ammount = total_bill
-                    aws_invoice.save()
+                with metrics.phase('account_invoices'), transaction.atomic():
+                    update_account_invoices(invoice)
 
-        print(f"✅ Successfully processed {len(bulk_insert_data)} rows from {csv_file_path}")
+        print(f"✅ Successfully processed {total_rows} rows from {csv_file_path}")
 
     except Exception as e:
         print(f"❌ Failed to process invoice {invoice.id}: {e}")
@@ -142,10 +142,44 @@ AWS_SECRET_ACCESS_KEY = env('AWS_SECRET_ACCESS_KEY')
 BUCKET_NAME = env('BUCKET_NAME')
 BUCKET_PREFIX = env('BUCKET_PREFIX')
 BUCKET_REGION = env('BUCKET_REGION')
+CUR_SOURCE = env('CUR_SOURCE', default='s3')  # s3 | local | dotted path to a CurSource class
+CUR_SOURCE_DIR = env('CUR_SOURCE_DIR', default=None)  # local source: directory laid out like the bucket, e.g. an NFS mirror
+CUR_REPORT_NAME = env('CUR_REPORT_NAME', default=None)  # defaults to the last segment of BUCKET_PREFIX
+CUR_DOWNLOAD_WORKERS = env.int('CUR_DOWNLOAD_WORKERS', default=4)  # report parts downloaded at the same time
+CUR_DOWNLOAD_MAX_CONCURRENCY = env.int('CUR_DOWNLOAD_MAX_CONCURRENCY', default=10)  # threads fetching the parts of one file
+CUR_DOWNLOAD_PART_SIZE_MB = env.int('CUR_DOWNLOAD_PART_SIZE_MB', default=16)  # size of the ranged GETs a file is split into
+CUR_CACHE_DIR = env('CUR_CACHE_DIR', default=os.path.join(BASE_DIR, 'cur_cache'))  # downloaded report parts, by S3 key and ETag
+CUR_CACHE_MAX_SIZE_MB = env.int('CUR_CACHE_MAX_SIZE_MB', default=2048)  # least recently used parts are evicted above this; 0 disables the cache
 
 # SHA256
 SHA256_KEY = env('SHA256_KEY')
 
+# CUR ingestion
+CUR_INGEST_CHUNK_SIZE = env.int('CUR_INGEST_CHUNK_SIZE', default=50000)  # CSV rows parsed per chunk
+CUR_INGEST_BATCH_SIZE = env.int('CUR_INGEST_BATCH_SIZE', default=5000)  # AccountService rows per bulk_create
+CUR_INGEST_LOADER = env('CUR_INGEST_LOADER', default='auto')  # auto | copy | bulk_create | dotted path to a loader class
+CUR_INGEST_SEND_POST_SAVE = env.bool('CUR_INGEST_SEND_POST_SAVE', default=False)  # also send post_save for every created AccountService
+CUR_DIMENSION_CACHE_SIZE = env.int('CUR_DIMENSION_CACHE_SIZE', default=10000)  # accounts / services kept in each worker's LRU
+CUR_DIMENSION_LOOKUP_CHUNK_SIZE = env.int('CUR_DIMENSION_LOOKUP_CHUNK_SIZE', default=500)  # keys per IN (...) lookup query
+CUR_INGEST_WORKERS = env.int('CUR_INGEST_WORKERS', default=os.cpu_count() or 1)  # processes loading CUR parts in parallel
+CUR_PARTITION_ACCOUNT_SERVICES = env.bool('CUR_PARTITION_ACCOUNT_SERVICES', default=False)  # PostgreSQL only: migrate AccountService to one partition per invoice
+CUR_BENCHMARK_BASELINES = env('CUR_BENCHMARK_BASELINES', default=os.path.join(BASE_DIR, 'benchmarks', 'cur_ingest_baselines.json'))  # stored `benchmark_ingest` results
+
+# Cost Explorer (AWSAccountManager.get_cost_and_usage)
+COST_EXPLORER_WINDOW_DAYS = env.int('COST_EXPLORER_WINDOW_DAYS', default=0)  # split get_cost_and_usage ranges into windows of this many days; 0 = one range
+COST_EXPLORER_MAX_WORKERS = env.int('COST_EXPLORER_MAX_WORKERS', default=4)  # windows fetched at the same time
+COST_EXPLORER_CACHE = env('COST_EXPLORER_CACHE', default='default')  # Django cache alias for get_cost_and_usage results; empty disables caching
+COST_EXPLORER_CACHE_SETTLE_DAYS = env.int('COST_EXPLORER_CACHE_SETTLE_DAYS', default=3)  # days before today whose costs may still change
+COST_EXPLORER_CACHE_TTL_CLOSED = env.int('COST_EXPLORER_CACHE_TTL_CLOSED', default=7 * 24 * 3600)  # seconds results for settled days are kept
+COST_EXPLORER_CACHE_TTL_RECENT = env.int('COST_EXPLORER_CACHE_TTL_RECENT', default=3600)  # seconds results reaching into the last few days are kept
+
+# Background jobs (run by `manage.py run_jobs`)
+JOB_POLL_INTERVAL = env.int('JOB_POLL_INTERVAL', default=5)  # seconds an idle worker waits before polling again
+JOB_HEARTBEAT_INTERVAL = env.int('JOB_HEARTBEAT_INTERVAL', default=30)  # seconds between running job heartbeats
+JOB_LOCK_TIMEOUT = env.int('JOB_LOCK_TIMEOUT', default=600)  # seconds without a heartbeat before a job is re-queued
+JOB_RETRY_BACKOFF = env.int('JOB_RETRY_BACKOFF', default=60)  # seconds before the first retry, doubled per attempt
+CUR_POLL_INTERVAL = env.int('CUR_POLL_INTERVAL', default=300)  # seconds between `manage.py poll_cur` checks for new CUR deliveries
+
 
 # Django Jazzmin settings
 # JAZZMIN_SETTINGS = {